@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
 
     # Local Apps
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'resume.apps.ResumeConfig',
     'ai.apps.AiConfig',
@@ -110,6 +111,22 @@ DATABASES = {
 }
 
 
+# Password hashing
+# PBKDF2 runs in a small native thread pool, so hashing during logins and
+# registrations doesn't stall the other requests of a gevent worker (see
+# core/offload.py). PASSWORD_HASH_ITERATIONS picks the cost per environment,
+# e.g. a lower one for local load tests; 0 keeps Django's default. Stored hashes
+# are upgraded to the current cost on the next login.
+PASSWORD_HASHERS = [
+    'users.hashers.OffloadedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '0'))
+CPU_OFFLOAD_THREADS = int(os.environ.get('CPU_OFFLOAD_THREADS', '2'))  # concurrent hashes per worker process
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -158,7 +175,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django Rest Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication, with the user row cached in Redis
+        'users.authentication.CachedJWTAuthentication',
     ),
 }
 
@@ -172,3 +190,148 @@ CACHES = {
         }
     }
 }
+
+# AI Provider Clients
+# Provider SDK clients are shared per process (see ai/clients.py), so these
+# settings size each client's HTTP connection pool and bound every call.
+AI_CLIENT_CONNECT_TIMEOUT = float(os.environ.get('AI_CLIENT_CONNECT_TIMEOUT', '5'))  # seconds
+AI_CLIENT_READ_TIMEOUT = float(os.environ.get('AI_CLIENT_READ_TIMEOUT', '120'))  # seconds
+AI_CLIENT_MAX_CONNECTIONS = int(os.environ.get('AI_CLIENT_MAX_CONNECTIONS', '20'))
+AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS', '10'))
+AI_CLIENT_MAX_RETRIES = int(os.environ.get('AI_CLIENT_MAX_RETRIES', '1'))
+
+# Models using the 'fake' provider wait this long (seconds) and return a placeholder
+# resume, which lets load tests exercise the AI endpoints without paying for API calls.
+AI_FAKE_PROVIDER_LATENCY = float(os.environ.get('AI_FAKE_PROVIDER_LATENCY', '0'))
+
+# Background Jobs
+# Jobs are queued in Redis and executed by `python manage.py run_job_workers`.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_BACKOFF = float(os.environ.get('JOB_RETRY_BACKOFF', '2'))  # seconds, doubled on every attempt
+JOB_RETRY_BACKOFF_MAX = float(os.environ.get('JOB_RETRY_BACKOFF_MAX', '60'))  # seconds
+JOB_TTL = int(os.environ.get('JOB_TTL', str(60 * 60 * 24)))  # how long job results are kept
+JOB_LEASE_TIMEOUT = int(os.environ.get('JOB_LEASE_TIMEOUT', '60'))  # seconds without a heartbeat before a worker's jobs are requeued
+
+# AI Generation Cache
+# Identical generation requests (same model and input) are answered from Redis.
+# Set AI_GENERATION_CACHE_TTL to 0 to disable the cache.
+AI_GENERATION_CACHE_TTL = int(os.environ.get('AI_GENERATION_CACHE_TTL', str(60 * 60 * 24)))  # seconds
+AI_GENERATION_CACHE_MAX_BYTES = int(os.environ.get('AI_GENERATION_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+AI_GENERATION_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('AI_GENERATION_CACHE_MAX_ENTRY_BYTES', str(64 * 1024)))
+# How long concurrent identical requests wait for the one calling the provider
+AI_GENERATION_CACHE_LOCK_TIMEOUT = AI_CLIENT_READ_TIMEOUT + 10  # seconds
+AI_GENERATION_CACHE_POLL_INTERVAL = 0.2  # seconds
+
+# AI Request Quotas
+# Logged-in users are limited per model by AIModel.daily_limit. Anonymous callers
+# may make AI_ANON_RATE_LIMIT generation requests per AI_ANON_RATE_WINDOW seconds
+# from one IP address (0 disables the limit).
+AI_ANON_RATE_LIMIT = int(os.environ.get('AI_ANON_RATE_LIMIT', '10'))
+AI_ANON_RATE_WINDOW = int(os.environ.get('AI_ANON_RATE_WINDOW', str(60 * 60)))
+
+# AI Model Routing
+# Requests for a routing group (or "fastest") go to the model with the best recent
+# p95 latency and error rate. If it has not started answering after its p95
+# time-to-first-chunk (times the multiplier), a hedged request races the next model.
+AI_ROUTING_WINDOW = 100  # latency samples kept per model and worker
+AI_ROUTING_MIN_SAMPLES = 5  # below this, defaults are used instead of percentiles
+AI_ROUTING_ERROR_PENALTY = 4  # a 25% error rate doubles a model's score
+AI_HEDGING_ENABLED = os.environ.get('AI_HEDGING_ENABLED', 'True') == 'True'
+AI_MAX_HEDGES = int(os.environ.get('AI_MAX_HEDGES', '1'))
+AI_HEDGE_DEFAULT_DELAY = float(os.environ.get('AI_HEDGE_DEFAULT_DELAY', '10'))  # seconds
+AI_HEDGE_MIN_DELAY = float(os.environ.get('AI_HEDGE_MIN_DELAY', '1'))  # seconds
+AI_HEDGE_P95_MULTIPLIER = float(os.environ.get('AI_HEDGE_P95_MULTIPLIER', '1'))
+
+# AI Provider Resilience
+# A model's circuit breaker opens after AI_BREAKER_FAILURE_THRESHOLD failures within
+# AI_BREAKER_FAILURE_WINDOW seconds; calls are then rejected with 503 until the
+# cooldown has passed and a single probe request succeeds.
+AI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD', '5'))
+AI_BREAKER_FAILURE_WINDOW = int(os.environ.get('AI_BREAKER_FAILURE_WINDOW', '60'))  # seconds
+AI_BREAKER_COOLDOWN = int(os.environ.get('AI_BREAKER_COOLDOWN', '30'))  # seconds
+# Hard upper bound for a whole provider call, including streaming
+AI_CALL_DEADLINE = float(os.environ.get('AI_CALL_DEADLINE', '90'))  # seconds
+# Provider calls allowed in flight at once, per provider and worker process
+AI_PROVIDER_MAX_CONCURRENCY = int(os.environ.get('AI_PROVIDER_MAX_CONCURRENCY', '20'))
+AI_BULKHEAD_RETRY_AFTER = 5  # seconds
+
+# AI Provider Metrics
+# Latency histograms and error counts are kept per model and hour in Redis. Once a
+# model has AI_METRICS_MIN_SAMPLES successful calls in the last AI_METRICS_WINDOW_HOURS,
+# the model list shows its measured p50/p95 instead of the static response_time_info.
+AI_METRICS_RETENTION_HOURS = int(os.environ.get('AI_METRICS_RETENTION_HOURS', str(24 * 7)))
+AI_METRICS_WINDOW_HOURS = int(os.environ.get('AI_METRICS_WINDOW_HOURS', '24'))
+AI_METRICS_MIN_SAMPLES = int(os.environ.get('AI_METRICS_MIN_SAMPLES', '20'))
+AI_METRICS_SUMMARY_CACHE_TTL = 60  # seconds
+
+# ASGI Deployment
+# entrypoint.sh starts gunicorn with gevent workers by default; SERVER_MODE=asgi runs
+# uvicorn workers instead, and the AI model list and generation endpoints switch to
+# native async views that call the providers' async clients. Streamed responses (SSE
+# generation, exports) then run in a thread each so they aren't buffered; see
+# core/streaming.py.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'gevent')
+AI_ASYNC_VIEWS = os.environ.get('AI_ASYNC_VIEWS', str(SERVER_MODE == 'asgi')) == 'True'
+
+# Per-user Response Cache
+# Rendered resume and job application reads are cached per user in Redis and
+# invalidated whenever that user's data changes. Set to 0 to disable.
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', str(60 * 10)))  # seconds
+
+# Shared Cached Responses
+# Public lists (AI models, example job applications) are cached in Redis with
+# single-flight rebuilds and stale-while-revalidate, see core/cached_response.py.
+CACHED_RESPONSE_EMPTY_TTL = 60  # seconds an empty list is cached
+CACHED_RESPONSE_LOCK_TIMEOUT = 10  # seconds a rebuild may hold the lock / others wait for it
+CACHED_RESPONSE_POLL_INTERVAL = 0.05  # seconds between checks while waiting for a rebuild
+
+# AI Model Registry
+# Active models and the anonymous user's id are kept in memory by every worker
+# (see ai/registry.py); admin edits reach all workers within this interval.
+AI_REGISTRY_CHECK_INTERVAL = 1  # seconds
+
+# Authentication
+# Users resolved from JWTs are cached for this long; saving or deleting a user
+# drops the cached copy right away.
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', str(60 * 5)))  # seconds
+
+# Job Application Bulk Endpoints
+JOB_APPLICATION_BULK_MAX = int(os.environ.get('JOB_APPLICATION_BULK_MAX', '500'))  # items per request
+
+# Exports
+# Rows fetched per round trip from the server-side cursor, and bytes sent per block.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BLOCK_SIZE = 64 * 1024
+
+# Imports
+IMPORT_BATCH_SIZE = 500  # rows per bulk_create
+IMPORT_MAX_ERRORS = 100  # row errors listed in the summary
+IMPORT_UPLOAD_CHUNK_SIZE = 256 * 1024  # bytes per chunk when copying uploads to Redis for background imports
+
+# Resume Rendering
+# HTML/PDF renders run in a pool of this many processes (0 renders in the
+# request's own process) and are cached on local disk, least recently used
+# renders being dropped beyond the size limit. See resume/rendering.py.
+RESUME_RENDER_PROCESSES = int(os.environ.get('RESUME_RENDER_PROCESSES', '2'))
+RESUME_RENDER_CACHE_DIR = os.environ.get('RESUME_RENDER_CACHE_DIR', '')  # default: a directory in the system temp dir
+RESUME_RENDER_CACHE_MAX_BYTES = int(os.environ.get('RESUME_RENDER_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+
+# Resume Revisions
+# Every Nth revision stores the full content, the others a compressed delta back
+# from the next newer version; rebuilding a version applies at most N - 1 deltas.
+# See resume/revisions.py.
+RESUME_REVISION_KEYFRAME_INTERVAL = 10
+
+# Compressed Text Columns
+# Resume content and job application descriptions/notes are stored zlib-compressed
+# when at least this long (bytes) and smaller once compressed. See core/fields.py.
+COMPRESSED_TEXT_MIN_LENGTH = 256
+COMPRESSED_TEXT_LEVEL = 6
+
+# Search
+# `?q=` on the resume and job application lists. SEARCH_CONFIG is the
+# PostgreSQL text search configuration (stemming, stop words); a search
+# returns at most SEARCH_MAX_RESULTS matches. See core/search.py.
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', '50'))
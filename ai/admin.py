@@ -12,14 +12,15 @@ class AIModelAdmin(admin.ModelAdmin):
         'is_active',
         'login_required',
         'daily_limit',
-        'model_name'
+        'model_name',
+        'routing_group'
     )
-    list_filter = ('api_provider', 'is_active', 'login_required')
+    list_filter = ('api_provider', 'is_active', 'login_required', 'routing_group')
     search_fields = ('display_name', 'model_name')
     list_editable = ('is_active', 'login_required', 'daily_limit')
     fieldsets = (
         ('Core Configuration', {
-            'fields': ('display_name', 'model_name', 'api_provider', 'api_key_name')
+            'fields': ('display_name', 'model_name', 'api_provider', 'api_key_name', 'routing_group')
         }),
         ('Access Control', {
             'fields': ('is_active', 'login_required', 'daily_limit')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai'
+
+    def ready(self):
+        # Register the background job handlers
+        from . import tasks  # noqa: F401
+        # Invalidate the cached model list when models change
+        from . import signals  # noqa: F401
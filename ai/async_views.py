@@ -0,0 +1,142 @@
+"""
+Native async versions of the model list and resume generation endpoints.
+
+They are served instead of the DRF views when the app runs under uvicorn
+(`SERVER_MODE=asgi`, see entrypoint.sh). A generation waiting on the provider
+is then just a suspended coroutine holding an async HTTP connection, instead
+of a greenlet with a patched blocking socket. DRF has no async views, so
+these are plain Django views that return the same responses.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from core import jobs
+from core.cached_response import cached_json_response
+from resume.models import Resume
+from users.authentication import CachedJWTAuthentication
+from . import generation_cache, quotas, registry, resilience, routing
+from .serializers import ResumeGenerationSerializer
+from .views import ListAIModelsView, model_list
+
+
+def in_thread(func):
+    """
+    Runs a short blocking call (Redis) in a thread without serializing it with the ORM.
+    """
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of DRF's `APIView`: JWT authentication,
+    no CSRF (the API does not use session cookies) and JSON responses.
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            # Resolving the token's user hits the database on a cache miss
+            result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            return JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+        # Like the DRF views, only the JWT counts; session cookies are ignored
+        request.user, request.auth = result if result is not None else (AnonymousUser(), None)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncListAIModelsView(AsyncAPIView):
+    """
+    Async version of `ListAIModelsView`, sharing its cache entry.
+    """
+    async def get(self, request, *args, **kwargs):
+        # A rebuild hits the database
+        entry = await sync_to_async(model_list.get)()
+        return cached_json_response(request, entry, ListAIModelsView.HTTP_CACHE_CONTROL)
+
+
+class AsyncGenerateResumeView(AsyncAPIView):
+    """
+    Async version of `GenerateResumeView`, including `Prefer: respond-async`.
+    """
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ResumeGenerationSerializer(data=data, context={'request': request})
+        # Validation looks up the model and its routing group
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        route = serializer.validated_data['model']
+        user_input = serializer.validated_data['user_input']
+        title = serializer.validated_data.get('title', 'Untitled Resume')
+
+        try:
+            usage = await in_thread(quotas.consume)(request, route.primary)
+        except quotas.QuotaExceeded as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers=e.usage.headers())
+        quota_headers = usage.headers() if usage else {}
+
+        owner_id = await self.get_resume_owner_id(request)
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            return await self.enqueue(request, route, user_input, title, owner_id, quota_headers)
+
+        try:
+            ai_response_text, cache_status = await generation_cache.aget_or_generate(
+                route.cache_name, user_input,
+                lambda: self.generate(route, user_input),
+            )
+            new_resume = await Resume.objects.acreate(user_id=owner_id, title=title, content=ai_response_text)
+        except resilience.ProviderUnavailable as e:
+            await in_thread(quotas.refund)(usage)
+            return JsonResponse(
+                {"error": str(e), "retry_after": e.retry_after},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(e.retry_after), **quota_headers},
+            )
+        except Exception as e:
+            await in_thread(quotas.refund)(usage)
+            return JsonResponse({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return JsonResponse(
+            {"resume_id": new_resume.id, "content": ai_response_text},
+            status=status.HTTP_201_CREATED,
+            headers={'X-Cache-Status': cache_status, **quota_headers},
+        )
+
+    async def generate(self, route, user_input):
+        text, _ = await routing.agenerate(route, user_input)
+        return text
+
+    async def get_resume_owner_id(self, request):
+        if request.user.is_authenticated:
+            return request.user.id
+        # Only touches the database when the registry is reloaded
+        return await sync_to_async(registry.anonymous_user_id)()
+
+    async def enqueue(self, request, route, user_input, title, owner_id, quota_headers):
+        job = await in_thread(jobs.enqueue)('ai.generate_resume', {
+            'route': route.name,
+            'model_ids': [model.id for model in route.candidates],
+            'user_input': user_input,
+            'title': title,
+            'user_id': owner_id,
+        }, owner_id=request.user.id if request.user.is_authenticated else None)
+
+        status_url = reverse('ai-job-status', kwargs={'job_id': job['id']})
+        return JsonResponse(
+            {"job_id": job['id'], "status": job['status'], "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url, **quota_headers},
+        )
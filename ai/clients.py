@@ -0,0 +1,134 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+from django.conf import settings
+from google import genai
+from google.genai import types
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from .models import AIModel
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Process-wide registry of provider clients, keyed by (api_provider, api_key_name).
+# Reusing a client keeps its HTTP connection pool (and the TLS sessions in it)
+# alive between requests. A model whose provider or key changes in the admin
+# simply maps to a new key, so a fresh client is built for it on first use.
+#
+# The lock only guards client construction. Gunicorn's gevent worker monkey-patches
+# `threading` before the app is imported, so this becomes a greenlet-aware lock there.
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Async clients hold connections bound to the event loop they were first used on,
+# so they are kept per loop. Under uvicorn that is one loop per worker process.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_api_key(model_instance: AIModel) -> str:
+    """
+    Reads the API key for a model from the environment.
+    """
+    api_key = os.environ.get(model_instance.api_key_name)
+    if not api_key or api_key.startswith('placeholder'):
+        raise ValueError(f"API key '{model_instance.api_key_name}' is not configured in the environment.")
+    return api_key
+
+
+def get_client(model_instance: AIModel):
+    """
+    Returns the shared SDK client for a model's provider and API key,
+    building it on first use.
+    """
+    key = (model_instance.api_provider, model_instance.api_key_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        # Another greenlet may have built it while we were waiting
+        client = _clients.get(key)
+        if client is None:
+            client = _build_client(model_instance.api_provider, get_api_key(model_instance))
+            _clients[key] = client
+    return client
+
+
+def get_async_client(model_instance: AIModel):
+    """
+    Async counterpart of `get_client`, shared by everything running on the current event loop.
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (model_instance.api_provider, model_instance.api_key_name)
+    client = clients.get(key)
+    if client is None:
+        # No lock needed: nothing awaits between the lookup and the assignment
+        client = _build_async_client(model_instance.api_provider, get_api_key(model_instance))
+        clients[key] = client
+    return client
+
+
+def clear_clients():
+    """
+    Drops every cached client, e.g. after rotating API keys in the environment.
+    """
+    with _clients_lock:
+        _clients.clear()
+        _async_clients.clear()
+
+
+def _build_client(api_provider: str, api_key: str):
+    limits = httpx.Limits(
+        max_connections=settings.AI_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+    if api_provider == 'google_gemini':
+        # The Gemini SDK only takes a single per-request timeout, in milliseconds
+        return genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                timeout=int(settings.AI_CLIENT_READ_TIMEOUT * 1000),
+                client_args={'limits': limits},
+            ),
+        )
+
+    if api_provider == 'open_router':
+        return OpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=api_key,
+            timeout=httpx.Timeout(settings.AI_CLIENT_READ_TIMEOUT, connect=settings.AI_CLIENT_CONNECT_TIMEOUT),
+            max_retries=settings.AI_CLIENT_MAX_RETRIES,
+            http_client=DefaultHttpxClient(limits=limits),
+        )
+
+    raise NotImplementedError(f"The API provider '{api_provider}' is not supported.")
+
+
+def _build_async_client(api_provider: str, api_key: str):
+    limits = httpx.Limits(
+        max_connections=settings.AI_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+    if api_provider == 'google_gemini':
+        # The Gemini client exposes its async API as `.aio`
+        return genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                timeout=int(settings.AI_CLIENT_READ_TIMEOUT * 1000),
+                async_client_args={'limits': limits},
+            ),
+        ).aio
+
+    if api_provider == 'open_router':
+        return AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=api_key,
+            timeout=httpx.Timeout(settings.AI_CLIENT_READ_TIMEOUT, connect=settings.AI_CLIENT_CONNECT_TIMEOUT),
+            max_retries=settings.AI_CLIENT_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(limits=limits),
+        )
+
+    raise NotImplementedError(f"The API provider '{api_provider}' is not supported.")
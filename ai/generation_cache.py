@@ -0,0 +1,229 @@
+"""
+Content-addressed cache for generated resumes.
+
+Results are keyed by a hash of the model, the prompt version and the
+whitespace-normalized user input, stored zlib-compressed in Redis, and evicted
+least-recently-used first once their total size exceeds a byte budget.
+Concurrent identical requests are coalesced: one request calls the provider
+while the others wait for its result to appear in the cache.
+"""
+import asyncio
+import hashlib
+import time
+import uuid
+import zlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django_redis import get_redis_connection
+from .services import PROMPT_VERSION
+
+ENTRY_KEY_PREFIX = "ai:gencache:entry:"
+LOCK_KEY_PREFIX = "ai:gencache:lock:"
+INDEX_KEY = "ai:gencache:index"  # sorted set: digest -> last access time
+SIZES_KEY = "ai:gencache:sizes"  # hash: digest -> compressed size in bytes
+BYTES_KEY = "ai:gencache:bytes"  # total size of all entries
+STATS_KEY = "ai:gencache:stats"  # hash: hits / misses / coalesced / evictions
+
+HIT = 'HIT'
+MISS = 'MISS'
+COALESCED = 'COALESCED'
+
+# Stores an entry and evicts the least recently used ones until the cache is back
+# under its byte budget. Runs as a script so concurrent writers can't skew the totals.
+STORE_SCRIPT = """
+local digest, value, ttl, now, max_bytes = ARGV[1], ARGV[2], ARGV[3], ARGV[4], tonumber(ARGV[5])
+local previous = redis.call('HGET', KEYS[3], digest)
+if previous then redis.call('DECRBY', KEYS[4], previous) end
+redis.call('SET', KEYS[1], value, 'EX', ttl)
+redis.call('ZADD', KEYS[2], now, digest)
+redis.call('HSET', KEYS[3], digest, string.len(value))
+local total = redis.call('INCRBY', KEYS[4], string.len(value))
+local evicted = 0
+while total > max_bytes do
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+    if not oldest then break end
+    local size = redis.call('HGET', KEYS[3], oldest) or 0
+    redis.call('ZREM', KEYS[2], oldest)
+    redis.call('HDEL', KEYS[3], oldest)
+    redis.call('DEL', ARGV[6] .. oldest)
+    total = redis.call('DECRBY', KEYS[4], size)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# Only the request holding the lock may release it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+def normalize_input(user_input: str) -> str:
+    """
+    Collapses whitespace so inputs that only differ in formatting share a cache entry.
+    """
+    return ' '.join(user_input.split())
+
+
+def make_digest(model_name: str, user_input: str) -> str:
+    raw = f"{model_name}\0{PROMPT_VERSION}\0{normalize_input(user_input)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get(model_name: str, user_input: str):
+    """
+    Returns the cached resume text, or None. Counts the lookup as a hit or miss.
+    """
+    if settings.AI_GENERATION_CACHE_TTL <= 0:
+        return None
+    text = _read(make_digest(model_name, user_input))
+    _count(HIT if text is not None else MISS)
+    return text
+
+
+def store(model_name: str, user_input: str, text: str):
+    """
+    Caches a generated resume, unless caching is off or the entry is too large.
+    """
+    if settings.AI_GENERATION_CACHE_TTL > 0:
+        _write(make_digest(model_name, user_input), text)
+
+
+def get_or_generate(model_name: str, user_input: str, generate):
+    """
+    Returns `(text, cache_status)`. On a miss, `generate()` is called by exactly
+    one of the concurrent requests for the same input; the rest wait for its result.
+    """
+    if settings.AI_GENERATION_CACHE_TTL <= 0:
+        return generate(), MISS
+
+    redis = get_redis_connection("default")
+    digest = make_digest(model_name, user_input)
+
+    text = _read(digest)
+    if text is not None:
+        _count(HIT)
+        return text, HIT
+
+    lock_key = LOCK_KEY_PREFIX + digest
+    token = uuid.uuid4().hex
+    lock_timeout = settings.AI_GENERATION_CACHE_LOCK_TIMEOUT
+    deadline = time.monotonic() + lock_timeout
+    while not redis.set(lock_key, token, nx=True, ex=int(lock_timeout)):
+        # Someone else is generating this exact resume; wait for their result
+        time.sleep(settings.AI_GENERATION_CACHE_POLL_INTERVAL)
+        text = _read(digest)
+        if text is not None:
+            _count(COALESCED)
+            return text, COALESCED
+        if time.monotonic() > deadline:
+            break
+
+    try:
+        # The previous lock holder may have finished just before we took over
+        text = _read(digest)
+        if text is not None:
+            _count(COALESCED)
+            return text, COALESCED
+        _count(MISS)
+        text = generate()
+        _write(digest, text)
+        return text, MISS
+    finally:
+        redis.eval(RELEASE_SCRIPT, 1, lock_key, token)
+
+
+async def aget_or_generate(model_name: str, user_input: str, generate):
+    """
+    Async version of `get_or_generate`, where `generate` is a coroutine function.
+    Redis is called from a thread and waiting requests sleep on the event loop.
+    """
+    if settings.AI_GENERATION_CACHE_TTL <= 0:
+        return await generate(), MISS
+
+    def run(func):
+        return sync_to_async(func, thread_sensitive=False)
+
+    redis = get_redis_connection("default")
+    digest = make_digest(model_name, user_input)
+
+    text = await run(_read)(digest)
+    if text is not None:
+        await run(_count)(HIT)
+        return text, HIT
+
+    lock_key = LOCK_KEY_PREFIX + digest
+    token = uuid.uuid4().hex
+    lock_timeout = settings.AI_GENERATION_CACHE_LOCK_TIMEOUT
+    deadline = time.monotonic() + lock_timeout
+    while not await run(redis.set)(lock_key, token, nx=True, ex=int(lock_timeout)):
+        await asyncio.sleep(settings.AI_GENERATION_CACHE_POLL_INTERVAL)
+        text = await run(_read)(digest)
+        if text is not None:
+            await run(_count)(COALESCED)
+            return text, COALESCED
+        if time.monotonic() > deadline:
+            break
+
+    try:
+        text = await run(_read)(digest)
+        if text is not None:
+            await run(_count)(COALESCED)
+            return text, COALESCED
+        await run(_count)(MISS)
+        text = await generate()
+        await run(_write)(digest, text)
+        return text, MISS
+    finally:
+        await run(redis.eval)(RELEASE_SCRIPT, 1, lock_key, token)
+
+
+def stats():
+    """
+    Returns hit/miss counters and the current size of the cache.
+    """
+    redis = get_redis_connection("default")
+    counters = {key.decode(): int(value) for key, value in redis.hgetall(STATS_KEY).items()}
+    lookups = sum(counters.get(name, 0) for name in ('hits', 'misses', 'coalesced'))
+    served = counters.get('hits', 0) + counters.get('coalesced', 0)
+    return {
+        'hits': counters.get('hits', 0),
+        'misses': counters.get('misses', 0),
+        'coalesced': counters.get('coalesced', 0),
+        'evictions': counters.get('evictions', 0),
+        'hit_ratio': round(served / lookups, 4) if lookups else None,
+        'entries': redis.zcard(INDEX_KEY),
+        'bytes': int(redis.get(BYTES_KEY) or 0),
+        'max_bytes': settings.AI_GENERATION_CACHE_MAX_BYTES,
+    }
+
+
+def _read(digest):
+    redis = get_redis_connection("default")
+    value = redis.get(ENTRY_KEY_PREFIX + digest)
+    if value is None:
+        return None
+    # Refresh the entry's position in the LRU order
+    redis.zadd(INDEX_KEY, {digest: time.time()}, xx=True)
+    return zlib.decompress(value).decode()
+
+
+def _write(digest, text):
+    value = zlib.compress(text.encode())
+    if len(value) > settings.AI_GENERATION_CACHE_MAX_ENTRY_BYTES:
+        return
+    redis = get_redis_connection("default")
+    evicted = redis.eval(
+        STORE_SCRIPT, 4,
+        ENTRY_KEY_PREFIX + digest, INDEX_KEY, SIZES_KEY, BYTES_KEY,
+        digest, value, settings.AI_GENERATION_CACHE_TTL, time.time(),
+        settings.AI_GENERATION_CACHE_MAX_BYTES, ENTRY_KEY_PREFIX,
+    )
+    if evicted:
+        redis.hincrby(STATS_KEY, 'evictions', evicted)
+
+
+def _count(cache_status):
+    field = {HIT: 'hits', MISS: 'misses', COALESCED: 'coalesced'}[cache_status]
+    get_redis_connection("default").hincrby(STATS_KEY, field, 1)
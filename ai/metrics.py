@@ -0,0 +1,184 @@
+"""
+Per-model telemetry for AI provider calls.
+
+Every call made through `ai.services` is recorded here: total latency and
+time-to-first-chunk as histograms, input/output sizes and error classes.
+Samples go into one Redis hash per model and hour, so all workers add to the
+same counters with a single pipelined round trip, and old hours expire on
+their own. Percentiles are estimated from the histogram buckets.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from .models import AIModel
+from .resilience import ProviderUnavailable
+
+BUCKET_KEY = "ai:metrics:{model_id}:{hour}"
+SUMMARY_CACHE_KEY = "ai_models_measured_latency"
+
+# Upper bounds of the latency histogram buckets, in seconds; anything slower
+# falls into the "inf" bucket
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120)
+
+
+def record(model_instance, latency, user_input, output=None, ttfb=None, error=None):
+    """
+    Records one provider call. `error` is the exception the call failed with;
+    calls rejected before reaching the provider are only counted.
+    """
+    fields = {'calls': 1, 'in_chars': len(user_input)}
+    if isinstance(error, ProviderUnavailable):
+        fields = {'rejected': 1}
+    elif error is not None:
+        # The services wrap provider exceptions; the original class is more telling
+        cause = error.__cause__ or error
+        fields.update({'errors': 1, f"err:{type(cause).__name__}": 1})
+    else:
+        fields.update({
+            'ok': 1,
+            'out_chars': len(output or ''),
+            f"lat:{_bucket(latency)}": 1,
+            'lat_sum_ms': round(latency * 1000),
+        })
+        if ttfb is not None:
+            fields.update({f"ttfb:{_bucket(ttfb)}": 1, 'ttfb_calls': 1})
+
+    key = BUCKET_KEY.format(model_id=model_instance.id, hour=int(time.time() // 3600))
+    try:
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        for field, amount in fields.items():
+            pipe.hincrby(key, field, amount)
+        pipe.expire(key, settings.AI_METRICS_RETENTION_HOURS * 3600)
+        pipe.execute()
+    except RedisError as e:
+        # Telemetry must never fail a generation
+        print(f"AI_METRICS_ERROR: {e}")
+
+
+def summary(model_instance, hours=None):
+    """
+    Aggregates the last `hours` hours of a model's calls.
+    """
+    return summaries([model_instance], hours)[model_instance.id]
+
+
+def summaries(model_instances, hours=None):
+    """
+    Same as `summary` for several models at once. Returns a dict keyed by model id.
+    """
+    hours = hours or settings.AI_METRICS_WINDOW_HOURS
+    current = int(time.time() // 3600)
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    for model_instance in model_instances:
+        for hour in range(current - hours + 1, current + 1):
+            pipe.hgetall(BUCKET_KEY.format(model_id=model_instance.id, hour=hour))
+    results = iter(pipe.execute())
+
+    data = {}
+    for model_instance in model_instances:
+        totals = {}
+        for _ in range(hours):
+            for field, value in next(results).items():
+                field = field.decode()
+                totals[field] = totals.get(field, 0) + int(value)
+        data[model_instance.id] = _summarize(totals, hours)
+    return data
+
+
+def measured_latency():
+    """
+    Returns `{display_name: {'p50_seconds', 'p95_seconds', ...}}` for the active
+    models with enough recent samples. Cached briefly, as it is read on every
+    model listing.
+    """
+    data = cache.get(SUMMARY_CACHE_KEY)
+    if data is not None:
+        return data
+
+    models = list(AIModel.objects.filter(is_active=True))
+    try:
+        stats = summaries(models)
+    except RedisError:
+        return {}
+    data = {}
+    for model_instance in models:
+        latency = stats[model_instance.id]['latency']
+        if latency['samples'] >= settings.AI_METRICS_MIN_SAMPLES:
+            data[model_instance.display_name] = {
+                'p50_seconds': latency['p50_seconds'],
+                'p95_seconds': latency['p95_seconds'],
+                'p95_ttfb_seconds': stats[model_instance.id]['ttfb']['p95_seconds'],
+                'samples': latency['samples'],
+            }
+    cache.set(SUMMARY_CACHE_KEY, data, settings.AI_METRICS_SUMMARY_CACHE_TTL)
+    return data
+
+
+def format_latency(latency):
+    """
+    Human-readable replacement for `AIModel.response_time_info`.
+    """
+    return f"~{latency['p50_seconds']:g}s typical, {latency['p95_seconds']:g}s at worst (p95)"
+
+
+def _bucket(seconds):
+    for bound in LATENCY_BUCKETS:
+        if seconds <= bound:
+            return f"{bound:g}"
+    return 'inf'
+
+
+def _histogram(totals, prefix):
+    return [(bound, totals.get(f"{prefix}:{bound:g}", 0)) for bound in LATENCY_BUCKETS] + [
+        (None, totals.get(f"{prefix}:inf", 0))
+    ]
+
+
+def _percentile(histogram, pct):
+    """
+    Upper bound of the bucket holding the given percentile (the largest finite
+    bound for samples slower than every bucket).
+    """
+    samples = sum(count for _, count in histogram)
+    if not samples:
+        return None
+    seen = 0
+    for bound, count in histogram:
+        seen += count
+        if seen >= samples * pct / 100:
+            return bound if bound is not None else LATENCY_BUCKETS[-1]
+    return LATENCY_BUCKETS[-1]
+
+
+def _summarize(totals, hours):
+    latency = _histogram(totals, 'lat')
+    ttfb = _histogram(totals, 'ttfb')
+    calls, ok = totals.get('calls', 0), totals.get('ok', 0)
+    return {
+        'window_hours': hours,
+        'calls': calls,
+        'calls_per_hour': round(calls / hours, 2),
+        'rejected': totals.get('rejected', 0),
+        'errors': totals.get('errors', 0),
+        'error_rate': round(totals.get('errors', 0) / calls, 4) if calls else None,
+        'error_classes': {
+            field[len('err:'):]: count for field, count in totals.items() if field.startswith('err:')
+        },
+        'latency': {
+            'samples': ok,
+            'mean_seconds': round(totals.get('lat_sum_ms', 0) / ok / 1000, 3) if ok else None,
+            'p50_seconds': _percentile(latency, 50),
+            'p95_seconds': _percentile(latency, 95),
+            'p99_seconds': _percentile(latency, 99),
+            'histogram': {('inf' if bound is None else f"{bound:g}"): count for bound, count in latency},
+        },
+        'ttfb': {
+            'samples': totals.get('ttfb_calls', 0),
+            'p50_seconds': _percentile(ttfb, 50),
+            'p95_seconds': _percentile(ttfb, 95),
+        },
+        'mean_input_chars': round(totals.get('in_chars', 0) / calls) if calls else None,
+        'mean_output_chars': round(totals.get('out_chars', 0) / ok) if ok else None,
+    }
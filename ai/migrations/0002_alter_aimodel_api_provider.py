@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aimodel',
+            name='api_provider',
+            field=models.CharField(choices=[('google_gemini', 'Google Gemini'), ('open_router', 'OpenRouter'), ('fake', 'Fake (load testing, no API calls)')], help_text='The service that provides this model.', max_length=50),
+        ),
+    ]
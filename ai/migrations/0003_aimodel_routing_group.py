@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_alter_aimodel_api_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='routing_group',
+            field=models.CharField(blank=True, help_text="Optional group name (e.g., 'general'). Requests for the group are routed to its fastest healthy model.", max_length=100),
+        ),
+    ]
@@ -8,12 +8,14 @@ class AIModel(models.Model):
     PROVIDER_CHOICES = [
         ('google_gemini', 'Google Gemini'),
         ('open_router', 'OpenRouter'),
+        ('fake', 'Fake (load testing, no API calls)'),
     ]
 
     display_name = models.CharField(max_length=100, unique=True, help_text="User-friendly name for the model (e.g., 'Deepseek').")
     model_name = models.CharField(max_length=100, help_text="The technical model identifier for the API call (e.g., 'deepseek/deepseek-r1-0528:free').")
     api_provider = models.CharField(max_length=50, choices=PROVIDER_CHOICES, help_text="The service that provides this model.")
     api_key_name = models.CharField(max_length=100, help_text="The name of the environment variable holding the API key (e.g., 'OPENROUTER_API_KEY').")
+    routing_group = models.CharField(max_length=100, blank=True, help_text="Optional group name (e.g., 'general'). Requests for the group are routed to its fastest healthy model.")
 
     is_active = models.BooleanField(default=True, help_text="Enable or disable this model for all users.")
     login_required = models.BooleanField(default=False, help_text="If checked, only logged-in users can use this model.")
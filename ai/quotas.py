@@ -0,0 +1,171 @@
+"""
+Request quotas for the AI endpoints, kept in Redis so all workers share them.
+
+Logged-in users are limited per model by `AIModel.daily_limit`; anonymous callers
+are limited per IP address. Both use a sliding window counter: the current and
+the previous fixed window are stored as plain integers, and the previous one is
+weighted by how much of it still overlaps the sliding window. Checking and
+consuming a request is a single atomic script call, and so is a refund.
+
+When Redis can't be reached, quotas fail open: requests are let through
+uncounted, as the circuit breakers and the generation cache let them through,
+rather than the whole AI API answering 500. Provider bulkheads still cap how
+many generations run at once.
+"""
+import math
+import time
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.throttling import BaseThrottle
+
+DAY = 60 * 60 * 24
+
+# Returns {allowed, requests in current window, requests in previous window}
+CONSUME_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = math.floor(previous * tonumber(ARGV[2])) + current
+if used >= tonumber(ARGV[1]) then
+    return {0, current, previous}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, current + 1, previous}
+"""
+
+# Never takes the counter below zero, e.g. once the window has expired
+REFUND_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised when a request would go over its quota.
+    """
+    def __init__(self, usage):
+        super().__init__("You have reached your request limit. Please try again later.")
+        self.usage = usage
+
+
+class Usage:
+    """
+    The state of one quota after a request was counted against it.
+    """
+    def __init__(self, scope, limit, window, used, retry_after=0, key=None):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.used = used
+        self.retry_after = retry_after
+        # The counter the request was added to, for refunds
+        self.key = key
+
+    @property
+    def remaining(self):
+        return max(self.limit - self.used, 0)
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+        }
+        if self.retry_after:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+    def as_dict(self):
+        return {
+            'limit': self.limit,
+            'used': self.used,
+            'remaining': self.remaining,
+            'window_seconds': self.window,
+        }
+
+
+def get_scope(request, model_instance):
+    """
+    Returns `(scope, limit, window)` for the quota that applies to this request,
+    or None when the request is not limited.
+    """
+    if request.user.is_authenticated:
+        if not model_instance.daily_limit:
+            return None
+        return f"user:{request.user.id}:model:{model_instance.id}", model_instance.daily_limit, DAY
+
+    if not settings.AI_ANON_RATE_LIMIT:
+        return None
+    # DRF's throttles already know how to find the client IP behind our proxies
+    ip = BaseThrottle().get_ident(request)
+    return f"ip:{ip}", settings.AI_ANON_RATE_LIMIT, settings.AI_ANON_RATE_WINDOW
+
+
+def consume(request, model_instance):
+    """
+    Counts a generation request against its quota. Returns the resulting `Usage`
+    (or None if unlimited, or not counted because Redis is down) and raises
+    `QuotaExceeded` if the quota is used up.
+    """
+    scope = get_scope(request, model_instance)
+    if scope is None:
+        return None
+    scope, limit, window = scope
+
+    current_key, previous_key, weight = _window_keys(scope, window)
+    try:
+        allowed, current, previous = get_redis_connection("default").eval(
+            CONSUME_SCRIPT, 2, current_key, previous_key, limit, weight, window * 2
+        )
+    except RedisError as e:
+        print(f"AI_QUOTA_ERROR: letting a request for {scope} through uncounted. Error: {e}")
+        return None
+    used = math.floor(previous * weight) + current
+    if not allowed:
+        raise QuotaExceeded(Usage(scope, limit, window, used, _retry_after(limit, window, current, previous)))
+    return Usage(scope, limit, window, used, key=current_key)
+
+
+def refund(usage):
+    """
+    Gives back a request that failed before the provider produced anything.
+    """
+    if usage is None or usage.key is None:
+        return
+    try:
+        get_redis_connection("default").eval(REFUND_SCRIPT, 1, usage.key)
+    except RedisError as e:
+        print(f"AI_QUOTA_ERROR: could not refund a request for {usage.scope}. Error: {e}")
+
+
+def peek(scope, limit, window):
+    """
+    Returns the current `Usage` of a quota without counting a request.
+    """
+    current_key, previous_key, weight = _window_keys(scope, window)
+    current, previous = (int(value or 0) for value in get_redis_connection("default").mget(current_key, previous_key))
+    return Usage(scope, limit, window, math.floor(previous * weight) + current)
+
+
+def _window_keys(scope, window):
+    now = time.time()
+    index = int(now // window)
+    # Share of the previous window that still falls inside the sliding window
+    weight = 1 - (now % window) / window
+    return f"ai:quota:{scope}:{index}", f"ai:quota:{scope}:{index - 1}", weight
+
+
+def _retry_after(limit, window, current, previous):
+    """
+    Seconds until the sliding window has room for one more request.
+    """
+    elapsed = time.time() % window
+    if current >= limit or not previous:
+        # Nothing left to slide out of this window; wait for the next one
+        return max(1, math.ceil(window - elapsed))
+    # Solve previous * (1 - t / window) + current < limit for t
+    needed = window * (1 - (limit - current) / previous)
+    return max(1, math.ceil(needed - elapsed))
@@ -0,0 +1,108 @@
+"""
+In-process snapshot of the active AI models and the anonymous user's id.
+
+Both are read on every generation request but only change through the admin,
+so they are kept in two tiers:
+
+- L1: a module-level snapshot in each worker, used without any I/O;
+- L2: the same snapshot pickled in Redis under the current version, so a
+  worker that starts or falls behind loads it without querying the database.
+
+Admin edits bump the version (see signals.py). Workers compare their snapshot's
+version with Redis at most every `AI_REGISTRY_CHECK_INTERVAL` seconds, so
+changes reach every worker within that interval. If Redis is unavailable the
+snapshot is rebuilt from the database instead.
+"""
+import pickle
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from .models import AIModel
+
+VERSION_KEY = "ai:registry:version"
+SNAPSHOT_KEY = "ai:registry:snapshot:{version}"
+ANONYMOUS_USERNAME = 'anonymous_user'
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class Snapshot:
+    def __init__(self, version, models, anonymous_user_id):
+        self.version = version
+        self.models = models
+        self.by_name = {model.display_name.lower(): model for model in models}
+        self.anonymous_user_id = anonymous_user_id
+        self.checked_at = time.monotonic()
+
+
+def active_models():
+    """
+    Returns the active models, ordered by display name. Treat them as read-only.
+    """
+    return _current().models
+
+
+def get_active_model(display_name):
+    """
+    Returns the active model with this display name (case-insensitive), or None.
+    """
+    return _current().by_name.get(display_name.lower())
+
+
+def anonymous_user_id():
+    """
+    Id of the dedicated, inactive user that owns resumes generated anonymously.
+    """
+    return _current().anonymous_user_id
+
+
+def invalidate():
+    """
+    Makes every worker reload the snapshot on its next check.
+    """
+    global _snapshot
+    _snapshot = None
+    try:
+        get_redis_connection("default").incr(VERSION_KEY)
+    except RedisError as e:
+        print(f"AI_REGISTRY_ERROR: could not invalidate the model registry: {e}")
+
+
+def _current():
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.checked_at < settings.AI_REGISTRY_CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        try:
+            redis = get_redis_connection("default")
+            version = int(redis.get(VERSION_KEY) or 0)
+            if _snapshot is not None and _snapshot.version == version:
+                _snapshot.checked_at = time.monotonic()
+                return _snapshot
+
+            key = SNAPSHOT_KEY.format(version=version)
+            cached = redis.get(key)
+            if cached is not None:
+                _snapshot = Snapshot(version, *pickle.loads(cached))
+            else:
+                _snapshot = _build(version)
+                redis.set(key, pickle.dumps((_snapshot.models, _snapshot.anonymous_user_id)), ex=60 * 60 * 24)
+        except RedisError as e:
+            print(f"AI_REGISTRY_ERROR: loading the model registry from the database. Error: {e}")
+            _snapshot = _build(None)
+        return _snapshot
+
+
+def _build(version):
+    models = list(AIModel.objects.filter(is_active=True))
+    user, _ = User.objects.get_or_create(
+        username=ANONYMOUS_USERNAME,
+        defaults={'is_active': False} # This user cannot log in
+    )
+    return Snapshot(version, models, user.id)
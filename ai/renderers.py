@@ -0,0 +1,25 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+def format_sse_event(event: str, data) -> str:
+    """
+    Formats a single Server-Sent Event with a JSON encoded payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets `text/event-stream` clients (e.g. the browser's EventSource) pass DRF
+    content negotiation. Regular responses, such as validation errors, are sent
+    as a single `error` event so the client only has to speak one format.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return format_sse_event('error', data).encode(self.charset)
@@ -0,0 +1,263 @@
+"""
+Fast-fail protection around AI provider calls.
+
+- Circuit breakers (one per AIModel, shared by all workers through Redis) stop
+  calling a model that keeps failing, and let a single probe request through
+  once the cooldown has passed.
+- Bulkheads (one per provider and worker process) cap how many provider calls
+  may be in flight at once, so a slow provider cannot tie up every greenlet.
+- A hard deadline bounds each call, on top of the per-request timeouts
+  configured on the SDK clients.
+
+Rejected calls raise `ProviderUnavailable` immediately, which the views turn
+into `503 Service Unavailable` with a `Retry-After` header.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+BREAKER_KEY = "ai:breaker:{model_id}"
+STATS_KEY = "ai:resilience:stats"
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Returns {allowed, retry_after}. After the cooldown, exactly one caller gets
+# to probe the model while the breaker is half-open.
+ALLOW_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'closed' then return {1, 0} end
+local now = tonumber(ARGV[1])
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until') or '0')
+if state == 'open' and now < opened_until then
+    return {0, math.ceil(opened_until - now)}
+end
+local probe_until = tonumber(redis.call('HGET', KEYS[1], 'probe_until') or '0')
+if now < probe_until then
+    return {0, math.ceil(probe_until - now)}
+end
+redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_until', now + tonumber(ARGV[2]))
+return {1, 0}
+"""
+
+# Returns 1 if this failure opened the breaker
+FAILURE_SCRIPT = """
+local now, threshold, window, cooldown = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local window_start = tonumber(redis.call('HGET', KEYS[1], 'window_start') or '0')
+local failures = 1
+if now - window_start > window then
+    redis.call('HSET', KEYS[1], 'window_start', now, 'failures', 1)
+else
+    failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+end
+redis.call('EXPIRE', KEYS[1], math.ceil((window + cooldown) * 2))
+if state == 'half_open' or failures >= threshold then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_until', now + cooldown, 'probe_until', 0, 'failures', 0, 'window_start', 0)
+    return 1
+end
+return 0
+"""
+
+
+class ProviderUnavailable(Exception):
+    """
+    Base class for calls rejected without contacting the provider.
+    """
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, int(retry_after))
+
+
+class CircuitOpenError(ProviderUnavailable):
+    pass
+
+
+class BulkheadFullError(ProviderUnavailable):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+# Per-process bulkheads, created lazily per provider
+_bulkheads = defaultdict(lambda: threading.BoundedSemaphore(settings.AI_PROVIDER_MAX_CONCURRENCY))
+_in_flight = defaultdict(int)
+
+
+@contextmanager
+def guard(model_instance):
+    """
+    Wraps one provider call: checks the model's breaker, takes a bulkhead slot
+    and records the outcome on the breaker. Works around generators too, where
+    cancelling the stream counts as neither a success nor a failure.
+    """
+    _check_breaker(model_instance)
+
+    provider = model_instance.api_provider
+    if not _bulkheads[provider].acquire(blocking=False):
+        _count(f"bulkhead_rejections:{provider}")
+        raise BulkheadFullError(
+            f"Too many requests to {model_instance.display_name} are in progress. Please try again shortly.",
+            settings.AI_BULKHEAD_RETRY_AFTER,
+        )
+    _in_flight[provider] += 1
+
+    try:
+        yield
+    except (ValueError, NotImplementedError):
+        # Configuration problems say nothing about the provider's health
+        raise
+    except Exception:
+        record_failure(model_instance)
+        raise
+    except GeneratorExit:
+        raise
+    else:
+        record_success(model_instance)
+    finally:
+        _in_flight[provider] -= 1
+        _bulkheads[provider].release()
+
+
+@asynccontextmanager
+async def aguard(model_instance):
+    """
+    `guard` for async provider calls. The Redis round trips run in a thread so
+    they never block the event loop, and the deadline is enforced by asyncio.
+    """
+    await sync_to_async(_check_breaker, thread_sensitive=False)(model_instance)
+
+    provider = model_instance.api_provider
+    if not _bulkheads[provider].acquire(blocking=False):
+        await sync_to_async(_count, thread_sensitive=False)(f"bulkhead_rejections:{provider}")
+        raise BulkheadFullError(
+            f"Too many requests to {model_instance.display_name} are in progress. Please try again shortly.",
+            settings.AI_BULKHEAD_RETRY_AFTER,
+        )
+    _in_flight[provider] += 1
+
+    try:
+        async with asyncio.timeout(settings.AI_CALL_DEADLINE):
+            yield
+    except TimeoutError:
+        await sync_to_async(record_failure, thread_sensitive=False)(model_instance)
+        raise DeadlineExceeded(f"The AI provider did not finish within {settings.AI_CALL_DEADLINE:g} seconds.")
+    except (ValueError, NotImplementedError):
+        raise
+    except Exception:
+        await sync_to_async(record_failure, thread_sensitive=False)(model_instance)
+        raise
+    else:
+        await sync_to_async(record_success, thread_sensitive=False)(model_instance)
+    finally:
+        _in_flight[provider] -= 1
+        _bulkheads[provider].release()
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Interrupts the wrapped code after `seconds` when running under gevent.
+    Elsewhere blocking calls cannot be interrupted, so the SDK client
+    timeouts are the only bound.
+    """
+    try:
+        from gevent import Timeout
+        from gevent.monkey import is_module_patched
+    except ImportError:
+        yield
+        return
+
+    if not is_module_patched('socket'):
+        yield
+        return
+
+    with Timeout(seconds, DeadlineExceeded(f"The AI provider did not finish within {seconds:g} seconds.")):
+        yield
+
+
+def record_success(model_instance):
+    key = BREAKER_KEY.format(model_id=model_instance.id)
+    try:
+        redis = get_redis_connection("default")
+        if redis.exists(key):
+            redis.delete(key)
+    except RedisError:
+        pass
+
+
+def record_failure(model_instance):
+    try:
+        opened = get_redis_connection("default").eval(
+            FAILURE_SCRIPT, 1, BREAKER_KEY.format(model_id=model_instance.id),
+            time.time(), settings.AI_BREAKER_FAILURE_THRESHOLD,
+            settings.AI_BREAKER_FAILURE_WINDOW, settings.AI_BREAKER_COOLDOWN,
+        )
+    except RedisError:
+        return
+    if opened:
+        _count(f"breaker_opened:{model_instance.id}")
+        print(f"AI_BREAKER_OPEN: {model_instance.display_name} for {settings.AI_BREAKER_COOLDOWN:g}s")
+
+
+def breaker_state(model_instance):
+    """
+    Returns the breaker's current state for monitoring.
+    """
+    raw = get_redis_connection("default").hgetall(BREAKER_KEY.format(model_id=model_instance.id))
+    data = {key.decode(): value.decode() for key, value in raw.items()}
+    state = data.get('state', CLOSED)
+    retry_after = 0
+    if state == OPEN:
+        retry_after = max(0, math.ceil(float(data.get('opened_until', 0)) - time.time()))
+    return {
+        'state': state,
+        'recent_failures': int(data.get('failures', 0)),
+        'retry_after': retry_after,
+    }
+
+
+def stats():
+    """
+    Returns rejection and breaker-opening counters, plus this worker's in-flight calls.
+    """
+    counters = get_redis_connection("default").hgetall(STATS_KEY)
+    return {
+        'counters': {key.decode(): int(value) for key, value in counters.items()},
+        'in_flight_this_worker': dict(_in_flight),
+        'max_concurrency_per_worker': settings.AI_PROVIDER_MAX_CONCURRENCY,
+    }
+
+
+def _check_breaker(model_instance):
+    try:
+        allowed, retry_after = get_redis_connection("default").eval(
+            ALLOW_SCRIPT, 1, BREAKER_KEY.format(model_id=model_instance.id),
+            time.time(), settings.AI_CALL_DEADLINE,
+        )
+    except RedisError:
+        # Fail open: an unavailable Redis must not take generation down with it
+        return
+    if not allowed:
+        _count(f"breaker_rejections:{model_instance.id}")
+        raise CircuitOpenError(
+            f"{model_instance.display_name} is temporarily unavailable. Please try again later.",
+            retry_after,
+        )
+
+
+def _count(field):
+    try:
+        get_redis_connection("default").hincrby(STATS_KEY, field, 1)
+    except RedisError:
+        pass
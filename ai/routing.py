@@ -0,0 +1,317 @@
+"""
+Latency-aware routing across AI models.
+
+A generation request names either a single model, a routing group
+(`AIModel.routing_group`) or "fastest" (every active model). For groups, the
+models are ranked by their recent latency and error rate, and the best one is
+tried first. If it has not produced any output after a delay derived from its
+p95 time-to-first-chunk, a hedged request is sent to the next model; whichever
+starts answering first wins and the other stream is closed. Models that fail
+outright are skipped in favour of the next candidate.
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from django.conf import settings
+from . import registry, resilience
+from .services import agenerate_resume_content, generate_resume_content, stream_resume_content
+
+FASTEST = 'fastest'
+
+
+class LatencyTracker:
+    """
+    Rolling per-model samples of time-to-first-chunk, total latency and errors.
+    Kept in process memory, so routing decisions never wait on the network.
+    """
+    def __init__(self, window):
+        self._lock = threading.Lock()
+        self._ttfb = defaultdict(lambda: deque(maxlen=window))
+        self._total = defaultdict(lambda: deque(maxlen=window))
+        self._errors = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model_id, total=None, ttfb=None, failed=False):
+        with self._lock:
+            self._errors[model_id].append(1 if failed else 0)
+            if not failed:
+                self._total[model_id].append(total)
+                self._ttfb[model_id].append(ttfb if ttfb is not None else total)
+
+    def percentile(self, model_id, pct, kind='total'):
+        """
+        Returns the given percentile in seconds, or None with too few samples.
+        """
+        with self._lock:
+            # Copied under the lock: sorting a deque another thread appends to raises RuntimeError
+            samples = list((self._ttfb if kind == 'ttfb' else self._total)[model_id])
+        samples.sort()
+        if len(samples) < settings.AI_ROUTING_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def error_rate(self, model_id):
+        with self._lock:
+            errors = list(self._errors[model_id])
+        return sum(errors) / len(errors) if errors else 0.0
+
+    def score(self, model_id):
+        """
+        Lower is better: p95 latency, penalized by the recent error rate.
+        Models without enough samples get the default latency so they are tried.
+        """
+        p95 = self.percentile(model_id, 95)
+        if p95 is None:
+            p95 = settings.AI_HEDGE_DEFAULT_DELAY
+        return p95 * (1 + settings.AI_ROUTING_ERROR_PENALTY * self.error_rate(model_id))
+
+    def hedge_delay(self, model_id):
+        """
+        How long to wait for a model's first chunk before hedging to another one.
+        """
+        p95 = self.percentile(model_id, 95, kind='ttfb')
+        if p95 is None:
+            return settings.AI_HEDGE_DEFAULT_DELAY
+        return max(settings.AI_HEDGE_MIN_DELAY, p95 * settings.AI_HEDGE_P95_MULTIPLIER)
+
+    def snapshot(self, model_id):
+        return {
+            'p50_seconds': self.percentile(model_id, 50),
+            'p95_seconds': self.percentile(model_id, 95),
+            'p95_ttfb_seconds': self.percentile(model_id, 95, kind='ttfb'),
+            'error_rate': round(self.error_rate(model_id), 4),
+        }
+
+
+tracker = LatencyTracker(window=settings.AI_ROUTING_WINDOW)
+
+
+class Route:
+    """
+    The models a generation request may use, best candidate first.
+    """
+    def __init__(self, name, candidates):
+        self.name = name
+        self.candidates = sorted(candidates, key=lambda model: tracker.score(model.id))
+
+    @property
+    def primary(self):
+        return self.candidates[0]
+
+    @property
+    def is_routed(self):
+        return len(self.candidates) > 1
+
+    @property
+    def cache_name(self):
+        """
+        Name used for the generation cache: routed requests share results per route.
+        """
+        return f"route:{self.name.lower()}" if self.is_routed else self.primary.model_name
+
+
+def resolve_route(value, user):
+    """
+    Returns a `Route` for "fastest" or a routing group name, or None if `value`
+    should be treated as a single model's display name.
+    """
+    models = registry.active_models()
+    if value.lower() != FASTEST:
+        models = [model for model in models if model.routing_group.lower() == value.lower()]
+        if not models:
+            return None
+    if not user.is_authenticated:
+        models = [model for model in models if not model.login_required]
+    return Route(value, list(models))
+
+
+def generate(route, user_input):
+    """
+    Generates a complete resume for a route. Returns `(text, model_used)`.
+    """
+    if not route.is_routed:
+        started = time.monotonic()
+        try:
+            text = generate_resume_content(route.primary, user_input)
+        except resilience.ProviderUnavailable:
+            raise
+        except Exception:
+            tracker.record(route.primary.id, failed=True)
+            raise
+        tracker.record(route.primary.id, total=time.monotonic() - started)
+        return text, route.primary
+
+    model_used = None
+    chunks = []
+    for model_used, text in stream(route, user_input):
+        chunks.append(text)
+    return ''.join(chunks), model_used
+
+
+async def agenerate(route, user_input):
+    """
+    Async version of `generate`. The candidates race as tasks on the event loop:
+    a hedge starts if the running ones have not finished within the hedge delay,
+    the first successful result wins and the rest are cancelled.
+    """
+    remaining = list(route.candidates)
+    running = {}
+    hedges_left = settings.AI_MAX_HEDGES if settings.AI_HEDGING_ENABLED and route.is_routed else 0
+    error = None
+
+    async def attempt(model):
+        started = time.monotonic()
+        try:
+            text = await agenerate_resume_content(model, user_input)
+        except resilience.ProviderUnavailable:
+            raise
+        except Exception:
+            tracker.record(model.id, failed=True)
+            raise
+        tracker.record(model.id, total=time.monotonic() - started)
+        return text
+
+    def launch():
+        model = remaining.pop(0)
+        running[asyncio.ensure_future(attempt(model))] = model
+        # Without streaming there is no first chunk, so hedge on the total latency
+        p95 = tracker.percentile(model.id, 95)
+        if p95 is None:
+            return settings.AI_HEDGE_DEFAULT_DELAY
+        return max(settings.AI_HEDGE_MIN_DELAY, p95 * settings.AI_HEDGE_P95_MULTIPLIER)
+
+    delay = launch()
+    try:
+        while running:
+            timeout = delay if hedges_left and remaining else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedges_left -= 1
+                delay = launch()
+                continue
+            for task in done:
+                model = running.pop(task)
+                if task.exception() is None:
+                    return task.result(), model
+                error = task.exception()
+            if not running and remaining and route.is_routed:
+                # Fall back to the next candidate straight away
+                delay = launch()
+        raise error
+    finally:
+        for task in running:
+            task.cancel()
+
+
+def stream(route, user_input):
+    """
+    Streams a resume for a route, yielding `(model_used, text)` pairs.
+    """
+    if not route.is_routed:
+        started = time.monotonic()
+        ttfb = None
+        try:
+            for text in stream_resume_content(route.primary, user_input):
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                yield route.primary, text
+        except resilience.ProviderUnavailable:
+            raise
+        except Exception:
+            tracker.record(route.primary.id, failed=True)
+            raise
+        tracker.record(route.primary.id, total=time.monotonic() - started, ttfb=ttfb)
+        return
+
+    events = queue.Queue()
+    remaining = list(route.candidates)
+    attempts = []
+    hedges_left = settings.AI_MAX_HEDGES if settings.AI_HEDGING_ENABLED else 0
+
+    def launch():
+        attempt = _Attempt(remaining.pop(0), user_input, events)
+        attempts.append(attempt)
+        return attempt
+
+    hedge_at = time.monotonic() + tracker.hedge_delay(launch().model.id)
+    winner = None
+    try:
+        while True:
+            timeout = None
+            if winner is None and hedges_left and remaining:
+                timeout = max(0, hedge_at - time.monotonic())
+            try:
+                attempt, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                # The running attempts are slow to answer; race another model
+                hedges_left -= 1
+                hedge_at = time.monotonic() + tracker.hedge_delay(launch().model.id)
+                continue
+
+            if winner is None and kind == 'chunk':
+                winner = attempt
+                for other in attempts:
+                    if other is not winner:
+                        other.cancel()
+            if attempt is not winner and winner is not None:
+                continue  # Leftovers from a cancelled attempt
+
+            if kind == 'chunk':
+                yield attempt.model, payload
+            elif kind == 'done':
+                # Also covers a model finishing without producing any text
+                return
+            elif kind == 'error':
+                if winner is not None:
+                    raise payload
+                if not any(other.running for other in attempts):
+                    if not remaining:
+                        raise payload
+                    # Fall back to the next candidate straight away
+                    hedge_at = time.monotonic() + tracker.hedge_delay(launch().model.id)
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+class _Attempt:
+    """
+    Streams one model in a background thread (a greenlet under gevent) and
+    reports `(attempt, kind, payload)` events to the shared queue.
+    """
+    def __init__(self, model, user_input, events):
+        self.model = model
+        self.running = True
+        self._cancelled = threading.Event()
+        self._user_input = user_input
+        self._events = events
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        started = time.monotonic()
+        ttfb = None
+        chunks = stream_resume_content(self.model, self._user_input)
+        try:
+            for text in chunks:
+                if self._cancelled.is_set():
+                    self.running = False
+                    return
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                self._events.put((self, 'chunk', text))
+            tracker.record(self.model.id, total=time.monotonic() - started, ttfb=ttfb)
+            self.running = False
+            self._events.put((self, 'done', None))
+        except Exception as e:
+            if not isinstance(e, resilience.ProviderUnavailable):
+                # A rejected call never reached the model, so it says nothing about its latency
+                tracker.record(self.model.id, failed=True)
+            self.running = False
+            self._events.put((self, 'error', e))
+        finally:
+            # Closes the provider's HTTP stream if we stopped reading early
+            chunks.close()
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from . import registry
 from .models import AIModel
+from .routing import Route, resolve_route
 
 class AIModelSerializer(serializers.ModelSerializer):
     """
@@ -12,6 +14,7 @@ class AIModelSerializer(serializers.ModelSerializer):
             'login_required',
             'response_time_info',
             'description',
+            'routing_group',
         ]
         extra_kwargs = {
             'model_name': {'source': 'display_name'}
@@ -27,15 +30,22 @@ class ResumeGenerationSerializer(serializers.Serializer):
     def validate_model(self, value):
         """
         Check that the chosen model exists, is active, and meets login requirements.
+        The value may also be a routing group or "fastest", which resolves to
+        every eligible model in it. Returns a `Route` either way.
         """
-        try:
-            model_instance = AIModel.objects.get(display_name__iexact=value, is_active=True)
-        except AIModel.DoesNotExist:
+        user = self.context['request'].user
+        route = resolve_route(value, user)
+        if route is not None:
+            if not route.candidates:
+                raise serializers.ValidationError("No models are currently available for this group.")
+            return route
+
+        model_instance = registry.get_active_model(value)
+        if model_instance is None:
             raise serializers.ValidationError("This model is not valid or is currently disabled.")
-        
+
         # Check login requirements
-        user = self.context['request'].user
         if model_instance.login_required and not user.is_authenticated:
             raise serializers.ValidationError(f"You must be logged in to use the {model_instance.display_name} model.")
 
-        return model_instance
+        return Route(model_instance.display_name, [model_instance])
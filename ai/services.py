@@ -1,17 +1,31 @@
-import os
-from google import genai
-from openai import OpenAI
+import asyncio
+import time
+from contextlib import closing
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from . import metrics, resilience
+from .clients import get_async_client, get_client
 from .models import AIModel
 
-def generate_resume_content(model_instance: AIModel, user_input: str) -> str:
+FAKE_RESUME = """# [Your Name]
+
+## Summary
+Placeholder resume produced by the fake AI provider.
+
+## Experience
+**[Job Title]** - [Company Name]
+- [Achievement]
+"""
+
+# Bump whenever the prompt changes so previously cached resumes are not reused
+PROMPT_VERSION = 1
+
+
+def build_prompt(user_input: str) -> str:
     """
-    Selects the correct AI provider and generates resume content.
+    Wraps the user's text in the resume-writing instructions sent to every provider.
     """
-    api_key = os.environ.get(model_instance.api_key_name)
-    if not api_key or api_key.startswith('placeholder'):
-        raise ValueError(f"API key '{model_instance.api_key_name}' is not configured in the environment.")
-
-    prompt = f"""
+    return f"""
 **PRIMARY DIRECTIVE: You are an expert resume writer. Your SOLE function is to generate a professional, ATS-friendly resume in Markdown format from the user's text.**
 
 The user will provide text that could be a job description, an existing resume, or personal details. Analyze this text and generate a complete, well-structured resume.
@@ -35,17 +49,85 @@ The user will provide text that could be a job description, an existing resume,
 Your task is to apply these rules to the user input and generate the appropriate response.
 """
 
+
+def generate_resume_content(model_instance: AIModel, user_input: str) -> str:
+    """
+    Selects the correct AI provider and generates resume content.
+    The call is guarded by the model's circuit breaker, the provider's bulkhead
+    and a hard deadline (see ai/resilience.py), and recorded in ai/metrics.py.
+    """
+    started = time.monotonic()
+    try:
+        with resilience.guard(model_instance), resilience.deadline(settings.AI_CALL_DEADLINE):
+            text = _generate_resume_content(model_instance, user_input)
+    except Exception as e:
+        metrics.record(model_instance, time.monotonic() - started, user_input, error=e)
+        raise
+    metrics.record(model_instance, time.monotonic() - started, user_input, output=text)
+    return text
+
+
+def stream_resume_content(model_instance: AIModel, user_input: str):
+    """
+    Same as `generate_resume_content`, but uses the providers' streaming APIs
+    and yields the resume text chunk by chunk as soon as it arrives.
+    """
+    started = time.monotonic()
+    ttfb = None
+    output = []
+    try:
+        with resilience.guard(model_instance):
+            for text in _stream_resume_content(model_instance, user_input):
+                # The deadline is checked between chunks: a timer running while the
+                # caller holds the generator could fire in the caller's own code.
+                if time.monotonic() - started > settings.AI_CALL_DEADLINE:
+                    raise resilience.DeadlineExceeded(
+                        f"The AI provider did not finish within {settings.AI_CALL_DEADLINE:g} seconds."
+                    )
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                output.append(text)
+                yield text
+    except Exception as e:
+        metrics.record(model_instance, time.monotonic() - started, user_input, error=e)
+        raise
+    # A stream closed early by its reader (GeneratorExit) is not recorded
+    metrics.record(model_instance, time.monotonic() - started, user_input, output=''.join(output), ttfb=ttfb)
+
+
+async def agenerate_resume_content(model_instance: AIModel, user_input: str) -> str:
+    """
+    Async version of `generate_resume_content`, using the providers' async clients
+    so a waiting generation holds no thread.
+    """
+    record = sync_to_async(metrics.record, thread_sensitive=False)
+    started = time.monotonic()
+    try:
+        async with resilience.aguard(model_instance):
+            text = await _agenerate_resume_content(model_instance, user_input)
+    except Exception as e:
+        await record(model_instance, time.monotonic() - started, user_input, error=e)
+        raise
+    await record(model_instance, time.monotonic() - started, user_input, output=text)
+    return text
+
+
+def _generate_resume_content(model_instance: AIModel, user_input: str) -> str:
+    if model_instance.api_provider == 'fake':
+        time.sleep(settings.AI_FAKE_PROVIDER_LATENCY)
+        return FAKE_RESUME
+
+    client = get_client(model_instance)
+    prompt = build_prompt(user_input)
+
     try:
         if model_instance.api_provider == 'google_gemini':
-            # Direct implementation based on user's working code
-            client = genai.Client(api_key=api_key)
             response = client.models.generate_content(
                 model=model_instance.model_name, contents=prompt
                 )
             return response.text
 
         elif model_instance.api_provider == 'open_router':
-            client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=api_key)
             completion = client.chat.completions.create(
                 model=model_instance.model_name,
                 messages=[{"role": "user", "content": prompt}],
@@ -59,4 +141,74 @@ Your task is to apply these rules to the user input and generate the appropriate
         # Log the specific error for debugging
         print(f"AI_SERVICE_ERROR: Failed to call {model_instance.display_name}. Error: {e}")
         # Raise a generic error to the view
-        raise Exception("An error occurred while communicating with the AI service.")
+        raise Exception("An error occurred while communicating with the AI service.") from e
+
+
+
+async def _agenerate_resume_content(model_instance: AIModel, user_input: str) -> str:
+    if model_instance.api_provider == 'fake':
+        await asyncio.sleep(settings.AI_FAKE_PROVIDER_LATENCY)
+        return FAKE_RESUME
+
+    client = get_async_client(model_instance)
+    prompt = build_prompt(user_input)
+
+    try:
+        if model_instance.api_provider == 'google_gemini':
+            response = await client.models.generate_content(
+                model=model_instance.model_name, contents=prompt
+                )
+            return response.text
+
+        elif model_instance.api_provider == 'open_router':
+            completion = await client.chat.completions.create(
+                model=model_instance.model_name,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return completion.choices[0].message.content
+
+        else:
+            raise NotImplementedError(f"The API provider '{model_instance.api_provider}' is not supported.")
+
+    except Exception as e:
+        print(f"AI_SERVICE_ERROR: Failed to call {model_instance.display_name}. Error: {e}")
+        raise Exception("An error occurred while communicating with the AI service.") from e
+
+def _stream_resume_content(model_instance: AIModel, user_input: str):
+    if model_instance.api_provider == 'fake':
+        lines = FAKE_RESUME.splitlines(keepends=True)
+        for line in lines:
+            time.sleep(settings.AI_FAKE_PROVIDER_LATENCY / len(lines))
+            yield line
+        return
+
+    client = get_client(model_instance)
+    prompt = build_prompt(user_input)
+
+    try:
+        if model_instance.api_provider == 'google_gemini':
+            # Closing the stream early (e.g. a cancelled hedge) drops the connection
+            with closing(client.models.generate_content_stream(
+                model=model_instance.model_name, contents=prompt
+                )) as stream:
+                for chunk in stream:
+                    if chunk.text:
+                        yield chunk.text
+
+        elif model_instance.api_provider == 'open_router':
+            with client.chat.completions.create(
+                model=model_instance.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            ) as stream:
+                for chunk in stream:
+                    # OpenRouter sends keep-alive chunks without choices
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+        else:
+            raise NotImplementedError(f"The API provider '{model_instance.api_provider}' is not supported.")
+
+    except Exception as e:
+        print(f"AI_SERVICE_ERROR: Failed to stream from {model_instance.display_name}. Error: {e}")
+        raise Exception("An error occurred while communicating with the AI service.") from e
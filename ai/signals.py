@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import registry
+from .models import AIModel
+from .views import model_list
+
+
+@receiver(post_save, sender=AIModel)
+@receiver(post_delete, sender=AIModel)
+def ai_model_changed(sender, instance, **kwargs):
+    # Admin edits show up in the model list right away instead of after the TTL
+    transaction.on_commit(model_list.invalidate)
+    # Once now, so this process sees the change, and again after commit, in
+    # case another worker reloaded the old rows in between
+    registry.invalidate()
+    transaction.on_commit(registry.invalidate)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # The registry caches the anonymous user's id
+    if instance.username == registry.ANONYMOUS_USERNAME:
+        registry.invalidate()
+        transaction.on_commit(registry.invalidate)
@@ -0,0 +1,32 @@
+from core import jobs
+from resume.models import Resume
+from . import generation_cache
+from . import registry
+from . import routing
+
+
+@jobs.register('ai.generate_resume')
+def generate_resume_job(payload):
+    """
+    Background version of `GenerateResumeView`: generates the resume and saves it.
+    """
+    candidates = [model for model in registry.active_models() if model.id in payload['model_ids']]
+    if not candidates:
+        raise jobs.PermanentJobError("This model is not valid or is currently disabled.")
+    route = routing.Route(payload['route'], candidates)
+
+    try:
+        ai_response_text, _ = generation_cache.get_or_generate(
+            route.cache_name, payload['user_input'],
+            lambda: routing.generate(route, payload['user_input'])[0],
+        )
+    except (ValueError, NotImplementedError) as e:
+        # Configuration problems will not fix themselves on retry
+        raise jobs.PermanentJobError(str(e))
+
+    new_resume = Resume.objects.create(
+        user_id=payload['user_id'],
+        title=payload['title'],
+        content=ai_response_text
+    )
+    return {"resume_id": new_resume.id, "content": ai_response_text}
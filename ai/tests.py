@@ -1,5 +1,563 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import threading
+import uuid
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from django.contrib.auth.models import AnonymousUser, User
+from rest_framework.test import APIClient
+from core import jobs
+from resume.models import Resume
+from collections import defaultdict
+from django.core.cache import cache
+from . import generation_cache, metrics, quotas, registry, resilience, routing
+from .async_views import AsyncGenerateResumeView, AsyncListAIModelsView
+from .clients import clear_clients, get_client
+from .services import FAKE_RESUME, generate_resume_content, stream_resume_content
+from .views import model_list
+from .models import AIModel
+from .serializers import ResumeGenerationSerializer
+
+USER_INPUT = "Senior Python developer with ten years of Django, REST APIs and PostgreSQL experience."
+
 
 class AITestCase(TestCase):
     def test_ai_placeholder(self):
         self.assertTrue(True) # Placeholder test, to be replaced with actual AI integration tests
+
+
+@mock.patch.dict(os.environ, {'GEMINI_API_KEY': 'gemini-key', 'OPENROUTER_API_KEY': 'router-key'})
+class ProviderClientRegistryTest(TestCase):
+    def setUp(self):
+        clear_clients()
+        self.addCleanup(clear_clients)
+
+    def test_client_is_reused_for_same_provider_and_key(self):
+        first = AIModel(display_name='A', model_name='a', api_provider='open_router', api_key_name='OPENROUTER_API_KEY')
+        second = AIModel(display_name='B', model_name='b', api_provider='open_router', api_key_name='OPENROUTER_API_KEY')
+
+        self.assertIs(get_client(first), get_client(second))
+
+    def test_changing_provider_or_key_builds_new_client(self):
+        model = AIModel(display_name='A', model_name='a', api_provider='open_router', api_key_name='OPENROUTER_API_KEY')
+        router_client = get_client(model)
+
+        model.api_provider = 'google_gemini'
+        model.api_key_name = 'GEMINI_API_KEY'
+
+        self.assertIsNot(get_client(model), router_client)
+
+    def test_missing_key_is_reported(self):
+        model = AIModel(display_name='A', model_name='a', api_provider='open_router', api_key_name='MISSING_API_KEY')
+
+        with self.assertRaises(ValueError):
+            get_client(model)
+
+
+@override_settings(AI_GENERATION_CACHE_TTL=0, AI_ANON_RATE_LIMIT=0)
+class GenerateResumeStreamTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model = AIModel.objects.create(
+            display_name='Gemini', model_name='gemini-test',
+            api_provider='google_gemini', api_key_name='GEMINI_API_KEY',
+        )
+
+    @mock.patch('ai.routing.stream_resume_content')
+    def test_stream_forwards_chunks_and_saves_resume(self, mock_stream):
+        mock_stream.return_value = iter(['# Jane Doe\n', 'Python developer'])
+
+        response = self.client.post(
+            reverse('generate-resume-stream'),
+            {'model': 'gemini', 'user_input': USER_INPUT},
+            format='json',
+        )
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: start', body)
+        self.assertIn('"text": "# Jane Doe\\n"', body)
+        self.assertIn('event: done', body)
+        resume = Resume.objects.get()
+        self.assertEqual(resume.content, '# Jane Doe\nPython developer')
+        self.assertEqual(resume.user.username, 'anonymous_user')
+
+    @mock.patch('ai.routing.stream_resume_content')
+    def test_stream_reports_provider_errors_as_event(self, mock_stream):
+        mock_stream.side_effect = Exception("An error occurred while communicating with the AI service.")
+
+        response = self.client.post(
+            reverse('generate-resume-stream'),
+            {'model': 'gemini', 'user_input': USER_INPUT},
+            format='json',
+        )
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertIn('event: error', body)
+        self.assertFalse(Resume.objects.exists())
+
+    def test_event_stream_clients_receive_validation_errors_as_event(self):
+        response = self.client.post(
+            reverse('generate-resume-stream'),
+            {'model': 'unknown', 'user_input': USER_INPUT},
+            format='json',
+            HTTP_ACCEPT='text/event-stream',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b'event: error'))
+
+
+@override_settings(AI_GENERATION_CACHE_TTL=0, AI_ANON_RATE_LIMIT=0)
+class AsyncGenerationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        AIModel.objects.create(
+            display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED',
+        )
+
+    def test_respond_async_returns_job_that_workers_complete(self):
+        response = self.client.post(
+            reverse('generate-resume'),
+            {'model': 'Fake', 'user_input': USER_INPUT},
+            format='json',
+            HTTP_PREFER='respond-async',
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+        self.addCleanup(get_redis_connection("default").lrem, jobs.QUEUE_KEY, 0, job_id)
+        self.assertEqual(response['Location'], reverse('ai-job-status', kwargs={'job_id': job_id}))
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'queued')
+
+        jobs.run_job(job_id)
+
+        status_response = self.client.get(response['Location'])
+        self.assertEqual(status_response.data['status'], 'succeeded')
+        resume = Resume.objects.get(pk=status_response.data['result']['resume_id'])
+        self.assertEqual(resume.user.username, 'anonymous_user')
+
+
+@override_settings(AI_GENERATION_CACHE_POLL_INTERVAL=0.01)
+class GenerationCacheTest(TestCase):
+    def setUp(self):
+        # A unique model name keeps each test's entries apart
+        self.model_name = f"test-model-{uuid.uuid4()}"
+
+    def test_identical_inputs_hit_the_cache(self):
+        generate = mock.Mock(return_value="# Resume")
+
+        first = generation_cache.get_or_generate(self.model_name, USER_INPUT, generate)
+        second = generation_cache.get_or_generate(self.model_name, f"  {USER_INPUT}\n", generate)
+
+        self.assertEqual(first, ("# Resume", generation_cache.MISS))
+        self.assertEqual(second, ("# Resume", generation_cache.HIT))
+        generate.assert_called_once()
+
+    def test_concurrent_identical_requests_call_provider_once(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_generate():
+            calls.append(1)
+            release.wait(5)
+            return "# Shared resume"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                generation_cache.get_or_generate(self.model_name, USER_INPUT, slow_generate)
+            ))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        while not calls:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({text for text, _ in results}, {"# Shared resume"})
+        self.assertEqual(sorted(cache_status for _, cache_status in results), ['COALESCED', 'COALESCED', 'MISS'])
+
+    def test_least_recently_used_entries_are_evicted_over_budget(self):
+        text = "x" * 2000
+        entry_size = len(generation_cache.zlib.compress(text.encode()))
+
+        with override_settings(AI_GENERATION_CACHE_MAX_BYTES=entry_size * 2):
+            generation_cache.store(self.model_name, "first input", text)
+            generation_cache.store(self.model_name, "second input", text)
+            generation_cache.store(self.model_name, "third input", text)
+
+        self.assertIsNone(generation_cache.get(self.model_name, "first input"))
+        self.assertEqual(generation_cache.get(self.model_name, "third input"), text)
+
+
+@override_settings(AI_GENERATION_CACHE_TTL=0, AI_ANON_RATE_LIMIT=2, AI_ANON_RATE_WINDOW=3600)
+class QuotaTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model = AIModel.objects.create(
+            display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED', daily_limit=1,
+        )
+        self.ip = '10.0.0.1'
+        self.user = User.objects.create_user(username='quota_user', password='x')
+        # Database ids are reused between tests, so clear counters left by earlier ones
+        redis = get_redis_connection("default")
+        for pattern in (f"ai:quota:user:{self.user.id}:*", f"ai:quota:ip:{self.ip}:*"):
+            for key in redis.scan_iter(pattern):
+                redis.delete(key)
+
+    def generate(self, **extra):
+        return self.client.post(
+            reverse('generate-resume'), {'model': 'Fake', 'user_input': USER_INPUT},
+            format='json', REMOTE_ADDR=self.ip, **extra
+        )
+
+    def test_daily_limit_is_enforced_per_user_and_model(self):
+        self.client.force_authenticate(self.user)
+
+        first = self.generate()
+        second = self.generate()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first['X-RateLimit-Remaining'], '0')
+        self.assertEqual(second.status_code, 429)
+        self.assertGreater(int(second['Retry-After']), 0)
+
+        usage = self.client.get(reverse('ai-usage')).data['models']
+        self.assertEqual(usage, [{'model_name': 'Fake', 'limit': 1, 'used': 1, 'remaining': 0, 'window_seconds': 86400}])
+
+    def test_anonymous_callers_are_limited_per_ip(self):
+        self.model.daily_limit = 0
+        self.model.save()
+
+        statuses = [self.generate().status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [201, 201, 429])
+        usage = self.client.get(reverse('ai-usage'), REMOTE_ADDR=self.ip).data['anonymous']
+        self.assertEqual(usage['remaining'], 0)
+
+    @mock.patch('ai.routing.generate_resume_content', side_effect=Exception("provider down"))
+    def test_failed_generations_are_refunded(self, mock_generate):
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.generate().status_code, 503)
+        self.assertEqual(self.generate().status_code, 503)
+
+    def test_refunds_go_to_the_counted_window_and_never_below_zero(self):
+        key = f"ai:quota:ip:{self.ip}:refund-test"
+        get_redis_connection("default").set(key, 1)
+        usage = quotas.Usage(f"ip:{self.ip}", 2, 3600, 1, key=key)
+
+        quotas.refund(usage)
+        quotas.refund(usage)
+
+        self.assertEqual(get_redis_connection("default").get(key), b'0')
+
+    def test_requests_are_let_through_when_redis_is_down(self):
+        self.client.force_authenticate(self.user)
+        redis = mock.Mock(**{'eval.side_effect': RedisError("connection refused")})
+
+        with mock.patch('ai.quotas.get_redis_connection', return_value=redis):
+            statuses = [self.generate().status_code for _ in range(2)]
+
+        self.assertEqual(statuses, [201, 201])
+
+
+@override_settings(AI_ROUTING_MIN_SAMPLES=1, AI_HEDGE_DEFAULT_DELAY=0.05, AI_HEDGE_MIN_DELAY=0.01, AI_MAX_HEDGES=1, AI_HEDGING_ENABLED=True)
+class RoutingTest(TestCase):
+    def setUp(self):
+        self.slow = AIModel.objects.create(
+            display_name='Slow', model_name='slow', api_provider='fake', api_key_name='UNUSED', routing_group='general',
+        )
+        self.fast = AIModel.objects.create(
+            display_name='Quick', model_name='quick', api_provider='fake', api_key_name='UNUSED', routing_group='general',
+        )
+        self.user = User.objects.create_user(username='router', password='x')
+        self.tracker = routing.LatencyTracker(window=10)
+        patcher = mock.patch('ai.routing.tracker', self.tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_streams(self, behaviours):
+        """
+        Patches the provider streams: `behaviours` maps a model to
+        (seconds before the first chunk, chunks or an exception).
+        """
+        closed = []
+
+        def stream(model, user_input):
+            delay, result = behaviours[model.id]
+            try:
+                threading.Event().wait(delay)
+                if isinstance(result, Exception):
+                    raise result
+                yield from result
+            finally:
+                closed.append(model.id)
+
+        patcher = mock.patch('ai.routing.stream_resume_content', side_effect=stream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return closed
+
+    def test_group_is_ranked_by_recent_latency(self):
+        self.tracker.record(self.slow.id, total=30)
+        self.tracker.record(self.fast.id, total=3)
+
+        route = routing.resolve_route('General', self.user)
+
+        self.assertEqual(route.candidates, [self.fast, self.slow])
+        self.assertEqual(routing.resolve_route('fastest', self.user).primary, self.fast)
+        self.assertIsNone(routing.resolve_route('Quick', self.user))
+
+    def test_failed_model_falls_back_to_next_candidate(self):
+        self.tracker.record(self.slow.id, total=1)
+        self.tracker.record(self.fast.id, total=2)
+        self.fake_streams({
+            self.slow.id: (0, Exception("provider down")),
+            self.fast.id: (0, ['# Resume']),
+        })
+
+        text, model_used = routing.generate(routing.resolve_route('general', self.user), USER_INPUT)
+
+        self.assertEqual((text, model_used), ('# Resume', self.fast))
+        self.assertEqual(self.tracker.error_rate(self.slow.id), 0.5)
+
+    def test_slow_first_chunk_is_hedged_and_loser_cancelled(self):
+        self.tracker.record(self.slow.id, total=1, ttfb=0.05)
+        self.tracker.record(self.fast.id, total=2, ttfb=0.05)
+        closed = self.fake_streams({
+            self.slow.id: (0.5, ['# From the slow model']),
+            self.fast.id: (0, ['# From the', ' hedged model']),
+        })
+
+        text, model_used = routing.generate(routing.resolve_route('general', self.user), USER_INPUT)
+
+        self.assertEqual((text, model_used), ('# From the hedged model', self.fast))
+        for _ in range(100):
+            if self.slow.id in closed:
+                break
+            threading.Event().wait(0.01)
+        self.assertIn(self.slow.id, closed)
+
+
+@override_settings(AI_GENERATION_CACHE_TTL=0, AI_ANON_RATE_LIMIT=0, AI_BREAKER_FAILURE_THRESHOLD=2, AI_BREAKER_COOLDOWN=30)
+class ResilienceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model = AIModel.objects.create(
+            display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED',
+        )
+        get_redis_connection("default").delete(resilience.BREAKER_KEY.format(model_id=self.model.id))
+
+    def generate(self):
+        return self.client.post(reverse('generate-resume'), {'model': 'Fake', 'user_input': USER_INPUT}, format='json')
+
+    @mock.patch('ai.services._generate_resume_content', side_effect=Exception("provider down"))
+    def test_breaker_opens_after_repeated_failures(self, mock_generate):
+        statuses = [self.generate().status_code for _ in range(2)]
+        rejected = self.generate()
+
+        self.assertEqual(statuses, [503, 503])
+        self.assertEqual(rejected.status_code, 503)
+        self.assertGreater(int(rejected['Retry-After']), 0)
+        # The open breaker kept the third request away from the provider
+        self.assertEqual(mock_generate.call_count, 2)
+        self.assertEqual(resilience.breaker_state(self.model)['state'], resilience.OPEN)
+
+    def test_half_open_breaker_closes_after_successful_probe(self):
+        redis = get_redis_connection("default")
+        redis.hset(resilience.BREAKER_KEY.format(model_id=self.model.id), mapping={'state': 'open', 'opened_until': 0})
+
+        self.assertEqual(self.generate().status_code, 201)
+        self.assertEqual(resilience.breaker_state(self.model)['state'], resilience.CLOSED)
+
+    def test_full_bulkhead_rejects_without_calling_provider(self):
+        bulkheads = defaultdict(lambda: threading.BoundedSemaphore(1))
+        with mock.patch('ai.resilience._bulkheads', bulkheads):
+            with resilience.guard(self.model):
+                with self.assertRaises(resilience.BulkheadFullError):
+                    with resilience.guard(self.model):
+                        pass
+            # The slot is released once the first call is done
+            with resilience.guard(self.model):
+                pass
+
+
+@override_settings(AI_METRICS_MIN_SAMPLES=2)
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model = AIModel.objects.create(
+            display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED',
+            response_time_info='5-10 seconds',
+        )
+        redis = get_redis_connection("default")
+        for key in redis.scan_iter(f"ai:metrics:{self.model.id}:*"):
+            redis.delete(key)
+        get_redis_connection("default").delete(resilience.BREAKER_KEY.format(model_id=self.model.id))
+        cache.delete(metrics.SUMMARY_CACHE_KEY)
+        get_redis_connection("default").delete(model_list.key)
+
+    def test_calls_are_recorded_per_model(self):
+        generate_resume_content(self.model, USER_INPUT)
+        list(stream_resume_content(self.model, USER_INPUT))
+        with mock.patch('ai.services._generate_resume_content', side_effect=TimeoutError("slow")):
+            with self.assertRaises(TimeoutError):
+                generate_resume_content(self.model, USER_INPUT)
+
+        summary = metrics.summary(self.model)
+
+        self.assertEqual(summary['calls'], 3)
+        self.assertEqual(summary['latency']['samples'], 2)
+        self.assertEqual(summary['latency']['p95_seconds'], 0.25)
+        self.assertEqual(summary['ttfb']['samples'], 1)
+        self.assertEqual(summary['error_classes'], {'TimeoutError': 1})
+        self.assertEqual(summary['mean_output_chars'], len(FAKE_RESUME))
+
+    def test_model_list_shows_measured_latency_once_sampled(self):
+        generate_resume_content(self.model, USER_INPUT)
+        before = json.loads(self.client.get(reverse('list-ai-models')).content)['data'][0]
+        cache.delete(metrics.SUMMARY_CACHE_KEY)
+        get_redis_connection("default").delete(model_list.key)
+        generate_resume_content(self.model, USER_INPUT)
+        after = json.loads(self.client.get(reverse('list-ai-models')).content)['data'][0]
+
+        self.assertEqual(before['response_time_info'], '5-10 seconds')
+        self.assertIsNone(before['measured_latency'])
+        self.assertEqual(after['measured_latency']['p50_seconds'], 0.25)
+        self.assertIn('p95', after['response_time_info'])
+
+
+@override_settings(
+    AI_GENERATION_CACHE_TTL=0, AI_ANON_RATE_LIMIT=0, AI_ROUTING_MIN_SAMPLES=1,
+    AI_HEDGE_DEFAULT_DELAY=0.05, AI_HEDGE_MIN_DELAY=0.01, AI_MAX_HEDGES=1, AI_HEDGING_ENABLED=True,
+)
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.slow = AIModel.objects.create(
+            display_name='Slow', model_name='slow', api_provider='fake', api_key_name='UNUSED', routing_group='general',
+        )
+        self.fast = AIModel.objects.create(
+            display_name='Quick', model_name='quick', api_provider='fake', api_key_name='UNUSED', routing_group='general',
+        )
+        redis = get_redis_connection("default")
+        for model in (self.slow, self.fast):
+            redis.delete(resilience.BREAKER_KEY.format(model_id=model.id))
+        redis.delete(model_list.key)
+        self.tracker = routing.LatencyTracker(window=10)
+        patcher = mock.patch('ai.routing.tracker', self.tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, view, request):
+        return async_to_sync(view.as_view())(request)
+
+    def test_async_generation_saves_resume(self):
+        request = self.factory.post(
+            '/api/ai/generate/', {'model': 'Quick', 'user_input': USER_INPUT}, content_type='application/json',
+        )
+
+        response = self.call(AsyncGenerateResumeView, request)
+
+        self.assertEqual(response.status_code, 201)
+        resume = Resume.objects.get(id=json.loads(response.content)['resume_id'])
+        self.assertEqual(resume.content, FAKE_RESUME)
+        self.assertEqual(resume.user.username, 'anonymous_user')
+
+    def test_async_model_list_matches_sync_view(self):
+        response = self.call(AsyncListAIModelsView, self.factory.get('/api/ai/models/'))
+        names = [item['model_name'] for item in json.loads(response.content)['data']]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(names, ['Quick', 'Slow'])
+
+    def test_slow_model_is_hedged_on_the_event_loop(self):
+        self.tracker.record(self.slow.id, total=0.05)
+        self.tracker.record(self.fast.id, total=0.06)
+
+        async def generate(model, user_input):
+            await asyncio.sleep(1 if model == self.slow else 0)
+            return model.display_name
+
+        with mock.patch('ai.routing.agenerate_resume_content', side_effect=generate):
+            route = routing.Route('general', [self.slow, self.fast])
+            text, model_used = async_to_sync(routing.agenerate)(route, USER_INPUT)
+
+        self.assertEqual((text, model_used), ('Quick', self.fast))
+
+    def test_invalid_token_is_rejected(self):
+        request = self.factory.get('/api/ai/models/', headers={'Authorization': 'Bearer not-a-token'})
+
+        self.assertEqual(self.call(AsyncListAIModelsView, request).status_code, 401)
+
+
+class ModelListHttpCachingTest(TestCase):
+    def setUp(self):
+        AIModel.objects.create(display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED')
+        cache.delete(metrics.SUMMARY_CACHE_KEY)
+        get_redis_connection("default").delete(model_list.key)
+
+    def test_model_list_is_publicly_cacheable_and_revalidated(self):
+        first = self.client.get(reverse('list-ai-models'))
+        second = self.client.get(reverse('list-ai-models'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertIn('public', first['Cache-Control'])
+        self.assertIn('max-age=60', first['Cache-Control'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_admin_changes_invalidate_the_cached_list(self):
+        self.client.get(reverse('list-ai-models'))
+        with self.captureOnCommitCallbacks(execute=True):
+            AIModel.objects.create(display_name='New', model_name='new', api_provider='fake', api_key_name='UNUSED')
+
+        self.addCleanup(get_redis_connection("default").delete, model_list.lock_key)
+        with mock.patch('core.cached_response.threading.Thread') as refresh:
+            response = self.client.get(reverse('list-ai-models'))
+
+        self.assertEqual(response['X-Cache-Status'], 'STALE')
+        refresh.return_value.start.assert_called_once()
+
+
+class ModelRegistryTest(TestCase):
+    def setUp(self):
+        self.model = AIModel.objects.create(
+            display_name='Fake', model_name='fake', api_provider='fake', api_key_name='UNUSED', routing_group='general',
+        )
+        self.request = mock.Mock(user=AnonymousUser())
+
+    def validate(self, value):
+        serializer = ResumeGenerationSerializer(data={'model': value, 'user_input': USER_INPUT}, context={'request': self.request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['model']
+
+    def test_validation_and_owner_lookup_use_no_queries_once_loaded(self):
+        self.validate('fake')
+        registry.anonymous_user_id()
+
+        with self.assertNumQueries(0):
+            route = self.validate('FAKE')
+            group = self.validate('general')
+            owner_id = registry.anonymous_user_id()
+
+        self.assertEqual(route.primary.id, self.model.id)
+        self.assertEqual([model.id for model in group.candidates], [self.model.id])
+        self.assertEqual(User.objects.get(pk=owner_id).username, 'anonymous_user')
+
+    def test_other_workers_reload_after_an_admin_edit(self):
+        self.validate('Fake')
+        # Saved by another worker: this one only sees the version bump in Redis
+        AIModel.objects.filter(pk=self.model.pk).update(is_active=False)
+        get_redis_connection("default").incr(registry.VERSION_KEY)
+        with override_settings(AI_REGISTRY_CHECK_INTERVAL=0):
+            self.assertIsNone(registry.get_active_model('Fake'))
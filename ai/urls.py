@@ -1,7 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from .views import ListAIModelsView, GenerateResumeView
+from core.views import JobStatusView
+from .async_views import AsyncGenerateResumeView, AsyncListAIModelsView
+from .views import (
+    ListAIModelsView, GenerateResumeView, GenerateResumeStreamView, AIUsageView,
+    GenerationCacheStatsView, AIHealthView, AIMetricsView,
+)
+
+# Under uvicorn the model list and generation are served by native async views
+if settings.AI_ASYNC_VIEWS:
+    models_view, generate_view = AsyncListAIModelsView.as_view(), AsyncGenerateResumeView.as_view()
+else:
+    models_view, generate_view = ListAIModelsView.as_view(), GenerateResumeView.as_view()
 
 urlpatterns = [
-    path('models/', ListAIModelsView.as_view(), name='list-ai-models'),
-    path('generate/', GenerateResumeView.as_view(), name='generate-resume'),
+    path('models/', models_view, name='list-ai-models'),
+    path('generate/', generate_view, name='generate-resume'),
+    path('generate/stream/', GenerateResumeStreamView.as_view(), name='generate-resume-stream'),
+    path('usage/', AIUsageView.as_view(), name='ai-usage'),
+    path('jobs/<str:job_id>/', JobStatusView.as_view(), name='ai-job-status'),
+    path('cache/stats/', GenerationCacheStatsView.as_view(), name='ai-generation-cache-stats'),
+    path('health/', AIHealthView.as_view(), name='ai-health'),
+    path('metrics/', AIMetricsView.as_view(), name='ai-metrics'),
 ]
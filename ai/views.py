@@ -1,52 +1,81 @@
-from django.contrib.auth.models import User
-from django.core.cache import cache
+import time
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework import status
+from core import jobs
+from core.cached_response import CachedResponse, cached_json_response
+from core.streaming import streaming_content
+from . import generation_cache, metrics, quotas, registry, resilience, routing
 from .models import AIModel
 from resume.models import Resume
+from .renderers import EventStreamRenderer, format_sse_event
 from .serializers import AIModelSerializer, ResumeGenerationSerializer
-from .services import generate_resume_content
+
+
+def get_resume_owner_id(request):
+    """
+    Returns the id of the user a generated resume should belong to.
+    Anonymous requests are assigned to a dedicated, inactive user.
+    """
+    if request.user.is_authenticated:
+        return request.user.id
+    return registry.anonymous_user_id()
+
+
+def with_measured_latency(data):
+    """
+    Replaces the hand-written `response_time_info` of serialized models with the
+    measured p50/p95 for models that have enough recent calls, and adds the raw numbers.
+    """
+    measured = metrics.measured_latency()
+    models = []
+    for item in data:
+        latency = measured.get(item['model_name'])
+        item = {**item, 'measured_latency': latency}
+        if latency:
+            item['response_time_info'] = metrics.format_latency(latency)
+        models.append(item)
+    return models
+
+
+def build_model_list():
+    return with_measured_latency(AIModelSerializer(AIModel.objects.filter(is_active=True), many=True).data)
+
+
+# Rebuilt every minute to pick up new latency measurements; admin changes to
+# the models invalidate it right away (see signals.py). If the database is
+# down, the last list keeps being served for up to an hour.
+model_list = CachedResponse(
+    'ai_models_list', build_model_list,
+    ttl=settings.AI_METRICS_SUMMARY_CACHE_TTL, stale_ttl=60 * 60,
+)
+
 
 class ListAIModelsView(APIView):
     """
-    Lists all active AI models available for use.
-    This view is cached for 1 hour to reduce database load.
+    Lists all active AI models available for use, with their measured latencies.
+    The serialized list is cached in Redis and shared by all requests.
     """
     permission_classes = [AllowAny]
-    CACHE_KEY = "ai_models_list"
-    CACHE_TIMEOUT = 60 * 60  # 1 hour in seconds
+    # The list is the same for everyone, so proxies and CDNs may cache it briefly
+    HTTP_CACHE_CONTROL = {'public': True, 'max_age': 60}
 
     def get(self, request, *args, **kwargs):
-        # Try to get the data from the cache first
-        cached_data = cache.get(self.CACHE_KEY)
-        if cached_data:
-            # Cache Hit: Add status and return
-            response_data = {
-                'cache_status': 'HIT (Response from Redis cache)',
-                'data': cached_data
-            }
-            return Response(response_data, headers={'X-Cache-Status': 'HIT'})
-
-        # Cache Miss: Fetch from DB
-        active_models = AIModel.objects.filter(is_active=True)
-        serializer = AIModelSerializer(active_models, many=True)
-        
-        # Save the raw serialized data to the cache
-        cache.set(self.CACHE_KEY, serializer.data, self.CACHE_TIMEOUT)
-        
-        # Prepare response body with status
-        response_data = {
-            'cache_status': 'MISS (Response from database)',
-            'data': serializer.data
-        }
-        return Response(response_data, headers={'X-Cache-Status': 'MISS'})
+        return cached_json_response(request, model_list.get(), self.HTTP_CACHE_CONTROL)
 
 class GenerateResumeView(APIView):
     """
     Receives user input and a model choice, then generates and saves a resume.
     Returns the ID of the newly created resume.
+
+    Clients that send `Prefer: respond-async` get `202 Accepted` right away
+    instead; the resume is generated by a background worker and the job can be
+    polled at `/api/ai/jobs/<job_id>/`.
     """
     permission_classes = [AllowAny]
 
@@ -55,31 +84,220 @@ class GenerateResumeView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        model_instance = serializer.validated_data['model']
+        route = serializer.validated_data['model']
         user_input = serializer.validated_data['user_input']
         title = serializer.validated_data.get('title', 'Untitled Resume')
 
         try:
-            ai_response_text = generate_resume_content(model_instance, user_input)
+            usage = quotas.consume(request, route.primary)
+        except quotas.QuotaExceeded as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers=e.usage.headers())
+        quota_headers = usage.headers() if usage else {}
 
-            # Determine the user for the resume
-            if request.user.is_authenticated:
-                user = request.user
-            else:
-                # Get or create the dedicated anonymous user
-                user, _ = User.objects.get_or_create(
-                    username='anonymous_user',
-                    defaults={'is_active': False} # This user cannot log in
-                )
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            return self.enqueue(request, route, user_input, title, quota_headers)
+
+        try:
+            ai_response_text, cache_status = generation_cache.get_or_generate(
+                route.cache_name, user_input,
+                lambda: routing.generate(route, user_input)[0],
+            )
 
             # Create and save the new resume
             new_resume = Resume.objects.create(
-                user=user,
+                user_id=get_resume_owner_id(request),
                 title=title,
                 content=ai_response_text
             )
 
-            return Response({"resume_id": new_resume.id, "content": ai_response_text}, status=status.HTTP_201_CREATED)
+            return Response(
+                {"resume_id": new_resume.id, "content": ai_response_text},
+                status=status.HTTP_201_CREATED,
+                headers={'X-Cache-Status': cache_status, **quota_headers},
+            )
 
+        except resilience.ProviderUnavailable as e:
+            # Rejected before reaching the provider; tell the client when to come back
+            quotas.refund(usage)
+            return Response(
+                {"error": str(e), "retry_after": e.retry_after},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(e.retry_after), **quota_headers},
+            )
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
\ No newline at end of file
+            quotas.refund(usage)
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def enqueue(self, request, route, user_input, title, quota_headers):
+        job = jobs.enqueue('ai.generate_resume', {
+            'route': route.name,
+            'model_ids': [model.id for model in route.candidates],
+            'user_input': user_input,
+            'title': title,
+            'user_id': get_resume_owner_id(request),
+        }, owner_id=request.user.id if request.user.is_authenticated else None)
+
+        status_url = reverse('ai-job-status', kwargs={'job_id': job['id']})
+        return Response(
+            {"job_id": job['id'], "status": job['status'], "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url, **quota_headers},
+        )
+
+
+class GenerateResumeStreamView(APIView):
+    """
+    Streaming variant of `GenerateResumeView`.
+    Forwards the AI output as Server-Sent Events while it is being generated and
+    saves the resume once the provider has finished.
+
+    Events:
+      - `start`: sent immediately, before the provider is called.
+      - `chunk`: `{"text": ...}` for every piece of generated text.
+      - `done`: `{"resume_id", "model", "ttfb_ms", "total_ms"}` once the resume
+        is saved. `model` is the model that answered (null for cached resumes).
+      - `error`: `{"error": ...}` if validation or generation fails, plus
+        `retry_after` (seconds) when the model is temporarily unavailable.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ResumeGenerationSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        route = serializer.validated_data['model']
+        user_input = serializer.validated_data['user_input']
+        title = serializer.validated_data.get('title', 'Untitled Resume')
+        try:
+            usage = quotas.consume(request, route.primary)
+        except quotas.QuotaExceeded as e:
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers=e.usage.headers())
+
+        owner_id = get_resume_owner_id(request)
+        cached_text = generation_cache.get(route.cache_name, user_input)
+
+        response = StreamingHttpResponse(
+            streaming_content(self.event_stream(route, user_input, title, owner_id, cached_text, usage)),
+            content_type='text/event-stream',
+        )
+        for header, value in (usage.headers() if usage else {}).items():
+            response[header] = value
+        response['Cache-Control'] = 'no-cache'
+        response['X-Cache-Status'] = generation_cache.HIT if cached_text is not None else generation_cache.MISS
+        # Stop Nginx from buffering the stream, which would defeat its purpose
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def event_stream(self, route, user_input, title, owner_id, cached_text=None, usage=None):
+        started = time.monotonic()
+        ttfb = None
+        chunks = []
+        model_used = None
+
+        # Flush the headers right away so the client sees the stream open
+        yield format_sse_event('start', {'model': route.name})
+
+        try:
+            # A cached resume is replayed as a single chunk
+            if cached_text is not None:
+                source = [(None, cached_text)]
+            else:
+                source = routing.stream(route, user_input)
+            for model_used, text in source:
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                chunks.append(text)
+                yield format_sse_event('chunk', {'text': text})
+
+            content = ''.join(chunks)
+            if cached_text is None:
+                generation_cache.store(route.cache_name, user_input, content)
+
+            new_resume = Resume.objects.create(
+                user_id=owner_id,
+                title=title,
+                content=content
+            )
+        except Exception as e:
+            if not chunks:
+                quotas.refund(usage)
+            error = {'error': str(e)}
+            if isinstance(e, resilience.ProviderUnavailable):
+                error['retry_after'] = e.retry_after
+            yield format_sse_event('error', error)
+            return
+
+        total = time.monotonic() - started
+        yield format_sse_event('done', {
+            'resume_id': new_resume.id,
+            'model': model_used.display_name if model_used else None,
+            'ttfb_ms': round((ttfb or total) * 1000),
+            'total_ms': round(total * 1000),
+        })
+
+
+class AIUsageView(APIView):
+    """
+    Shows how much of their generation quota the caller has used.
+    Logged-in users get one entry per limited model; anonymous callers get
+    the per-IP limit that applies to all models.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            scope = quotas.get_scope(request, None)
+            return Response({'anonymous': quotas.peek(*scope).as_dict() if scope else None})
+
+        usage = []
+        for model_instance in AIModel.objects.filter(is_active=True, daily_limit__gt=0):
+            scope = quotas.get_scope(request, model_instance)
+            usage.append({'model_name': model_instance.display_name, **quotas.peek(*scope).as_dict()})
+        return Response({'models': usage})
+
+
+class GenerationCacheStatsView(APIView):
+    """
+    Admin-only view of the generation cache's hit/miss counters and size.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(generation_cache.stats())
+
+
+class AIHealthView(APIView):
+    """
+    Admin-only view of each active model's circuit breaker and the bulkhead counters.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        models = [
+            {'model_name': model_instance.display_name, **resilience.breaker_state(model_instance)}
+            for model_instance in AIModel.objects.filter(is_active=True)
+        ]
+        return Response({'models': models, **resilience.stats()})
+
+
+class AIMetricsView(APIView):
+    """
+    Admin-only view of each active model's call counts, latency histograms,
+    time-to-first-chunk, sizes and error classes. `?hours=` sets the window.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            hours = int(request.query_params.get('hours', settings.AI_METRICS_WINDOW_HOURS))
+        except ValueError:
+            return Response({"error": "hours must be a whole number."}, status=status.HTTP_400_BAD_REQUEST)
+        hours = min(max(hours, 1), settings.AI_METRICS_RETENTION_HOURS)
+
+        models = list(AIModel.objects.filter(is_active=True))
+        data = metrics.summaries(models, hours)
+        return Response({
+            'models': [{'model_name': model_instance.display_name, **data[model_instance.id]} for model_instance in models],
+        })
@@ -0,0 +1,185 @@
+"""
+Shared cached responses for public endpoints whose body is the same for everyone.
+
+A `CachedResponse` keeps the serialized JSON of one response in Redis, with:
+
+- single-flight rebuilds: when an entry is missing, one request rebuilds it
+  while the others wait for the result instead of all hitting the database;
+- stale-while-revalidate: an expired entry is still served while one
+  background rebuild refreshes it;
+- negative caching: empty results are cached too, just for a shorter time;
+- invalidation: `invalidate()` (called from signal handlers) marks the entry
+  stale, so the next request triggers a rebuild without anyone waiting;
+- a fallback to the stale copy when the database is unavailable. This only
+  helps while a stale copy exists: with nothing cached, the database error
+  propagates to the caller (a 500).
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.http import HttpResponse
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.utils.encoders import JSONEncoder
+from .conditional import not_modified, set_validators
+
+HIT = 'HIT'
+MISS = 'MISS'
+STALE = 'STALE'
+COALESCED = 'COALESCED'
+
+# Shown in the `cache_status` field of the response body
+STATUS_LABELS = {
+    HIT: 'HIT (Response from Redis cache)',
+    MISS: 'MISS (Response from database)',
+    STALE: 'STALE (Response from Redis cache, refreshing in the background)',
+    COALESCED: 'HIT (Response from Redis cache, built by a concurrent request)',
+}
+
+# Only the request holding the lock may release it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class Entry:
+    """
+    One cached body with its ETag, as served to clients.
+    """
+    def __init__(self, body, etag, cache_status):
+        self.body = body
+        self.etag = etag
+        self.cache_status = cache_status
+
+
+class CachedResponse:
+    """
+    A response body cached under `name`. `build()` returns the data to
+    serialize; it is only called on a miss, a stale entry or an invalidation.
+    """
+    def __init__(self, name, build, ttl, stale_ttl=None, empty_ttl=None):
+        self.name = name
+        self.build = build
+        self.ttl = ttl
+        # How long an expired entry may still be served while it is refreshed
+        self.stale_ttl = stale_ttl if stale_ttl is not None else ttl
+        self.empty_ttl = empty_ttl if empty_ttl is not None else settings.CACHED_RESPONSE_EMPTY_TTL
+        self.key = f"cresp:{name}"
+        self.lock_key = f"cresp:lock:{name}"
+
+    def get(self):
+        """
+        Returns the current `Entry`, rebuilding it if needed.
+        """
+        try:
+            redis = get_redis_connection("default")
+            cached = redis.hgetall(self.key)
+        except RedisError:
+            body = self._serialize(self.build())
+            return Entry(body, self._etag(body), MISS)
+
+        if cached:
+            entry = Entry(cached[b'body'], cached[b'etag'].decode(), HIT)
+            if time.time() < float(cached[b'fresh_until']):
+                return entry
+            # Serve the stale copy; one request refreshes it in the background
+            token = self._lock(redis)
+            if token:
+                threading.Thread(target=self._refresh_in_background, args=(token,), daemon=True).start()
+            entry.cache_status = STALE
+            return entry
+
+        token = self._lock(redis)
+        deadline = time.monotonic() + settings.CACHED_RESPONSE_LOCK_TIMEOUT
+        while not token and time.monotonic() < deadline:
+            # Another request is building it; wait for its result
+            time.sleep(settings.CACHED_RESPONSE_POLL_INTERVAL)
+            cached = redis.hgetall(self.key)
+            if cached:
+                return Entry(cached[b'body'], cached[b'etag'].decode(), COALESCED)
+            token = self._lock(redis)
+
+        try:
+            body, etag = self._rebuild(redis)
+            return Entry(body, etag, MISS)
+        finally:
+            if token:
+                redis.eval(RELEASE_SCRIPT, 1, self.lock_key, token)
+
+    def invalidate(self):
+        """
+        Marks the entry stale: it is still served, but the next request refreshes it.
+        """
+        try:
+            get_redis_connection("default").hset(self.key, 'fresh_until', 0)
+        except RedisError as e:
+            print(f"CACHED_RESPONSE_ERROR: could not invalidate {self.name}: {e}")
+
+    def _rebuild(self, redis):
+        data = self.build()
+        body = self._serialize(data)
+        etag = self._etag(body)
+        ttl = self.ttl if data else self.empty_ttl
+        try:
+            pipe = redis.pipeline()
+            pipe.hset(self.key, mapping={'body': body, 'etag': etag, 'fresh_until': time.time() + ttl})
+            pipe.expire(self.key, int(ttl + self.stale_ttl))
+            pipe.execute()
+        except RedisError:
+            pass
+        return body, etag
+
+    def _refresh_in_background(self, token):
+        redis = get_redis_connection("default")
+        try:
+            self._rebuild(redis)
+        except DatabaseError as e:
+            # Keep serving the stale copy until the database is back. The lock
+            # is left to expire, so the next attempt waits for its timeout.
+            print(f"CACHED_RESPONSE_ERROR: could not refresh {self.name}, serving stale data. Error: {e}")
+            try:
+                redis.expire(self.key, int(self.stale_ttl))
+            except RedisError:
+                pass
+            return
+        except Exception as e:
+            # Not an outage: log it and let the next request try again
+            print(f"CACHED_RESPONSE_ERROR: refreshing {self.name} failed. Error: {e!r}")
+        finally:
+            close_old_connections()
+        try:
+            redis.eval(RELEASE_SCRIPT, 1, self.lock_key, token)
+        except RedisError as e:
+            print(f"CACHED_RESPONSE_ERROR: could not release the lock of {self.name}. Error: {e}")
+
+    def _lock(self, redis):
+        token = uuid.uuid4().hex
+        if redis.set(self.lock_key, token, nx=True, ex=int(settings.CACHED_RESPONSE_LOCK_TIMEOUT)):
+            return token
+        return None
+
+    @staticmethod
+    def _serialize(data):
+        return json.dumps(data, cls=JSONEncoder, separators=(',', ':')).encode()
+
+    @staticmethod
+    def _etag(body):
+        return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def cached_json_response(request, entry, cache_control):
+    """
+    Answers with `{"cache_status": ..., "data": <cached body>}`, or 304 when
+    the client's copy matches, without parsing the cached bytes.
+    """
+    response = not_modified(request, entry.etag)
+    if response is None:
+        content = b'{"cache_status":' + json.dumps(STATUS_LABELS[entry.cache_status]).encode() + b',"data":' + entry.body + b'}'
+        response = HttpResponse(content, content_type='application/json')
+    response['X-Cache-Status'] = entry.cache_status
+    return set_validators(response, entry.etag, cache_control=cache_control)
@@ -0,0 +1,111 @@
+"""
+Conditional GET support (ETag / Last-Modified) for list and detail endpoints.
+
+Validators come from one aggregate query over the rows a response is built
+from (their count and newest `updated_at`), so a client holding a fresh copy
+gets `304 Not Modified` without the rows being loaded or serialized.
+
+Lists only get an ETag: removing a row changes the count but not necessarily
+the newest `updated_at`, so Last-Modified could wrongly report them unchanged.
+ETags also include the viewset's `data_version()`, which changes with writes
+that alter what the rows show without touching their `updated_at`.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+# Responses that depend on the caller must not be shared by proxies, and are
+# revalidated on every use
+PRIVATE_CACHE_CONTROL = {'private': True, 'no_cache': True}
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def queryset_validators(queryset, *extra):
+    """
+    Returns `(etag, last_modified, count)` for the rows in `queryset`.
+    `extra` is mixed into the ETag, e.g. the request path and query string,
+    since they decide which rows and fields end up in the response.
+    """
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return make_etag(stats['count'], stats['last_modified'], *extra), stats['last_modified'], stats['count']
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Returns a `304 Not Modified` response if the client's copy is current, else None.
+    """
+    return get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified=None, cache_control=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, **(cache_control or PRIVATE_CACHE_CONTROL))
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def conditional_response(request, etag, last_modified, respond, cache_control=None):
+    """
+    Answers a GET with 304 when the validators match, otherwise calls
+    `respond()` to build the full response. Both get the validator headers.
+    """
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = respond()
+        if response.status_code != 200:
+            return response
+    return set_validators(response, etag, last_modified, cache_control)
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to a viewset's `list` and `retrieve`,
+    for models with an `updated_at` field.
+    """
+    cache_control = PRIVATE_CACHE_CONTROL
+
+    def data_version(self):
+        """
+        Mixed into the ETags; None when unknown, which disables them.
+        """
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            use_last_modified=False,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(**lookup)
+        except (TypeError, ValueError, ValidationError):
+            # e.g. a non-numeric pk; get_object() would answer 404 too
+            raise Http404
+        return self.conditional(request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    def conditional(self, request, queryset, respond, use_last_modified=True):
+        version = self.data_version()
+        if version is None:
+            # A stale 304 would be worse than a full response
+            return respond()
+        etag, last_modified, count = queryset_validators(queryset, request.get_full_path(), request.user.pk, version)
+        if not count and self.action == 'retrieve':
+            # Let the normal lookup produce the 404
+            return respond()
+        if not use_last_modified:
+            last_modified = None
+        return conditional_response(request, etag, last_modified, respond, self.cache_control)
@@ -0,0 +1,68 @@
+"""
+Model fields.
+
+`CompressedTextField` behaves like a `TextField` in Python, forms and
+serializers, but is stored as bytes: zlib-compressed when that makes it
+smaller, raw UTF-8 otherwise. The first byte says which:
+
+    0x00  raw UTF-8
+    0x01  zlib-compressed UTF-8
+
+Values written before a column was converted (plain text, no header) are
+still read correctly. Text is decompressed when a row is loaded; defer the
+column (as the list endpoints do) to skip both the transfer and the work.
+"""
+import zlib
+from django.conf import settings
+from django.db import models
+
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+
+def compress_text(value):
+    data = value.encode('utf-8')
+    if len(data) >= settings.COMPRESSED_TEXT_MIN_LENGTH:
+        compressed = zlib.compress(data, settings.COMPRESSED_TEXT_LEVEL)
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+    return RAW + data
+
+
+def decompress_text(value):
+    if isinstance(value, str):
+        # Stored before the column was converted (SQLite keeps the old text)
+        return value
+    value = bytes(value)
+    header, data = value[:1], value[1:]
+    if header == ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    if header == RAW:
+        return data.decode('utf-8')
+    return value.decode('utf-8')
+
+
+class CompressedTextField(models.TextField):
+    description = "Text stored compressed"
+
+    def get_internal_type(self):
+        # Stored in the backend's binary column type (bytea, BLOB)
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress_text(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return compress_text(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
@@ -0,0 +1,236 @@
+"""
+A small background job queue backed by the project's Redis instance.
+
+Jobs are stored as JSON documents with a TTL and their ids are pushed onto a
+Redis list that worker processes (`python manage.py run_job_workers`) consume.
+Failed jobs are retried with exponential backoff by parking them in a sorted
+set scored by the time they become due again.
+
+A worker claims a job by moving its id (BLMOVE) onto its own processing list,
+and keeps a heartbeat key alive while it runs. If the worker dies mid-job
+(deploy, OOM kill), its heartbeat expires after `JOB_LEASE_TIMEOUT` and
+another worker puts its jobs back on the queue, counting the lost run as a
+failed attempt. A job can therefore run more than once, so handlers must be
+safe to repeat.
+"""
+import json
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+JOB_KEY = "jobs:{job_id}"
+QUEUE_KEY = "jobs:queue"
+DELAYED_KEY = "jobs:delayed"
+WORKERS_KEY = "jobs:workers"  # set of worker ids
+PROCESSING_KEY = "jobs:processing:{worker_id}"  # list of the jobs a worker has claimed
+HEARTBEAT_KEY = "jobs:heartbeat:{worker_id}"  # exists while the worker is alive
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_RETRYING = 'retrying'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+# Maps a job kind (e.g. 'ai.generate_resume') to the function that runs it
+_handlers = {}
+# The job being run by this thread, for report_progress()
+_running = threading.local()
+
+
+class PermanentJobError(Exception):
+    """
+    Raised by a handler when retrying the job cannot possibly help.
+    """
+
+
+def register(kind):
+    """
+    Decorator that registers a function as the handler for a job kind.
+    The handler receives the job's payload and returns a JSON serializable result.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload, owner_id=None):
+    """
+    Stores a new job and pushes it onto the queue. Returns the job document.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No handler is registered for job kind '{kind}'.")
+
+    now = timezone.now().isoformat()
+    job = {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'payload': payload,
+        'owner_id': owner_id,
+        'status': STATUS_QUEUED,
+        'attempts': 0,
+        'max_attempts': settings.JOB_MAX_ATTEMPTS,
+        'result': None,
+        'progress': None,
+        'error': None,
+        'created_at': now,
+        'updated_at': now,
+    }
+    _save(job)
+    get_redis_connection("default").rpush(QUEUE_KEY, job['id'])
+    return job
+
+
+def get_job(job_id):
+    """
+    Returns the job document, or None if it does not exist or has expired.
+    """
+    raw = get_redis_connection("default").get(JOB_KEY.format(job_id=job_id))
+    return json.loads(raw) if raw else None
+
+
+def run_job(job_id):
+    """
+    Runs a single job and records its outcome, scheduling a retry on failure.
+    """
+    job = get_job(job_id)
+    if job is None or job['status'] not in (STATUS_QUEUED, STATUS_RETRYING):
+        # Expired while waiting in the queue, or already handled
+        return None
+
+    job['status'] = STATUS_RUNNING
+    job['attempts'] += 1
+    _save(job)
+
+    _running.job = job
+    try:
+        job['result'] = _handlers[job['kind']](job['payload'])
+        job['status'] = STATUS_SUCCEEDED
+        job['error'] = None
+    except Exception as e:
+        job['error'] = str(e)
+        if isinstance(e, PermanentJobError) or job['attempts'] >= job['max_attempts']:
+            job['status'] = STATUS_FAILED
+        else:
+            job['status'] = STATUS_RETRYING
+            delay = min(
+                settings.JOB_RETRY_BACKOFF * 2 ** (job['attempts'] - 1),
+                settings.JOB_RETRY_BACKOFF_MAX,
+            )
+            get_redis_connection("default").zadd(DELAYED_KEY, {job['id']: time.time() + delay})
+        print(f"JOB_ERROR: {job['kind']} job {job['id']} attempt {job['attempts']} failed. Error: {e}")
+    finally:
+        _running.job = None
+
+    _save(job)
+    return job
+
+
+def report_progress(progress):
+    """
+    Called by a handler to publish how far along its job is; shown by the
+    job status endpoint. Does nothing outside a job.
+    """
+    job = getattr(_running, 'job', None)
+    if job is not None:
+        job['progress'] = progress
+        _save(job)
+
+
+def promote_due_jobs():
+    """
+    Moves retries whose backoff has elapsed from the delayed set back onto the queue.
+    """
+    redis = get_redis_connection("default")
+    for job_id in redis.zrangebyscore(DELAYED_KEY, 0, time.time()):
+        # ZREM succeeds for exactly one worker, so a job is never queued twice
+        if redis.zrem(DELAYED_KEY, job_id):
+            redis.rpush(QUEUE_KEY, job_id)
+
+
+def requeue_abandoned_jobs():
+    """
+    Puts the jobs of workers whose heartbeat has expired back on the queue.
+    """
+    redis = get_redis_connection("default")
+    for worker_id in redis.smembers(WORKERS_KEY):
+        worker_id = worker_id.decode()
+        if redis.exists(HEARTBEAT_KEY.format(worker_id=worker_id)):
+            continue
+        # SREM succeeds for exactly one worker, so the jobs are requeued once
+        if not redis.srem(WORKERS_KEY, worker_id):
+            continue
+        processing = PROCESSING_KEY.format(worker_id=worker_id)
+        while (job_id := redis.lpop(processing)) is not None:
+            _requeue_abandoned(redis, job_id.decode())
+
+
+def _requeue_abandoned(redis, job_id):
+    job = get_job(job_id)
+    if job is None or job['status'] in (STATUS_SUCCEEDED, STATUS_FAILED):
+        return
+    if job['status'] == STATUS_RUNNING:
+        # Killed mid-run: that run counts as a failed attempt
+        job['error'] = "The worker stopped while running the job."
+        job['status'] = STATUS_FAILED if job['attempts'] >= job['max_attempts'] else STATUS_RETRYING
+        print(f"JOB_ERROR: {job['kind']} job {job['id']} attempt {job['attempts']} was abandoned by its worker")
+        _save(job)
+    if job['status'] != STATUS_FAILED:
+        redis.rpush(QUEUE_KEY, job_id)
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Keeps a worker's heartbeat key alive, including while a long job runs.
+    """
+    def __init__(self, worker_id):
+        super().__init__(daemon=True)
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+
+    def beat(self):
+        redis = get_redis_connection("default")
+        redis.set(HEARTBEAT_KEY.format(worker_id=self.worker_id), 1, ex=settings.JOB_LEASE_TIMEOUT)
+        # Back in the set if another worker wrongly took this one for dead
+        redis.sadd(WORKERS_KEY, self.worker_id)
+
+    def run(self):
+        while not self.stopped.wait(settings.JOB_LEASE_TIMEOUT / 3):
+            try:
+                self.beat()
+            except Exception as e:
+                print(f"JOB_ERROR: heartbeat of worker {self.worker_id} failed. Error: {e}")
+
+
+def work(should_stop=lambda: False, poll_timeout=1):
+    """
+    Worker loop: runs queued jobs one at a time until `should_stop()` returns True.
+    """
+    redis = get_redis_connection("default")
+    worker_id = uuid.uuid4().hex
+    processing = PROCESSING_KEY.format(worker_id=worker_id)
+    heartbeat = _Heartbeat(worker_id)
+    heartbeat.beat()
+    heartbeat.start()
+    try:
+        while not should_stop():
+            promote_due_jobs()
+            requeue_abandoned_jobs()
+            job_id = redis.blmove(QUEUE_KEY, processing, poll_timeout, 'LEFT', 'RIGHT')
+            if job_id is not None:
+                run_job(job_id.decode())
+                redis.lrem(processing, 1, job_id)
+    finally:
+        heartbeat.stopped.set()
+        redis.srem(WORKERS_KEY, worker_id)
+        redis.delete(HEARTBEAT_KEY.format(worker_id=worker_id), processing)
+
+
+def _save(job):
+    job['updated_at'] = timezone.now().isoformat()
+    get_redis_connection("default").set(
+        JOB_KEY.format(job_id=job['id']), json.dumps(job), ex=settings.JOB_TTL
+    )
@@ -0,0 +1,66 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from core.fields import compress_text, decompress_text
+from job_tracker.models import JobApplication
+from resume.models import Resume
+
+COLUMNS = [
+    (Resume, ['content']),
+    (JobApplication, ['original_job_description', 'notes']),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures compressed text columns on the current data: stored bytes against '
+        'plain text, table size, and the time spent loading and decompressing rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per table to time.')
+
+    def handle(self, *args, **options):
+        for model, fields in COLUMNS:
+            table = model._meta.db_table
+            size = f" ({self.table_size(table) / 1024:.0f} KB on disk)" if connection.vendor == 'postgresql' else ''
+            self.stdout.write(table + size)
+            for field in fields:
+                self.report(model, field, options['rows'])
+
+    def report(self, model, field, limit):
+        values = list(
+            model.objects.exclude(**{f'{field}__isnull': True}).order_by('pk').values_list(field, flat=True)[:limit]
+        )
+        if not values:
+            self.stdout.write(f"  {field}: no rows")
+            return
+        text_bytes = sum(len(value.encode()) for value in values)
+        stored_bytes = sum(len(compress_text(value)) for value in values)
+
+        load = self.time(lambda: list(model.objects.order_by('pk').only('pk', field)[:limit]))
+        load_deferred = self.time(lambda: list(model.objects.order_by('pk').only('pk')[:limit]))
+        compressed = [compress_text(value) for value in values]
+        decompress = self.time(lambda: [decompress_text(value) for value in compressed])
+        self.stdout.write(
+            f"  {field}: {len(values)} rows, {text_bytes / 1024:.1f} KB as text, "
+            f"{stored_bytes / 1024:.1f} KB stored ({stored_bytes / text_bytes:.0%})"
+        )
+        self.stdout.write(
+            f"    load with column {load:.1f} ms (of which decompression {decompress:.1f} ms), "
+            f"deferred {load_deferred:.1f} ms"
+        )
+
+    def time(self, func, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def table_size(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            return cursor.fetchone()[0]
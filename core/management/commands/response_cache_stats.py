@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django_redis import get_redis_connection
+from core import response_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows hit ratio and estimated time saved by the per-user response cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after printing them.')
+
+    def handle(self, *args, **options):
+        data = response_cache.stats()
+        if not data:
+            self.stdout.write('No cached reads recorded yet.')
+        for namespace, stats in data.items():
+            ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else 'n/a'
+            self.stdout.write(
+                f"{namespace}: {stats['hits']} hits, {stats['misses']} misses ({ratio} hit ratio), "
+                f"avg miss {stats['avg_miss_ms']} ms, ~{stats['estimated_saved_ms'] / 1000:.1f} s saved"
+            )
+        if options['reset']:
+            get_redis_connection("default").delete(response_cache.STATS_KEY)
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,50 @@
+import multiprocessing
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from core import jobs
+
+
+def _worker_main():
+    """
+    Entry point of a single worker process.
+    """
+    stopping = multiprocessing.Event()
+    # Finish the current job before exiting on SIGTERM/SIGINT
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+    signal.signal(signal.SIGINT, lambda *args: stopping.set())
+    jobs.work(should_stop=stopping.is_set)
+
+
+class Command(BaseCommand):
+    help = 'Starts a pool of worker processes that run queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOB_WORKERS,
+            help='Number of worker processes, i.e. how many jobs may run at the same time.'
+        )
+
+    def handle(self, *args, **options):
+        # Never share the parent's database connections with forked children
+        connections.close_all()
+
+        processes = [
+            multiprocessing.Process(target=_worker_main, name=f'job-worker-{i}')
+            for i in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {len(processes)} job workers"))
+
+        def shutdown(*args):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS('All job workers stopped'))
@@ -0,0 +1,73 @@
+from django.db import migrations
+from . import search
+
+
+class AlterFieldToCompressedText(migrations.AlterField):
+    """
+    `AlterField` to a `CompressedTextField`. On PostgreSQL the text column is
+    converted with `convert_to(..., 'UTF8')`: the default `::bytea` cast would
+    treat backslashes in the text as escape sequences. Existing values stay
+    readable uncompressed until `compress_existing_rows` rewrites them.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        quote = schema_editor.quote_name
+        column = quote(model._meta.get_field(self.name).column)
+        schema_editor.execute(
+            f"ALTER TABLE {quote(model._meta.db_table)} ALTER COLUMN {column} "
+            f"TYPE bytea USING convert_to({column}, 'UTF8')"
+        )
+
+
+def compress_existing_rows(app_label, model_name, fields, batch_size=500):
+    """
+    Returns a RunPython function that rewrites `fields` of every row, in
+    batches, so values stored before the conversion get compressed.
+    """
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        batch = []
+        for row in model.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+    return forwards
+
+
+class AddPostgreSQLIndex(migrations.AddIndex):
+    """
+    `AddIndex` for index types only PostgreSQL has (e.g. GIN); a no-op on
+    other databases.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fill_search_vectors(app_label, model_name, search_fields, batch_size=500):
+    """
+    Returns a RunPython function that builds `search_vector` for every row,
+    in batches. `search_fields` is the model's `SEARCH_FIELDS` at the time.
+    """
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        names = [name for name, _ in search_fields]
+        batch = []
+        for row in model.objects.only('pk', *names).iterator(chunk_size=batch_size):
+            row.search_vector = search.vector([(getattr(row, name), weight) for name, weight in search_fields])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ['search_vector'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['search_vector'])
+    return forwards
@@ -0,0 +1,59 @@
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsetMixin:
+    """
+    Lets GET requests choose which fields are returned.
+
+    - `?fields=id,title` returns only the named fields.
+    - `?include=content` adds fields that list responses leave out by default
+      (`list_exclude`), e.g. large text bodies.
+
+    Heavy columns (`deferrable_fields`) that are not returned are deferred, so
+    they are never read from the database. Requires a serializer based on
+    `core.serializers.DynamicFieldsModelSerializer`.
+    """
+    list_exclude = ()
+    deferrable_fields = ()
+
+    def get_selected_fields(self):
+        """
+        Returns the names of the fields to serialize, or None for all of them.
+        """
+        if self.request is None or self.request.method != 'GET':
+            # Writes always validate and return the full representation
+            return None
+        if not hasattr(self, '_selected_fields'):
+            self._selected_fields = self._parse_selected_fields()
+        return self._selected_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_selected_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_selected_fields()
+        if fields is None:
+            return queryset
+        deferred = [name for name in self.deferrable_fields if name not in fields]
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def _parse_selected_fields(self):
+        available = list(self.get_serializer_class()().fields)
+
+        def parse(param):
+            names = [name.strip() for name in self.request.query_params.get(param, '').split(',') if name.strip()]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError({param: f"Unknown field(s): {', '.join(unknown)}."})
+            return names
+
+        requested, included = parse('fields'), parse('include')
+        if requested:
+            return set(requested) | set(included)
+        if self.action == 'list':
+            return (set(available) - set(self.list_exclude)) | set(included)
+        return None
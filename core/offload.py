@@ -0,0 +1,57 @@
+"""
+Runs CPU-bound work (password hashing) without stalling the gevent hub.
+
+Under gevent workers every request in a process shares one OS thread, so a
+second of PBKDF2 on one greenlet delays every other request in that worker.
+`run()` hands such work to a small native thread pool instead: the calling
+greenlet waits, the others keep running, and since hashlib releases the GIL
+while hashing, the hashes themselves run in parallel with the hub.
+
+Outside gevent (tests, runserver, the ASGI mode where sync code already runs
+in threads) the work runs in the calling thread. In both cases at most
+`CPU_OFFLOAD_THREADS` calls run at once per process.
+"""
+import threading
+from django.conf import settings
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+
+def run(func, *args, **kwargs):
+    """
+    Calls `func(*args, **kwargs)` off the gevent hub and returns its result.
+    """
+    if _under_gevent():
+        return gevent_pool().apply(func, args, kwargs)
+    with _thread_slots():
+        return func(*args, **kwargs)
+
+
+def gevent_pool():
+    """
+    The process-wide pool of native threads used under gevent.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            from gevent.threadpool import ThreadPool
+            _pool = ThreadPool(settings.CPU_OFFLOAD_THREADS)
+        return _pool
+
+
+def _thread_slots():
+    global _slots
+    with _lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.CPU_OFFLOAD_THREADS)
+        return _slots
+
+
+def _under_gevent():
+    try:
+        from gevent.monkey import is_module_patched
+    except ImportError:
+        return False
+    return is_module_patched('threading')
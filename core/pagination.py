@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Cursor pagination for per-user lists. DRF's cursor holds the value of the
+    first `ordering` field on the last row sent, so each page is read with an
+    indexed `WHERE field < position ORDER BY ... LIMIT n` rather than a growing
+    OFFSET. Only that first field is in the predicate: rows sharing the
+    position value are skipped with a small offset stored in the cursor.
+    Subclasses set `ordering`, ending with a unique field so the order of
+    such ties is stable between requests.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
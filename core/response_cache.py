@@ -0,0 +1,167 @@
+"""
+Per-user read-through cache for rendered API responses.
+
+Each user has a generation token per namespace (e.g. "resumes"); cached
+responses are stored under the current token, so changing any of a user's
+rows only has to replace the token (`invalidate`) for all their cached lists
+and details to be ignored. Entries hold the rendered JSON bytes and ETag, so a
+hit skips the ORM, the serializer and the renderer.
+
+Tokens are random rather than counters: if Redis evicts one, the next request
+simply starts a new generation instead of reviving stale entries. They are
+also mixed into the lists' ETags (see conditional.py), since some changes
+(a deleted resume unlinked from applications, a renamed user) don't touch
+the `updated_at` of the rows shown, so tokens are kept even with the cache
+disabled.
+"""
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.http import HttpResponse
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from .conditional import not_modified, set_validators
+
+GENERATION_KEY = "rcache:gen:{namespace}:{user_id}"
+ENTRY_KEY = "rcache:entry:{namespace}:{user_id}:{generation}:{path_hash}"
+STATS_KEY = "rcache:stats"  # hash: <namespace>:hits / :misses / :miss_ms
+
+HIT = 'HIT'
+MISS = 'MISS'
+# Shortest lifetime of a token; ETags change when one expires
+GENERATION_MIN_TTL = 60 * 60 * 24
+
+
+def _generation_ttl():
+    return max(settings.RESPONSE_CACHE_TTL, GENERATION_MIN_TTL)
+
+
+def invalidate(namespace, user_id):
+    """
+    Drops every cached response of a user in a namespace, and changes their ETags.
+    """
+    try:
+        get_redis_connection("default").set(
+            GENERATION_KEY.format(namespace=namespace, user_id=user_id), uuid.uuid4().hex, ex=_generation_ttl(),
+        )
+    except RedisError as e:
+        print(f"RESPONSE_CACHE_ERROR: could not invalidate {namespace} for user {user_id}: {e}")
+
+
+def stats():
+    """
+    Returns hits, misses, hit ratio and estimated database/serializer time saved per namespace.
+    """
+    counters = {key.decode(): int(value) for key, value in get_redis_connection("default").hgetall(STATS_KEY).items()}
+    namespaces = {field.split(':')[0] for field in counters}
+    data = {}
+    for namespace in sorted(namespaces):
+        hits, misses = counters.get(f"{namespace}:hits", 0), counters.get(f"{namespace}:misses", 0)
+        avg_miss_ms = counters.get(f"{namespace}:miss_ms", 0) / misses if misses else 0
+        data[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+            'avg_miss_ms': round(avg_miss_ms, 1),
+            # Each hit saves roughly what an average miss costs
+            'estimated_saved_ms': round(hits * avg_miss_ms),
+        }
+    return data
+
+
+def _generation(redis, namespace, user_id):
+    key = GENERATION_KEY.format(namespace=namespace, user_id=user_id)
+    token = redis.get(key)
+    if token is None:
+        # Start a generation; entries live no longer than it does
+        token = uuid.uuid4().hex.encode()
+        if not redis.set(key, token, nx=True, ex=_generation_ttl()):
+            token = redis.get(key) or token
+    return token.decode()
+
+
+def generation(namespace, user_id):
+    """
+    The user's current token in a namespace, or None if Redis can't be reached.
+    """
+    try:
+        return _generation(get_redis_connection("default"), namespace, user_id)
+    except RedisError:
+        return None
+
+
+def _count(namespace, field, amount=1):
+    try:
+        get_redis_connection("default").hincrby(STATS_KEY, f"{namespace}:{field}", amount)
+    except RedisError:
+        pass
+
+
+class CachedReadMixin:
+    """
+    Serves a viewset's `list` and `retrieve` JSON responses from the per-user
+    cache. Set `cache_namespace`, and call `invalidate()` (usually from signals)
+    whenever data shown by the viewset changes.
+    Must come before `ConditionalGetMixin`, so hits skip its aggregate query too;
+    the generation token is also its `data_version()`.
+    """
+    cache_namespace = None
+
+    def data_version(self):
+        return generation(self.cache_namespace, self.request.user.pk)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(request, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
+
+    def cached(self, request, respond):
+        if settings.RESPONSE_CACHE_TTL <= 0 or request.accepted_renderer.format != 'json':
+            return respond()
+
+        try:
+            redis = get_redis_connection("default")
+            key = ENTRY_KEY.format(
+                namespace=self.cache_namespace, user_id=request.user.pk,
+                generation=_generation(redis, self.cache_namespace, request.user.pk),
+                path_hash=hashlib.md5(request.get_full_path().encode()).hexdigest(),
+            )
+            entry = redis.get(key)
+        except RedisError:
+            return respond()
+
+        if entry is not None:
+            _count(self.cache_namespace, 'hits')
+            etag, content = entry.split(b'\n', 1)
+            etag = etag.decode()
+            response = not_modified(request, etag) or HttpResponse(content, content_type='application/json')
+            response['X-Cache-Status'] = HIT
+            return set_validators(response, etag)
+
+        started = time.monotonic()
+        response = respond()
+        # Rendered and stored in finalize_response, once the renderer is known
+        self._response_cache_miss = (key, started)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        miss = getattr(self, '_response_cache_miss', None)
+        if miss is None:
+            return response
+
+        key, started = miss
+        response['X-Cache-Status'] = MISS
+        if response.status_code == 200 and response.has_header('ETag'):
+            response.render()
+            try:
+                get_redis_connection("default").set(
+                    key, response['ETag'].encode() + b'\n' + response.content, ex=settings.RESPONSE_CACHE_TTL,
+                )
+            except RedisError:
+                pass
+            _count(self.cache_namespace, 'misses')
+            _count(self.cache_namespace, 'miss_ms', round((time.monotonic() - started) * 1000))
+        return response
@@ -0,0 +1,175 @@
+"""
+Full-text search over a user's resumes and job applications (`?q=`).
+
+Searchable models list their text fields and weights in `SEARCH_FIELDS` and
+keep a `search_vector` column built from them whenever they are saved. The
+text columns are compressed (see fields.py), so the database can't read them
+and a trigger couldn't maintain the vector: it is computed from the Python
+values and written by the same INSERT/UPDATE instead.
+
+On PostgreSQL the column is a `tsvector` with a GIN index; queries accept
+web search syntax (`"exact phrase"`, `or`, `-word`), are ranked with
+`ts_rank` and highlighted with `ts_headline`. Elsewhere (SQLite in tests)
+the column holds the lowercased text, every word of the query must appear in
+it, and rows are ranked by how often the words occur.
+"""
+import html
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.contrib.postgres.search import SearchVectorField as PostgresSearchVectorField
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Length, Replace
+from rest_framework.response import Response
+
+# Wrap matches until the snippet is escaped, then become <mark> tags
+START, STOP = '\ue000', '\ue001'
+SNIPPET_LENGTH = 160
+
+
+class SearchVectorField(PostgresSearchVectorField):
+    """
+    `tsvector` on PostgreSQL, plain text elsewhere.
+    """
+    def db_type(self, connection):
+        return super().db_type(connection) if connection.vendor == 'postgresql' else 'text'
+
+
+def vector(weighted_values):
+    """
+    The value to store in `search_vector` for `[(text, weight), ...]`, with
+    weights from 'A' (most important) to 'D'.
+    """
+    values = [(value, weight) for value, weight in weighted_values if value]
+    if not values:
+        return None
+    if connection.vendor != 'postgresql':
+        return ' '.join(value for value, _ in values).lower()
+    expression = None
+    for value, weight in values:
+        part = SearchVector(Value(value), weight=weight, config=settings.SEARCH_CONFIG)
+        expression = part if expression is None else expression + part
+    return expression
+
+
+def set_vector(instance, update_fields=None):
+    """
+    Sets `instance.search_vector` before a save, unless `update_fields` leaves
+    out all of its `SEARCH_FIELDS`. Returns `update_fields` with the vector added.
+    """
+    names = {name for name, _ in instance.SEARCH_FIELDS}
+    if update_fields is not None and not names & set(update_fields):
+        return update_fields
+    # Deferred text fields are loaded here: the vector needs all of them
+    instance.search_vector = vector([(getattr(instance, name), weight) for name, weight in instance.SEARCH_FIELDS])
+    return None if update_fields is None else {*update_fields, 'search_vector'}
+
+
+def words(q):
+    """
+    The words of a query, for the fallback matching and highlighting.
+    """
+    return [word for word in re.findall(r'-?\w+', q.lower()) if not word.startswith('-') and word != 'or']
+
+
+def search(queryset, q):
+    """
+    Filters `queryset` to the rows matching `q`, annotated with `rank`, best first.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(q, search_type='websearch', config=settings.SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+        ).order_by('-rank', '-pk')
+
+    terms = words(q)
+    if not terms:
+        return queryset.none()
+    rank = Value(0)
+    for term in terms:
+        queryset = queryset.filter(search_vector__contains=term)
+        # Occurrences of the term
+        rank += (Length('search_vector') - Length(Replace('search_vector', Value(term), Value('')))) / len(term)
+    return queryset.annotate(rank=rank).order_by('-rank', '-pk')
+
+
+def highlight(texts, q):
+    """
+    Returns, for each text, an HTML snippet around its matches of `q` with
+    the matches in <mark>, or None if it has none. One query on PostgreSQL.
+    """
+    texts = [(text or '').replace(START, '').replace(STOP, '') for text in texts]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT ts_headline(%s::regconfig, doc, websearch_to_tsquery(%s::regconfig, %s), %s) "
+                "FROM unnest(%s::text[]) WITH ORDINALITY AS texts(doc, n) ORDER BY n",
+                [
+                    settings.SEARCH_CONFIG, settings.SEARCH_CONFIG, q,
+                    f'StartSel={START}, StopSel={STOP}, MaxFragments=2, MaxWords=25, MinWords=10',
+                    texts,
+                ],
+            )
+            snippets = [row[0] for row in cursor.fetchall()]
+    else:
+        snippets = [_snippet(text, words(q)) for text in texts]
+    return [
+        html.escape(snippet).replace(START, '<mark>').replace(STOP, '</mark>')
+        if snippet and START in snippet else None
+        for snippet in snippets
+    ]
+
+
+def _snippet(text, terms):
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    if not positions:
+        return None
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4)
+    snippet = text[start:start + SNIPPET_LENGTH]
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    snippet = pattern.sub(lambda match: START + match.group() + STOP, snippet)
+    return ('…' if start else '') + snippet + ('…' if start + SNIPPET_LENGTH < len(text) else '')
+
+
+class SearchMixin:
+    """
+    `?q=` on a viewset's `list`: instead of a page, returns the
+    `SEARCH_MAX_RESULTS` best matches, each with its `rank` and the
+    `highlights` of those `highlight_fields` that contain a match.
+    Must come after `ConditionalGetMixin`, so the ETag covers the matches.
+    """
+    highlight_fields = ()
+
+    def search_query(self):
+        if self.action != 'list':
+            return ''
+        return self.request.query_params.get('q', '').strip()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        q = self.search_query()
+        return search(queryset, q) if q else queryset
+
+    def list(self, request, *args, **kwargs):
+        q = self.search_query()
+        if not q:
+            return super().list(request, *args, **kwargs)
+
+        rows = list(self.filter_queryset(self.get_queryset())[:settings.SEARCH_MAX_RESULTS])
+        # Long text fields are deferred in lists; read them only for the matches
+        texts = {
+            values[0]: values[1:]
+            for values in self.get_queryset().filter(pk__in=[row.pk for row in rows]).values_list(
+                'pk', *self.highlight_fields,
+            )
+        }
+        snippets = iter(highlight([text for row in rows for text in texts[row.pk]], q))
+        results = self.get_serializer(rows, many=True).data
+        for row, result in zip(rows, results):
+            result['rank'] = round(row.rank, 4)
+            result['highlights'] = {
+                name: snippet for name, snippet in zip(self.highlight_fields, snippets) if snippet
+            }
+        return Response({'count': len(results), 'results': results})
@@ -0,0 +1,69 @@
+"""
+Streaming responses that stream under both server modes.
+
+Under ASGI, Django reads a sync `StreamingHttpResponse` iterator with
+`sync_to_async(list)`: the whole response is built before the first byte is
+sent, which defeats Server-Sent Events and flat-memory exports. With
+`SERVER_MODE=asgi` the iterator is run in a thread of its own instead and
+its items are handed to the event loop as they come, at most
+`STREAM_BUFFER` ahead of the client. The thread keeps one database
+connection for the whole iteration (server-side cursors need that) and
+closes it at the end.
+"""
+import asyncio
+import threading
+from django.conf import settings
+from django.db import connections
+
+STREAM_BUFFER = 8
+_END = object()
+
+
+def streaming_content(iterator):
+    """
+    `iterator` as the content of a `StreamingHttpResponse` for the server mode.
+    """
+    return in_thread(iterator) if settings.SERVER_MODE == 'asgi' else iterator
+
+
+async def in_thread(iterator):
+    """
+    Yields the items of the sync `iterator`, iterated in a thread of its own.
+    Stopping early (e.g. the client went away) closes the iterator.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    slots = threading.Semaphore(STREAM_BUFFER)
+    stopped = threading.Event()
+
+    def produce():
+        end = (_END, None)
+        try:
+            for item in iterator:
+                slots.acquire()
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            end = (_END, e)
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+            connections.close_all()
+        if not stopped.is_set():
+            loop.call_soon_threadsafe(queue.put_nowait, end)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            slots.release()
+            yield item
+    finally:
+        # Wakes the thread if it waits for a slot
+        stopped.set()
+        slots.release()
@@ -0,0 +1,319 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+from . import jobs
+from .cached_response import COALESCED, HIT, MISS, STALE, CachedResponse
+from .fields import RAW, ZLIB, compress_text, decompress_text
+from .streaming import streaming_content
+
+_calls = []
+
+
+@jobs.register('tests.flaky')
+def flaky_job(payload):
+    _calls.append(payload)
+    if len(_calls) < payload['succeed_on']:
+        raise RuntimeError("temporary failure")
+    return {'calls': len(_calls)}
+
+
+@jobs.register('tests.broken')
+def broken_job(payload):
+    raise jobs.PermanentJobError("cannot succeed")
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        _calls.clear()
+        self.redis = get_redis_connection("default")
+
+    def enqueue(self, kind, payload):
+        job = jobs.enqueue(kind, payload)
+        self.addCleanup(self.redis.lrem, jobs.QUEUE_KEY, 0, job['id'])
+        self.addCleanup(self.redis.zrem, jobs.DELAYED_KEY, job['id'])
+        return job
+
+    def test_successful_job_stores_result(self):
+        job = self.enqueue('tests.flaky', {'succeed_on': 1})
+
+        jobs.run_job(job['id'])
+
+        stored = jobs.get_job(job['id'])
+        self.assertEqual(stored['status'], jobs.STATUS_SUCCEEDED)
+        self.assertEqual(stored['result'], {'calls': 1})
+
+    @override_settings(JOB_MAX_ATTEMPTS=3, JOB_RETRY_BACKOFF=10)
+    def test_failed_job_is_retried_with_backoff(self):
+        job = self.enqueue('tests.flaky', {'succeed_on': 2})
+
+        jobs.run_job(job['id'])
+
+        self.assertEqual(jobs.get_job(job['id'])['status'], jobs.STATUS_RETRYING)
+        due = self.redis.zscore(jobs.DELAYED_KEY, job['id'])
+        self.assertAlmostEqual(due, time.time() + 10, delta=5)
+
+        # Not due yet, so it stays parked
+        jobs.promote_due_jobs()
+        self.assertIsNotNone(self.redis.zscore(jobs.DELAYED_KEY, job['id']))
+
+        self.redis.zadd(jobs.DELAYED_KEY, {job['id']: time.time()})
+        jobs.promote_due_jobs()
+        self.assertIsNone(self.redis.zscore(jobs.DELAYED_KEY, job['id']))
+
+        jobs.run_job(job['id'])
+        stored = jobs.get_job(job['id'])
+        self.assertEqual(stored['status'], jobs.STATUS_SUCCEEDED)
+        self.assertEqual(stored['attempts'], 2)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BACKOFF=0)
+    def test_job_fails_after_max_attempts(self):
+        job = self.enqueue('tests.flaky', {'succeed_on': 5})
+
+        jobs.run_job(job['id'])
+        jobs.run_job(job['id'])
+
+        self.assertEqual(jobs.get_job(job['id'])['status'], jobs.STATUS_FAILED)
+
+    def test_permanent_errors_are_not_retried(self):
+        job = self.enqueue('tests.broken', {})
+
+        jobs.run_job(job['id'])
+
+        stored = jobs.get_job(job['id'])
+        self.assertEqual(stored['status'], jobs.STATUS_FAILED)
+        self.assertEqual(stored['error'], "cannot succeed")
+        self.assertIsNone(self.redis.zscore(jobs.DELAYED_KEY, job['id']))
+
+    def claim(self, job, worker_id):
+        # What a worker does before it is killed: claim the job, start running it
+        processing = jobs.PROCESSING_KEY.format(worker_id=worker_id)
+        self.addCleanup(self.redis.delete, processing)
+        self.redis.sadd(jobs.WORKERS_KEY, worker_id)
+        self.redis.lrem(jobs.QUEUE_KEY, 0, job['id'])
+        self.redis.rpush(processing, job['id'])
+        stored = jobs.get_job(job['id'])
+        stored.update(status=jobs.STATUS_RUNNING, attempts=stored['attempts'] + 1)
+        jobs._save(stored)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_jobs_of_a_dead_worker_are_requeued_then_failed(self):
+        job = self.enqueue('tests.flaky', {'succeed_on': 1})
+        alive = self.enqueue('tests.flaky', {'succeed_on': 1})
+        self.claim(alive, 'alive')
+        self.redis.set(jobs.HEARTBEAT_KEY.format(worker_id='alive'), 1, ex=60)
+        self.addCleanup(self.redis.srem, jobs.WORKERS_KEY, 'alive')
+        self.addCleanup(self.redis.delete, jobs.HEARTBEAT_KEY.format(worker_id='alive'))
+
+        self.claim(job, 'dead')
+        jobs.requeue_abandoned_jobs()
+
+        self.assertEqual(jobs.get_job(job['id'])['status'], jobs.STATUS_RETRYING)
+        self.assertIn(job['id'].encode(), self.redis.lrange(jobs.QUEUE_KEY, 0, -1))
+        self.assertFalse(self.redis.sismember(jobs.WORKERS_KEY, 'dead'))
+        # A live worker's jobs are left alone
+        self.assertEqual(jobs.get_job(alive['id'])['status'], jobs.STATUS_RUNNING)
+        self.assertNotIn(alive['id'].encode(), self.redis.lrange(jobs.QUEUE_KEY, 0, -1))
+
+        self.claim(job, 'dead_again')
+        jobs.requeue_abandoned_jobs()
+
+        stored = jobs.get_job(job['id'])
+        self.assertEqual(stored['status'], jobs.STATUS_FAILED)
+        self.assertNotIn(job['id'].encode(), self.redis.lrange(jobs.QUEUE_KEY, 0, -1))
+
+    def test_worker_claims_runs_and_releases_jobs(self):
+        job = self.enqueue('tests.flaky', {'succeed_on': 1})
+        rounds = iter([False, True])
+
+        jobs.work(should_stop=lambda: next(rounds), poll_timeout=0.1)
+
+        self.assertEqual(jobs.get_job(job['id'])['status'], jobs.STATUS_SUCCEEDED)
+        self.assertEqual(self.redis.keys('jobs:processing:*'), [])
+        self.assertEqual(self.redis.keys('jobs:heartbeat:*'), [])
+
+
+class InlineThread:
+    """
+    Runs a background refresh right away, in the test's own thread.
+    """
+    def __init__(self, target, args=(), daemon=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class CachedResponseTest(TestCase):
+    def setUp(self):
+        self.data = [{'name': 'first'}]
+        self.builds = 0
+        self.cached = CachedResponse('tests', self.build, ttl=60)
+        redis = get_redis_connection("default")
+        redis.delete(self.cached.key, self.cached.lock_key)
+        self.addCleanup(redis.delete, self.cached.key, self.cached.lock_key)
+
+    def build(self):
+        self.builds += 1
+        time.sleep(0.1)
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+    def test_concurrent_misses_build_once(self):
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(self.cached.get().cache_status)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(sorted(statuses), [COALESCED] * 4 + [MISS])
+
+    def test_hit_serves_stored_bytes(self):
+        first = self.cached.get()
+        second = self.cached.get()
+
+        self.assertEqual((first.cache_status, second.cache_status), (MISS, HIT))
+        self.assertEqual(second.body, b'[{"name":"first"}]')
+        self.assertEqual(second.etag, first.etag)
+        self.assertEqual(self.builds, 1)
+
+    @override_settings(CACHED_RESPONSE_EMPTY_TTL=5)
+    def test_empty_result_is_cached_briefly(self):
+        self.data = []
+        cached = CachedResponse('tests', self.build, ttl=60, stale_ttl=0)
+
+        cached.get()
+
+        self.assertEqual(cached.get().cache_status, HIT)
+        self.assertLessEqual(get_redis_connection("default").ttl(cached.key), 5)
+
+    @mock.patch('core.cached_response.threading.Thread', InlineThread)
+    def test_invalidated_entry_is_served_stale_then_refreshed(self):
+        self.cached.get()
+        self.data = [{'name': 'second'}]
+
+        self.cached.invalidate()
+        stale = self.cached.get()
+        fresh = self.cached.get()
+
+        self.assertEqual(stale.cache_status, STALE)
+        self.assertIn(b'first', stale.body)
+        self.assertEqual(fresh.cache_status, HIT)
+        self.assertIn(b'second', fresh.body)
+
+    @mock.patch('core.cached_response.threading.Thread', InlineThread)
+    def test_stale_copy_is_kept_while_database_is_down(self):
+        self.cached.get()
+        self.data = DatabaseError("connection refused")
+
+        self.cached.invalidate()
+        entries = [self.cached.get() for _ in range(2)]
+
+        self.assertEqual([entry.cache_status for entry in entries], [STALE, STALE])
+        self.assertIn(b'first', entries[1].body)
+        # Retried once the lock expires, not on every request
+        self.assertEqual(self.builds, 2)
+
+    @mock.patch('core.cached_response.threading.Thread', InlineThread)
+    def test_failed_refresh_releases_the_lock(self):
+        self.cached.get()
+        self.data = KeyError("bug in build")
+
+        self.cached.invalidate()
+        failed = self.cached.get()
+        self.data = [{'name': 'second'}]
+        retried = self.cached.get()
+
+        self.assertEqual((failed.cache_status, retried.cache_status), (STALE, STALE))
+        self.assertEqual(self.builds, 3)
+        self.assertIn(b'second', self.cached.get().body)
+
+
+class CompressedTextTest(TestCase):
+    def test_long_text_is_compressed(self):
+        text = "- Built REST APIs with Django \\ résumé\n" * 50
+        data = compress_text(text)
+        self.assertEqual(data[:1], ZLIB)
+        self.assertLess(len(data), len(text))
+        self.assertEqual(decompress_text(data), text)
+
+    def test_short_text_is_stored_raw(self):
+        data = compress_text("Applied")
+        self.assertEqual(data, RAW + b"Applied")
+        self.assertEqual(decompress_text(memoryview(data)), "Applied")
+
+    def test_values_written_before_conversion_are_read(self):
+        self.assertEqual(decompress_text("plain text"), "plain text")
+        self.assertEqual(decompress_text("résumé".encode()), "résumé")
+
+    def test_model_column_is_stored_compressed(self):
+        from django.contrib.auth.models import User
+        from resume.models import Resume
+        user = User.objects.create_user(username='compressed', password='password')
+        content = "## Experience\n- Shipped things\n" * 100
+        resume = Resume.objects.create(user=user, title="CV", content=content)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content FROM resume_resume WHERE id = %s", [resume.id])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertEqual(stored[:1], ZLIB)
+        self.assertLess(len(stored), len(content))
+        self.assertEqual(Resume.objects.get(id=resume.id).content, content)
+        self.assertEqual(Resume.objects.filter(id=resume.id).values_list('content', flat=True).get(), content)
+
+
+@override_settings(SERVER_MODE='asgi')
+class StreamingContentTest(TestCase):
+    def consume(self, iterator, limit=None, on_item=None):
+        async def consume():
+            stream, items = streaming_content(iterator), []
+            async for item in stream:
+                items.append(item)
+                if on_item:
+                    on_item()
+                if len(items) == limit:
+                    await stream.aclose()
+                    break
+            return items
+        return asyncio.run(consume())
+
+    def test_items_are_sent_as_they_come(self):
+        sent = threading.Event()
+
+        def events():
+            yield 'start'
+            # Buffering the whole iterator would never let 'start' out
+            yield 'streamed' if sent.wait(5) else 'buffered'
+
+        self.assertEqual(self.consume(events(), on_item=sent.set), ['start', 'streamed'])
+
+    def test_stopping_early_closes_the_iterator(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield 'x'
+            finally:
+                closed.set()
+
+        self.assertEqual(self.consume(endless(), limit=2), ['x', 'x'])
+        self.assertTrue(closed.wait(5))
+
+    def test_errors_reach_the_server(self):
+        def failing():
+            yield 'x'
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.consume(failing())
+
+    def test_sync_servers_get_the_iterator_itself(self):
+        iterator = iter(['x'])
+        with override_settings(SERVER_MODE='gevent'):
+            self.assertIs(streaming_content(iterator), iterator)
@@ -0,0 +1,31 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from . import jobs
+
+
+class JobStatusView(APIView):
+    """
+    Returns the status of a background job and, once finished, its result.
+    Jobs started by a logged-in user are only visible to that user; anonymous
+    jobs are only reachable through their unguessable id.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = jobs.get_job(job_id)
+        if job is None or (job['owner_id'] is not None and job['owner_id'] != request.user.id):
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'job_id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'result': job['result'],
+            'progress': job.get('progress'),
+            'error': job['error'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+        })
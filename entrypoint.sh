@@ -19,5 +19,12 @@ echo "Creating example jobs..."
 python manage.py create_example_jobs
 
 # Start the Gunicorn web server
+# SERVER_MODE=asgi runs uvicorn workers (async views and provider clients),
+# anything else the default gevent workers.
+if [ "$SERVER_MODE" = "asgi" ]; then
+    echo "Starting Gunicorn server with Uvicorn workers..."
+    exec gunicorn ResuMate_backend.asgi:application --bind 0.0.0.0:$PORT --worker-class uvicorn_worker.UvicornWorker --workers 3
+fi
+
 echo "Starting Gunicorn server..."
 exec gunicorn ResuMate_backend.wsgi:application --bind 0.0.0.0:$PORT --worker-class gevent --workers 3
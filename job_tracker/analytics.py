@@ -0,0 +1,202 @@
+"""
+Per-user job search statistics, served without reading the applications.
+
+`JobApplicationStat` holds one count per user and status, week of
+`date_applied` and company, over the user's active applications. Every
+write path adjusts those counts in the same transaction as the change:
+saves and deletes through signals.py, and the bulk, import and soft-delete
+queries (which send no signals) by calling `record()` / `remove()` themselves.
+Each change is worked out from the values the row had before the write
+(`JobApplication._loaded_values`, re-read under a row lock by `save()` and
+the bulk update) and its current ones.
+
+`rebuild()` (the `rebuild_job_application_stats` command) recounts from the
+applications and fixes any drift.
+"""
+import datetime
+import operator
+from collections import Counter
+from functools import reduce
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import TruncWeek
+from .models import JobApplication, JobApplicationStat
+
+STATUS, WEEK, COMPANY = JobApplicationStat.STATUS, JobApplicationStat.WEEK, JobApplicationStat.COMPANY
+FIELDS = JobApplication.STAT_FIELDS
+
+
+def week_of(day):
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day)
+    return (day - datetime.timedelta(days=day.weekday())).isoformat()
+
+
+def _keys(values):
+    """
+    The counts an application with these values adds to.
+    """
+    if values is None or values['is_deleted']:
+        return []
+    user_id = values['user_id']
+    keys = [(user_id, STATUS, values['status'])]
+    if values['date_applied']:
+        keys.append((user_id, WEEK, week_of(values['date_applied'])))
+    if values['company_name']:
+        keys.append((user_id, COMPANY, values['company_name']))
+    return keys
+
+
+def _current(instance):
+    return {name: getattr(instance, name) for name in FIELDS}
+
+
+def _previous(instance):
+    """
+    The values the row has in the database, or None if it is new.
+    """
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return None
+    # Fields that were not loaded can't have been changed
+    current = _current(instance)
+    return {name: loaded.get(name, current[name]) for name in FIELDS}
+
+
+def record(instances):
+    """
+    Counts the changes to `instances`, which have just been created or saved.
+    """
+    deltas = Counter()
+    for instance in instances:
+        deltas.subtract(_keys(_previous(instance)))
+        deltas.update(_keys(_current(instance)))
+        # The saved values are what the next save changes
+        instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **_current(instance)}
+    apply(deltas)
+
+
+def remove(rows):
+    """
+    Takes out rows that were deleted or soft-deleted; each row is a dict of
+    `FIELDS` as they were before.
+    """
+    deltas = Counter()
+    for values in rows:
+        deltas.subtract(_keys(values))
+    apply(deltas)
+
+
+def record_deleted(instance):
+    """
+    Takes out an application deleted with `delete()`.
+    """
+    remove([_previous(instance) or _current(instance)])
+
+
+def apply(deltas):
+    """
+    Adds `{(user_id, dimension, key): change}` to the stored counts, in at
+    most two queries.
+    """
+    increments = [(key, change) for key, change in deltas.items() if change > 0]
+    decrements = [(key, change) for key, change in deltas.items() if change < 0]
+    if increments:
+        # Insert missing counts, add to existing ones
+        quote = connection.ops.quote_name
+        table, count = quote(JobApplicationStat._meta.db_table), quote('count')
+        unique = ', '.join(quote(name) for name in ('user_id', 'dimension', 'key'))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({unique}, {count}) VALUES {', '.join(['(%s, %s, %s, %s)'] * len(increments))} "
+                f"ON CONFLICT ({unique}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}",
+                [value for (user_id, dimension, key), change in increments for value in (user_id, dimension, key, change)],
+            )
+    if decrements:
+        # Missing counts are not created: they belong to a user being deleted, or to drift
+        matches = [Q(user_id=user_id, dimension=dimension, key=key) for (user_id, dimension, key), _ in decrements]
+        JobApplicationStat.objects.filter(reduce(operator.or_, matches)).update(count=F('count') + Case(
+            *[When(match, then=Value(change)) for match, (_, change) in zip(matches, decrements)],
+            default=Value(0),
+        ))
+
+
+def summary(user_id):
+    """
+    Counts by status, week and company, and conversion rates, from the stored counts.
+    """
+    counts = {STATUS: {}, WEEK: {}, COMPANY: {}}
+    stats = JobApplicationStat.objects.filter(user_id=user_id, count__gt=0)
+    for dimension, key, count in stats.values_list('dimension', 'key', 'count'):
+        counts[dimension][key] = count
+
+    by_status = {status: counts[STATUS].get(status, 0) for status, _ in JobApplication.STATUS_CHOICES}
+    total = sum(by_status.values())
+    interviewed = by_status['Interviewing'] + by_status['Offer']
+
+    def rate(part, whole):
+        return round(part / whole, 4) if whole else None
+
+    return {
+        'total': total,
+        'by_status': by_status,
+        'by_week': [{'week': week, 'count': count} for week, count in sorted(counts[WEEK].items())],
+        'by_company': [
+            {'company': company, 'count': count}
+            for company, count in sorted(counts[COMPANY].items(), key=lambda item: (-item[1], item[0]))
+        ],
+        # Judged by each application's current status
+        'conversion': {
+            'interview_rate': rate(interviewed, total),
+            'offer_rate': rate(by_status['Offer'], total),
+            'rejection_rate': rate(by_status['Rejected'], total),
+            'offer_rate_after_interview': rate(by_status['Offer'], interviewed),
+        },
+    }
+
+
+def rebuild(user_ids=None, apps=global_apps):
+    """
+    Recounts the stats of `user_ids` (default: every user) from their
+    applications and fixes the stored counts. Returns how many were wrong.
+    `apps` lets migrations use their historical models.
+    """
+    Application = apps.get_model('job_tracker', 'JobApplication')
+    Stat = apps.get_model('job_tracker', 'JobApplicationStat')
+    applications = Application.objects.filter(is_deleted=False)
+    stats = Stat.objects.all()
+    if user_ids is not None:
+        applications = applications.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        # Locked first, so no increment lands between the recount and the fix
+        stored = {(stat.user_id, stat.dimension, stat.key): stat for stat in stats.select_for_update()}
+        expected = Counter()
+        for row in applications.values('user_id', 'status').annotate(count=Count('pk')):
+            expected[(row['user_id'], STATUS, row['status'])] = row['count']
+        weeks = applications.exclude(date_applied=None).annotate(week=TruncWeek('date_applied'))
+        for row in weeks.values('user_id', 'week').annotate(count=Count('pk')):
+            expected[(row['user_id'], WEEK, row['week'].isoformat())] = row['count']
+        companies = applications.exclude(company_name=None).exclude(company_name='')
+        for row in companies.values('user_id', 'company_name').annotate(count=Count('pk')):
+            expected[(row['user_id'], COMPANY, row['company_name'])] = row['count']
+
+        wrong, changed, unused = 0, [], []
+        for key, stat in stored.items():
+            count = expected.pop(key, 0)
+            if stat.count != count:
+                wrong += 1
+                stat.count = count
+                changed.append(stat)
+            if not count:
+                unused.append(stat.pk)
+        created = [
+            Stat(user_id=user_id, dimension=dimension, key=key, count=count)
+            for (user_id, dimension, key), count in expected.items()
+        ]
+        Stat.objects.bulk_update([stat for stat in changed if stat.count], ['count'])
+        Stat.objects.filter(pk__in=unused).delete()
+        Stat.objects.bulk_create(created)
+    return wrong + len(created)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class JobTrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'job_tracker'
+
+    def ready(self):
+        # Invalidate cached API responses when job applications change
+        from . import signals  # noqa: F401
+        # Register the background job handlers
+        from . import tasks  # noqa: F401
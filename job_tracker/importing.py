@@ -0,0 +1,181 @@
+"""
+Streaming import of job applications from CSV or NDJSON uploads.
+
+The upload is decoded and parsed line by line, each row is validated with
+`JobApplicationSerializer`, and valid rows are inserted with `bulk_create` in
+batches of `IMPORT_BATCH_SIZE`, each batch in its own transaction. Invalid rows
+are skipped and reported with their line number.
+
+For background imports the upload is copied into Redis in chunks (web and
+worker containers share Redis, not disks) and read back chunk by chunk by the
+`job_tracker.import` job. After every committed batch the job saves the
+summary so far as a checkpoint, so a retried import skips the rows it has
+already handled instead of inserting them again.
+"""
+import csv
+import itertools
+import json
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from core import jobs, response_cache, search
+from . import analytics
+from .models import JobApplication
+from .serializers import JobApplicationSerializer
+
+FORMATS = ('csv', 'ndjson')
+UPLOAD_KEY = "imports:upload:{upload_id}"
+CHECKPOINT_KEY = "imports:checkpoint:{upload_id}"
+
+
+def detect_format(requested, filename):
+    """
+    Returns the format named by `?as=`, else the one matching the file's extension.
+    """
+    if requested:
+        return requested
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def iter_lines(byte_chunks):
+    """
+    Turns byte chunks into decoded lines, keeping their line endings for csv.
+    Lines are split before decoding (a newline byte is never part of another
+    UTF-8 character), so a decoding error is raised for the line it is on.
+    """
+    pending, encoding = b'', 'utf-8-sig'
+    for chunk in byte_chunks:
+        pending += chunk
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield (line + b'\n').decode(encoding)
+            encoding = 'utf-8'
+    if pending:
+        yield pending.decode(encoding)
+
+
+def read_rows(byte_chunks, input_format):
+    """
+    Yields `(line_number, row)` for every record; `row` is a dict, or a
+    ValueError for a line that could not be parsed. A file that can't be read
+    any further (not UTF-8, broken CSV) ends with an error for that line.
+    """
+    read = 0
+
+    def lines():
+        nonlocal read
+        for line in iter_lines(byte_chunks):
+            read += 1
+            yield line
+
+    try:
+        yield from (csv_rows if input_format == 'csv' else ndjson_rows)(lines())
+    except UnicodeDecodeError:
+        # Raised while reading the next line
+        yield read + 1, ValueError("The file is not valid UTF-8 from this line on; the rest was not read.")
+    except csv.Error as e:
+        yield read, ValueError(f"Invalid CSV ({e}); the rest of the file was not read.")
+
+
+def csv_rows(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # Empty cells mean "not set", e.g. for dates
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def ndjson_rows(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object.")
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        yield line_number, row
+
+
+def import_rows(user, rows, on_progress=None, checkpoint=None):
+    """
+    Validates and inserts rows for `user`. Returns a summary with at most
+    `IMPORT_MAX_ERRORS` row errors. `on_progress(summary)` is called after
+    each committed batch; passing the last summary it got as `checkpoint`
+    skips the rows that summary covers and carries on counting from it.
+    """
+    summary = checkpoint or {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    skip = summary['rows']
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            JobApplication.objects.bulk_create(batch)
+            analytics.record(batch)
+        summary['created'] += len(batch)
+        batch.clear()
+        # bulk_create sends no signals
+        response_cache.invalidate('job_applications', user.id)
+        if on_progress:
+            on_progress(summary)
+
+    for line_number, row in itertools.islice(rows, skip, None):
+        summary['rows'] += 1
+        if isinstance(row, ValueError):
+            errors = {'non_field_errors': [str(row)]}
+        else:
+            serializer = JobApplicationSerializer(data=row)
+            errors = None if serializer.is_valid() else serializer.errors
+        if errors:
+            summary['failed'] += 1
+            if len(summary['errors']) < settings.IMPORT_MAX_ERRORS:
+                summary['errors'].append({'line': line_number, 'errors': errors})
+            continue
+
+        instance = JobApplication(user=user, **serializer.validated_data)
+        search.set_vector(instance)
+        batch.append(instance)
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    return summary
+
+
+def stash_upload(uploaded_file):
+    """
+    Copies an upload into Redis chunk by chunk. Returns its id.
+    """
+    upload_id = uuid.uuid4().hex
+    key = UPLOAD_KEY.format(upload_id=upload_id)
+    redis = get_redis_connection("default")
+    for chunk in uploaded_file.chunks(settings.IMPORT_UPLOAD_CHUNK_SIZE):
+        redis.rpush(key, chunk)
+    redis.expire(key, settings.JOB_TTL)
+    return upload_id
+
+
+def stashed_chunks(upload_id):
+    """
+    Reads a stashed upload back one chunk at a time.
+    """
+    key = UPLOAD_KEY.format(upload_id=upload_id)
+    redis = get_redis_connection("default")
+    index = 0
+    while True:
+        chunk = redis.lindex(key, index)
+        if chunk is None:
+            return
+        yield chunk
+        index += 1
+
+
+def enqueue_import(user, uploaded_file, input_format):
+    return jobs.enqueue('job_tracker.import', {
+        'user_id': user.id,
+        'upload_id': stash_upload(uploaded_file),
+        'format': input_format,
+    }, owner_id=user.id)
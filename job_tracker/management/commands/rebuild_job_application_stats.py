@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from job_tracker import analytics
+
+
+class Command(BaseCommand):
+    help = 'Recounts the job application stats behind /api/job-applications/stats/ and fixes any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='Only this user id (repeatable).')
+
+    def handle(self, *args, **options):
+        wrong = analytics.rebuild(options['user'])
+        if wrong:
+            self.stdout.write(self.style.WARNING(f'Fixed {wrong} count(s) that had drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All counts were correct'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_tracker', '0002_alter_jobapplication_company_name_and_more'),
+        ('resume', '0003_resume_resume_user_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-created_at', '-id'], name='jobapp_user_active_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+import core.fields
+from django.db import migrations
+from core.migration_operations import AlterFieldToCompressedText, compress_existing_rows
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_tracker', '0003_jobapplication_jobapp_user_active_idx'),
+    ]
+
+    operations = [
+        AlterFieldToCompressedText(
+            model_name='jobapplication',
+            name='original_job_description',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+        AlterFieldToCompressedText(
+            model_name='jobapplication',
+            name='notes',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+        # Compressed rows can't be turned back into text by the database
+        migrations.RunPython(
+            compress_existing_rows('job_tracker', 'JobApplication', ['original_job_description', 'notes']),
+        ),
+    ]
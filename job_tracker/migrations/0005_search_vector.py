@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:33
+
+import core.search
+import django.contrib.postgres.indexes
+from django.db import migrations
+from core.migration_operations import AddPostgreSQLIndex, fill_search_vectors
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_tracker', '0004_compress_jobapplication_text'),
+        ('resume', '0007_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='search_vector',
+            field=core.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            fill_search_vectors('job_tracker', 'JobApplication', [
+                ('job_title', 'A'), ('company_name', 'A'), ('notes', 'B'), ('original_job_description', 'C'),
+            ]),
+            migrations.RunPython.noop,
+        ),
+        AddPostgreSQLIndex(
+            model_name='jobapplication',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='jobapp_search_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from django.db.models import Q
+from core import search
+from core.fields import CompressedTextField
 from django.contrib.auth.models import User
 from resume.models import Resume
 
@@ -13,15 +17,86 @@ class JobApplication(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     job_title = models.CharField(max_length=255, null=True, blank=True)
     company_name = models.CharField(max_length=255, null=True, blank=True)
-    original_job_description = models.TextField(null=True, blank=True)
+    original_job_description = CompressedTextField(null=True, blank=True)
     resume_used = models.ForeignKey(Resume, on_delete=models.SET_NULL, null=True, blank=True)
     date_applied = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Applied')
-    notes = models.TextField(blank=True, null=True)
+    notes = CompressedTextField(blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
     is_example = models.BooleanField(default=False)
+    # Kept in sync with SEARCH_FIELDS by save() (see core/search.py)
+    search_vector = search.SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    SEARCH_FIELDS = (
+        ('job_title', 'A'), ('company_name', 'A'), ('notes', 'B'), ('original_job_description', 'C'),
+    )
+    # What the per-user stats count (see analytics.py)
+    STAT_FIELDS = ('user_id', 'status', 'date_applied', 'company_name', 'is_deleted')
+
     def __str__(self):
-        return f"{self.job_title} at {self.company_name}"
\ No newline at end of file
+        return f"{self.job_title} at {self.company_name}"
+
+    def save(self, *args, **kwargs):
+        update_fields = search.set_vector(self, kwargs.get('update_fields'))
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        with transaction.atomic():
+            if not self._state.adding:
+                # The stats count the change from the stored values; read locked, so
+                # concurrent saves of the row each count from what the other left
+                stored = type(self).objects.select_for_update().filter(pk=self.pk).values(*self.STAT_FIELDS).first()
+                if stored is not None:
+                    self._loaded_values = {**getattr(self, '_loaded_values', {}), **stored}
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values, so signal handlers can tell what changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    class Meta:
+        indexes = [
+            # Serves the paginated list of a user's applications; soft-deleted
+            # rows are never listed, so they are left out of the index
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=Q(is_deleted=False),
+                name='jobapp_user_active_idx',
+            ),
+            # Serves ?q= searches; created on PostgreSQL only
+            GinIndex(fields=['search_vector'], name='jobapp_search_idx'),
+        ]
+
+
+class JobApplicationStat(models.Model):
+    """
+    How many of a user's active (not soft-deleted) applications have a given
+    status, were applied for in a given week, or went to a given company.
+    Kept up to date as applications change; see analytics.py.
+    """
+    STATUS = 'status'
+    WEEK = 'week'
+    COMPANY = 'company'
+    DIMENSION_CHOICES = [
+        (STATUS, 'Status'),
+        (WEEK, 'Week applied'),
+        (COMPANY, 'Company'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_application_stats')
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    # The status, the Monday of the week (ISO date) or the company name
+    key = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dimension', 'key'], name='jobapp_stat_unique_key'),
+        ]
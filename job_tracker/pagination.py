@@ -0,0 +1,6 @@
+from core.pagination import StableCursorPagination
+
+
+class JobApplicationCursorPagination(StableCursorPagination):
+    # Matches the partial (user, -created_at, -id) index on active applications
+    ordering = ('-created_at', '-id')
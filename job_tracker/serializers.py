@@ -1,8 +1,8 @@
-from rest_framework import serializers
+from core.serializers import DynamicFieldsModelSerializer
 from .models import JobApplication
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = JobApplication
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('user',)
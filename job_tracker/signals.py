@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import response_cache
+from . import analytics
+from .models import JobApplication
+from .views import examples
+
+
+def invalidate_job_applications(user_id):
+    # After commit, so a concurrent read can't cache the old rows under the new generation
+    transaction.on_commit(lambda: response_cache.invalidate('job_applications', user_id))
+
+
+def invalidate_examples(instance):
+    # Also when a row stops being an example
+    if instance.is_example or getattr(instance, '_loaded_values', {}).get('is_example'):
+        transaction.on_commit(examples.invalidate)
+
+
+@receiver(post_save, sender=JobApplication)
+def job_application_saved(sender, instance, **kwargs):
+    # Also covers soft deletes, which are saves of is_deleted
+    invalidate_job_applications(instance.user_id)
+    invalidate_examples(instance)
+    # Last: it replaces the loaded values the handlers above compare with
+    analytics.record([instance])
+
+
+@receiver(post_delete, sender=JobApplication)
+def job_application_deleted(sender, instance, **kwargs):
+    invalidate_job_applications(instance.user_id)
+    invalidate_examples(instance)
+    analytics.record_deleted(instance)
@@ -0,0 +1,34 @@
+import json
+from django.conf import settings
+from django.contrib.auth.models import User
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from core import jobs
+from . import importing
+
+
+@jobs.register('job_tracker.import')
+def import_job_applications(payload):
+    """
+    Background version of the import endpoint. Progress is reported, and a
+    checkpoint saved, after every batch; a retry resumes from the checkpoint.
+    """
+    user = User.objects.get(pk=payload['user_id'])
+    redis = get_redis_connection("default")
+    checkpoint_key = importing.CHECKPOINT_KEY.format(upload_id=payload['upload_id'])
+    checkpoint = redis.get(checkpoint_key)
+
+    def save_checkpoint(summary):
+        try:
+            redis.set(checkpoint_key, json.dumps(summary), ex=settings.JOB_TTL)
+        except RedisError as e:
+            # The batch is committed: retrying without a checkpoint would insert it twice
+            raise jobs.PermanentJobError(f"Could not save the import checkpoint after {summary['rows']} rows: {e}")
+        jobs.report_progress({key: summary[key] for key in ('rows', 'created', 'failed')})
+
+    rows = importing.read_rows(importing.stashed_chunks(payload['upload_id']), payload['format'])
+    summary = importing.import_rows(
+        user, rows, on_progress=save_checkpoint, checkpoint=json.loads(checkpoint) if checkpoint else None,
+    )
+    redis.delete(importing.UPLOAD_KEY.format(upload_id=payload['upload_id']), checkpoint_key)
+    return summary
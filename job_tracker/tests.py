@@ -1,5 +1,378 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django_redis import get_redis_connection
+from core import jobs
+from resume.models import Resume
+from . import analytics
+from .models import JobApplication, JobApplicationStat
+from .views import examples
 
 class JobTrackerAppTest(TestCase):
     def test_job_tracker_app_is_working(self):
         self.assertTrue(True)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class JobApplicationListTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='applicant', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_paginated_newest_first_without_deleted(self):
+        applications = [
+            JobApplication.objects.create(user=self.user, job_title=f"Job {i}", company_name="Acme") for i in range(3)
+        ]
+        JobApplication.objects.create(user=self.user, job_title="Deleted", company_name="Acme", is_deleted=True)
+
+        first = self.client.get(reverse('jobapplication-list'), {'page_size': 2}).data
+        second = self.client.get(first['next']).data
+
+        self.assertEqual(
+            [item['id'] for item in first['results'] + second['results']],
+            [application.id for application in reversed(applications)],
+        )
+        self.assertIsNone(second['next'])
+
+    def test_long_text_fields_are_only_listed_on_request(self):
+        JobApplication.objects.create(user=self.user, job_title="Job", notes="Call back", original_job_description="Long text")
+
+        default = self.client.get(reverse('jobapplication-list')).data['results'][0]
+        included = self.client.get(reverse('jobapplication-list'), {'include': 'notes'}).data['results'][0]
+
+        self.assertNotIn('notes', default)
+        self.assertNotIn('original_job_description', default)
+        self.assertEqual(included['notes'], "Call back")
+
+
+@override_settings(RESPONSE_CACHE_TTL=0, JOB_APPLICATION_BULK_MAX=3)
+class JobApplicationBulkTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk_applicant', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('jobapplication-bulk')
+
+    def test_bulk_create_saves_all_or_reports_errors_by_position(self):
+        invalid = self.client.post(self.url, [{'job_title': "A"}, {'status': 'Unknown'}], format='json')
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(invalid.data['errors'][0], {})
+        self.assertIn('status', invalid.data['errors'][1])
+        self.assertFalse(JobApplication.objects.exists())
+
+        with self.assertNumQueries(4):  # savepoint, INSERT, stats upsert, release
+            response = self.client.post(self.url, [{'job_title': "A"}, {'job_title': "B"}], format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(item['job_title'] for item in response.data), ["A", "B"])
+        self.assertEqual(self.user.jobapplication_set.count(), 2)
+
+    def test_bulk_update_and_soft_delete(self):
+        first, second = [JobApplication.objects.create(user=self.user, job_title=title) for title in ("A", "B")]
+        other = JobApplication.objects.create(user=User.objects.create_user(username='other'), job_title="C")
+
+        missing = self.client.patch(self.url, [{'id': first.id, 'status': 'Offer'}, {'id': other.id}], format='json')
+        self.assertEqual(missing.data['errors'], [{}, {'id': ["Not found."]}])
+
+        updated = self.client.patch(
+            self.url, [{'id': first.id, 'status': 'Offer'}, {'id': second.id, 'notes': "Call"}], format='json',
+        )
+        self.assertEqual(updated.status_code, 200)
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'Offer')
+        self.assertGreater(first.updated_at, first.created_at)
+
+        deleted = self.client.delete(self.url, {'ids': [first.id, second.id, other.id]}, format='json')
+        self.assertEqual(deleted.data, {'deleted': 2})
+        self.assertFalse(self.user.jobapplication_set.filter(is_deleted=False).exists())
+        self.assertFalse(JobApplication.objects.get(pk=other.pk).is_deleted)
+
+    def test_invalid_ids_are_rejected(self):
+        application = JobApplication.objects.create(user=self.user, job_title="A")
+
+        response = self.client.delete(self.url, {'ids': [application.id, "abc", {'id': 1}]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('id', response.data['errors'][1])
+        self.assertIn('id', response.data['errors'][2])
+        self.assertFalse(JobApplication.objects.get(pk=application.pk).is_deleted)
+        self.assertEqual(self.client.delete(reverse('jobapplication-detail', args=['abc'])).status_code, 404)
+
+    def test_batch_size_is_limited(self):
+        response = self.client.post(self.url, [{'job_title': "A"}] * 4, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_delete_is_one_update(self):
+        application = JobApplication.objects.create(user=self.user, job_title="A")
+
+        with self.assertNumQueries(5):  # savepoint, SELECT for the stats, UPDATE, stats UPDATE, release
+            response = self.client.delete(reverse('jobapplication-detail', args=[application.id]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.delete(reverse('jobapplication-detail', args=[application.id])).status_code, 404)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class JobApplicationSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='job_searcher', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, q):
+        return self.client.get(reverse('jobapplication-list'), {'q': q}).json()['results']
+
+    def test_bulk_and_deleted_rows_are_searched_correctly(self):
+        created = self.client.post(reverse('jobapplication-bulk'), [
+            {'job_title': "Backend Engineer", 'company_name': "Acme", 'notes': "Referral from Kubernetes meetup"},
+            {'job_title': "Data Analyst", 'company_name': "Globex", 'original_job_description': "SQL and Kubernetes"},
+        ], format='json').data
+        # Equal ranks: newest first
+        self.assertEqual([row['id'] for row in self.search('kubernetes')], [created[1]['id'], created[0]['id']])
+        self.assertEqual(
+            self.search('kubernetes')[0]['highlights'],
+            {'original_job_description': "SQL and <mark>Kubernetes</mark>"},
+        )
+
+        self.client.patch(reverse('jobapplication-bulk'), [{'id': created[0]['id'], 'company_name': "Initech"}], format='json')
+        self.assertEqual([row['id'] for row in self.search('initech')], [created[0]['id']])
+        self.assertEqual(self.search('acme'), [])
+
+        self.client.delete(reverse('jobapplication-detail', args=[created[0]['id']]))
+        self.assertEqual([row['id'] for row in self.search('kubernetes')], [created[1]['id']])
+
+
+class JobApplicationResponseCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cached_applicant', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        get_redis_connection("default").delete(f"rcache:gen:job_applications:{self.user.id}")
+
+    def test_soft_delete_and_resume_delete_invalidate_the_list(self):
+        resume = Resume.objects.create(user=self.user, title="CV", content="# CV")
+        with self.captureOnCommitCallbacks(execute=True):
+            application = JobApplication.objects.create(user=self.user, job_title="Job", resume_used=resume)
+        url = reverse('jobapplication-list')
+        self.assertEqual(self.client.get(url).json()['results'][0]['resume_used'], resume.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resume.delete()
+        self.assertIsNone(self.client.get(url).json()['results'][0]['resume_used'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('jobapplication-detail', args=[application.id]))
+        self.assertEqual(self.client.get(url).json()['results'], [])
+
+
+class ExampleJobApplicationCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='examples', password='x')
+        redis = get_redis_connection("default")
+        redis.delete(examples.key, examples.lock_key)
+        self.addCleanup(redis.delete, examples.key, examples.lock_key)
+
+    def test_examples_are_cached_until_an_example_changes(self):
+        url = reverse('examplejobapplication-list')
+        application = JobApplication.objects.create(user=self.user, job_title="Example", is_example=True)
+        self.assertEqual(self.client.get(url)['X-Cache-Status'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache-Status'], 'HIT')
+
+        application = JobApplication.objects.get(pk=application.pk)
+        application.is_example = False
+        with self.captureOnCommitCallbacks(execute=True):
+            application.save()
+
+        with mock.patch('core.cached_response.threading.Thread') as refresh:
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache-Status'], 'STALE')
+        refresh.return_value.start.assert_called_once()
+
+
+@override_settings(EXPORT_BLOCK_SIZE=64)
+class JobApplicationExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        resume = Resume.objects.create(user=self.user, title="Main CV", content="# CV")
+        for i in range(3):
+            JobApplication.objects.create(user=self.user, job_title=f"Job {i}", company_name="Acme, Inc.", resume_used=resume)
+        JobApplication.objects.create(user=self.user, job_title="Deleted", is_deleted=True)
+
+    def test_csv_export_streams_rows_with_resume_title(self):
+        response = self.client.get(reverse('jobapplication-export'), {'resume_title': '1'})
+
+        self.assertTrue(response.streaming)
+        self.assertIn('job_applications.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['job_title'] for row in rows], ["Job 2", "Job 1", "Job 0"])
+        self.assertEqual(rows[0]['company_name'], "Acme, Inc.")
+        self.assertEqual(rows[0]['resume_used_title'], "Main CV")
+
+    def test_gzipped_ndjson_export(self):
+        response = self.client.get(reverse('jobapplication-export'), {'as': 'ndjson', 'gzip': '1'})
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['job_title'], "Job 2")
+
+    def test_unknown_export_format_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('jobapplication-export'), {'as': 'xml'}).status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0, IMPORT_BATCH_SIZE=2, IMPORT_UPLOAD_CHUNK_SIZE=16)
+class JobApplicationImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('jobapplication-import-file')
+
+    def upload(self, name, content, **extra):
+        data = content if isinstance(content, bytes) else content.encode()
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, data)}, format='multipart', **extra)
+
+    def test_csv_rows_are_imported_in_batches_with_row_errors(self):
+        content = (
+            "job_title,company_name,status,date_applied,notes\n"
+            "Engineer,Acme,Applied,2024-05-01,\"Line one\nLine two\"\n"
+            "Designer,Globex,Maybe,,\n"
+            "Analyst,Initech,,,\n"
+            "Manager,Umbrella,Offer,not-a-date,\n"
+            "Tester,Hooli,,,\n"
+        )
+
+        response = self.upload('applications.csv', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (5, 3, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 6])
+        self.assertIn('status', response.data['errors'][0]['errors'])
+        self.assertEqual(self.user.jobapplication_set.get(job_title="Engineer").notes, "Line one\nLine two")
+
+    def test_unreadable_files_end_with_a_row_error(self):
+        not_utf8 = self.upload('applications.csv', "job_title,company_name\nEngineer,Acme\n".encode() + b"Caf\xe9,Bistro\n")
+        too_long = self.upload('applications.csv', f"job_title,company_name\nEngineer,Acme\n\"{'x' * 200000}\",Globex\n")
+
+        for response in (not_utf8, too_long):
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (2, 1, 1))
+            self.assertEqual(response.data['errors'][0]['line'], 3)
+        self.assertIn('UTF-8', not_utf8.data['errors'][0]['errors']['non_field_errors'][0])
+        self.assertIn('Invalid CSV', too_long.data['errors'][0]['errors']['non_field_errors'][0])
+
+    def test_ndjson_import_runs_in_the_background_with_progress(self):
+        lines = [json.dumps({'job_title': f"Job {i}", 'company_name': "Acme"}) for i in range(3)] + ["{not json"]
+
+        response = self.upload('applications.ndjson', "\n".join(lines), HTTP_PREFER='respond-async')
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+        self.addCleanup(get_redis_connection("default").lrem, jobs.QUEUE_KEY, 0, job_id)
+        jobs.run_job(job_id)
+        status = self.client.get(response['Location']).data
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertEqual(status['progress'], {'rows': 4, 'created': 3, 'failed': 1})
+        self.assertEqual((status['result']['created'], status['result']['failed']), (3, 1))
+        self.assertEqual(self.user.jobapplication_set.count(), 3)
+
+    def test_retried_import_resumes_after_the_last_committed_batch(self):
+        lines = [json.dumps({'job_title': f"Job {i}", 'company_name': "Acme"}) for i in range(5)] + ["{not json"]
+        response = self.upload('applications.ndjson', "\n".join(lines), HTTP_PREFER='respond-async')
+        job_id = response.data['job_id']
+        self.addCleanup(get_redis_connection("default").lrem, jobs.QUEUE_KEY, 0, job_id)
+        record = analytics.record
+
+        def fail_second_batch(batch):
+            if batch[0].job_title == "Job 2":
+                raise DatabaseError("connection lost")
+            record(batch)
+
+        with mock.patch.object(analytics, 'record', side_effect=fail_second_batch):
+            jobs.run_job(job_id)
+        self.assertEqual(jobs.get_job(job_id)['status'], jobs.STATUS_RETRYING)
+        self.assertEqual(self.user.jobapplication_set.count(), 2)
+
+        jobs.run_job(job_id)
+        status = self.client.get(response['Location']).data
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertEqual((status['result']['rows'], status['result']['created'], status['result']['failed']), (6, 5, 1))
+        self.assertEqual(sorted(self.user.jobapplication_set.values_list('job_title', flat=True)), [f"Job {i}" for i in range(5)])
+        self.assertEqual(analytics.summary(self.user.id)['total'], 5)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class JobApplicationStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='stats_applicant', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counts_follow_every_write_path(self):
+        first = self.client.post(reverse('jobapplication-list'), {
+            'job_title': "Engineer", 'company_name': "Acme", 'date_applied': "2024-05-01",
+        }).data
+        created = self.client.post(reverse('jobapplication-bulk'), [
+            {'job_title': "Analyst", 'company_name': "Acme", 'date_applied': "2024-05-05", 'status': 'Interviewing'},
+            {'job_title': "Designer", 'company_name': "Globex", 'date_applied': "2024-05-06"},
+        ], format='json').data
+        self.client.post(reverse('jobapplication-import-file'), {
+            'file': SimpleUploadedFile('jobs.csv', b"job_title,company_name,status\nManager,Initech,Offer\n"),
+        }, format='multipart')
+        self.client.patch(reverse('jobapplication-detail', args=[first['id']]), {'status': 'Rejected'})
+        self.client.patch(reverse('jobapplication-bulk'), [{'id': created[1]['id'], 'company_name': "Hooli"}], format='json')
+        self.client.delete(reverse('jobapplication-detail', args=[created[0]['id']]))
+        JobApplication.objects.create(user=self.user, job_title="Gone", company_name="Acme").delete()
+
+        with self.assertNumQueries(1):
+            stats = self.client.get(reverse('jobapplication-stats')).data
+
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['by_status'], {'Applied': 1, 'Interviewing': 0, 'Offer': 1, 'Rejected': 1})
+        self.assertEqual(stats['by_week'], [{'week': '2024-04-29', 'count': 1}, {'week': '2024-05-06', 'count': 1}])
+        self.assertEqual(stats['by_company'], [
+            {'company': "Acme", 'count': 1}, {'company': "Hooli", 'count': 1}, {'company': "Initech", 'count': 1},
+        ])
+        self.assertEqual(stats['conversion']['offer_rate'], 0.3333)
+        self.assertEqual(stats['conversion']['offer_rate_after_interview'], 1.0)
+        # Nothing for a recount to fix
+        self.assertEqual(analytics.rebuild([self.user.id]), 0)
+
+    def test_saves_of_stale_copies_count_from_the_stored_values(self):
+        application = JobApplication.objects.create(user=self.user, job_title="A")
+        first, second = JobApplication.objects.get(pk=application.pk), JobApplication.objects.get(pk=application.pk)
+
+        first.status = 'Interviewing'
+        first.save()
+        second.status = 'Rejected'
+        second.save()
+
+        by_status = analytics.summary(self.user.id)['by_status']
+        self.assertEqual((by_status['Applied'], by_status['Interviewing'], by_status['Rejected']), (0, 0, 1))
+        self.assertEqual(analytics.rebuild([self.user.id]), 0)
+
+    def test_rebuild_fixes_drift(self):
+        JobApplication.objects.create(user=self.user, job_title="A", company_name="Acme")
+        JobApplication.objects.create(user=self.user, job_title="B", company_name="Acme")
+        JobApplicationStat.objects.filter(user=self.user, dimension='company').update(count=7)
+        JobApplicationStat.objects.create(user=self.user, dimension='week', key='2020-01-06', count=1)
+
+        self.assertEqual(analytics.rebuild([self.user.id]), 2)
+
+        stats = analytics.summary(self.user.id)
+        self.assertEqual(stats['by_company'], [{'company': "Acme", 'count': 2}])
+        self.assertEqual(stats['by_week'], [])
+        self.assertFalse(JobApplicationStat.objects.filter(dimension='week').exists())
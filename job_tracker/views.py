@@ -1,41 +1,236 @@
-from django.core.cache import cache
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from core import response_cache, search
+from core.export import export_response
+from core.cached_response import CachedResponse, cached_json_response
+from core.conditional import ConditionalGetMixin
+from core.mixins import SparseFieldsetMixin
+from core.response_cache import CachedReadMixin
+from core.search import SearchMixin
 
+from . import analytics, importing
 from .models import JobApplication
+from .pagination import JobApplicationCursorPagination
 from .serializers import JobApplicationSerializer
 
 
-class JobApplicationViewSet(viewsets.ModelViewSet):
+def is_id(value):
+    # bool is an int subclass, but true/false are not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class JobApplicationViewSet(CachedReadMixin, ConditionalGetMixin, SearchMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
+    """
+    The current user's job applications. The list is cursor-paginated,
+    newest first, and leaves out the long text fields unless they are
+    requested with `?include=` or `?fields=`. Reads carry an ETag, and
+    unchanged data is answered with 304. Responses are cached per user until
+    one of their applications changes (see signals.py).
+
+    `?q=` searches titles, companies, notes and job descriptions and returns
+    the best matches with highlights instead of a page (see core/search.py).
+
+    `/bulk/` creates (POST), partially updates (PATCH) or soft-deletes
+    (DELETE) up to `JOB_APPLICATION_BULK_MAX` applications in one request and
+    one transaction.
+
+    `/stats/` returns counts by status, week applied and company, and
+    conversion rates, from per-user counts kept up to date on every change
+    (see analytics.py).
+
+    `/export/` streams all of them as CSV or NDJSON (see core/export.py);
+    `?resume_title=1` adds the title of the resume used. `/import/` takes a
+    CSV or NDJSON upload in the same columns (see importing.py); send
+    `Prefer: respond-async` to import in the background.
+    """
     serializer_class = JobApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = JobApplicationCursorPagination
+    cache_namespace = 'job_applications'
+    list_exclude = ('original_job_description', 'notes')
+    deferrable_fields = ('original_job_description', 'notes')
+    highlight_fields = ('job_title', 'company_name', 'notes', 'original_job_description')
 
     def get_queryset(self):
         """
         This view should return a list of all the job applications
         for the currently authenticated user.
         """
-        return self.request.user.jobapplication_set.filter(is_deleted=False)
+        return self.request.user.jobapplication_set.filter(is_deleted=False).defer('search_vector')
 
     def perform_create(self, serializer):
         """Associate the user with the job application."""
         serializer.save(user=self.request.user)
 
-    def perform_destroy(self, instance):
-        """Soft delete the job application."""
-        instance.is_deleted = True
-        instance.save()
+    def destroy(self, request, *args, **kwargs):
+        """Soft delete the job application, with a single UPDATE."""
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise NotFound()
+        if not self.soft_delete([pk]):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    EXPORT_COLUMNS = (
+        'id', 'job_title', 'company_name', 'status', 'date_applied', 'resume_used',
+        'original_job_description', 'notes', 'created_at', 'updated_at',
+    )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        return Response(analytics.summary(request.user.id))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        queryset = self.get_queryset().order_by('-created_at', '-id')
+        columns = self.EXPORT_COLUMNS
+        if request.query_params.get('resume_title') in ('1', 'true'):
+            queryset = queryset.annotate(resume_used_title=F('resume_used__title'))
+            columns += ('resume_used_title',)
+        return export_response(request, queryset, columns, 'job_applications')
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request, *args, **kwargs):
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            raise ValidationError({'file': "Upload a CSV or NDJSON file."})
+        input_format = importing.detect_format(request.query_params.get('as'), uploaded_file.name)
+        if input_format not in importing.FORMATS:
+            raise ValidationError({'as': f"Choose one of: {', '.join(importing.FORMATS)}."})
+
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            job = importing.enqueue_import(request.user, uploaded_file, input_format)
+            status_url = reverse('job-status', kwargs={'job_id': job['id']})
+            return Response(
+                {"job_id": job['id'], "status": job['status'], "status_url": status_url},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': status_url},
+            )
+
+        summary = importing.import_rows(request.user, importing.read_rows(uploaded_file.chunks(), input_format))
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        POST: a list of applications to create.
+        PATCH: a list of partial updates, each with the `id` it applies to.
+        DELETE: `{"ids": [...]}` to soft delete.
+        Nothing is saved if any item is invalid; errors are listed in the order
+        of the items, with `{}` for the valid ones.
+        """
+        if request.method == 'DELETE':
+            ids = request.data.get('ids') if isinstance(request.data, dict) else None
+            self.check_batch(ids)
+            errors = [{} if is_id(pk) else {'id': ["A valid integer is required."]} for pk in ids]
+            if any(errors):
+                raise ValidationError({'errors': errors})
+            return Response({'deleted': self.soft_delete(ids)})
+        self.check_batch(request.data)
+        if request.method == 'POST':
+            return self.bulk_create(request.data)
+        return self.bulk_update(request.data)
+
+    def bulk_create(self, items):
+        serializers = [self.get_serializer(data=item) for item in items]
+        self.validate_all(serializers)
+
+        with transaction.atomic():
+            instances = [JobApplication(user=self.request.user, **serializer.validated_data) for serializer in serializers]
+            for instance in instances:
+                search.set_vector(instance)
+            created = JobApplication.objects.bulk_create(instances)
+            analytics.record(created)
+        self.invalidate_cache()
+        return Response(self.get_serializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        with transaction.atomic():
+            # Locked, so concurrent updates of the same rows each count from what the other left
+            instances = self.get_queryset().select_for_update().in_bulk([pk for pk in ids if is_id(pk)])
+            serializers = [
+                self.get_serializer(instances[pk], data=item, partial=True) if pk in instances else None
+                for pk, item in zip(ids, items)
+            ]
+            errors = [
+                {'id': ["Not found."]} if serializer is None else ({} if serializer.is_valid() else serializer.errors)
+                for serializer in serializers
+            ]
+            if any(errors):
+                raise ValidationError({'errors': errors})
+
+            now = timezone.now()
+            fields = {'updated_at'}
+            for serializer in serializers:
+                for field, value in serializer.validated_data.items():
+                    setattr(serializer.instance, field, value)
+                    fields.add(field)
+                # bulk_update() skips auto_now
+                serializer.instance.updated_at = now
+            updated = [serializer.instance for serializer in serializers]
+            if fields & {name for name, _ in JobApplication.SEARCH_FIELDS}:
+                for instance in updated:
+                    search.set_vector(instance)
+                fields.add('search_vector')
+            JobApplication.objects.bulk_update(updated, list(fields))
+            analytics.record(updated)
+        self.invalidate_cache()
+        return Response(self.get_serializer(updated, many=True).data)
+
+    def soft_delete(self, ids):
+        with transaction.atomic():
+            rows = self.get_queryset().filter(pk__in=ids)
+            # Locked, so a concurrent delete of the same rows can't count them twice
+            removed = list(rows.select_for_update().values(*analytics.FIELDS))
+            count = rows.update(is_deleted=True, updated_at=timezone.now())
+            analytics.remove(removed)
+        self.invalidate_cache()
+        return count
+
+    def validate_all(self, serializers):
+        errors = [{} if serializer.is_valid() else serializer.errors for serializer in serializers]
+        if any(errors):
+            raise ValidationError({'errors': errors})
+
+    def check_batch(self, items):
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'detail': "Expected a non-empty list."})
+        if len(items) > settings.JOB_APPLICATION_BULK_MAX:
+            raise ValidationError({'detail': f"At most {settings.JOB_APPLICATION_BULK_MAX} items per request."})
+
+    def invalidate_cache(self):
+        # Bulk queries don't send model signals
+        user_id = self.request.user.id
+        transaction.on_commit(lambda: response_cache.invalidate(self.cache_namespace, user_id))
+
+
+def build_examples():
+    return JobApplicationSerializer(JobApplication.objects.filter(is_example=True)[:5], many=True).data
+
+
+# Example rows only change through the admin, which invalidates the entry (see signals.py)
+examples = CachedResponse('example_job_applications', build_examples, ttl=60 * 60 * 24)
 
 
 class ExampleJobApplicationViewSet(viewsets.ReadOnlyModelViewSet):
     """
     A viewset that provides 5 sample job applications for anonymous users.
-    This view is cached for 24 hours to reduce database load.
+    The list is cached in Redis for 24 hours and shared by all requests. It is
+    the same for everyone, so proxies and CDNs may cache it too.
     """
     serializer_class = JobApplicationSerializer
     permission_classes = [permissions.AllowAny]
-    CACHE_KEY = "example_job_applications"
-    CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
+    HTTP_CACHE_CONTROL = {'public': True, 'max_age': 60 * 60}
 
     def get_queryset(self):
         """
@@ -44,27 +239,4 @@ class ExampleJobApplicationViewSet(viewsets.ReadOnlyModelViewSet):
         return JobApplication.objects.filter(is_example=True)[:5]
 
     def list(self, request, *args, **kwargs):
-        # Try to get the data from the cache first
-        # cached_data = cache.get(self.CACHE_KEY)
-        cached_data = False  # Disable cache for testing purposes
-        if cached_data:
-            # Cache Hit: Add status and return
-            response_data = {
-                'cache_status': 'HIT (Response from Redis cache)',
-                'data': cached_data
-            }
-            return Response(response_data, headers={'X-Cache-Status': 'HIT'})
-
-        # Cache Miss: Fetch from DB
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        
-        # Save the raw serialized data to the cache
-        cache.set(self.CACHE_KEY, serializer.data, self.CACHE_TIMEOUT)
-        
-        # Prepare response body with status
-        response_data = {
-            'cache_status': 'MISS (Response from database)',
-            'data': serializer.data
-        }
-        return Response(response_data, headers={'X-Cache-Status': 'MISS'})
\ No newline at end of file
+        return cached_json_response(request, examples.get(), self.HTTP_CACHE_CONTROL)
@@ -1,16 +1,18 @@
 import os
 import uuid
 import threading
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, constant
 
 # ======================================================================================
 #  docker compose -f docker-compose.locust.yml up
 #  PERFORMANCE LOCUSTFILE
 #
-#  This file contains 3 main test scenarios:
+#  This file contains 4 main test scenarios:
 #  1. Anonymous users browsing public, fast endpoints.
 #  2. An authenticated user managing their job applications (listing and creating).
 #  3. An authenticated user generating a resume using the AI endpoint.
+#  4. Many concurrent generations against the fake AI provider, to compare the
+#     gevent and ASGI server modes (see AIConcurrencyUser).
 #
 #  TO RUN ONLY A SPECIFIC TEST:
 #  Use the class name when starting Locust, e.g.:
@@ -186,3 +188,39 @@ class AIResumeUser(HttpUser):
             },
             name="/api/ai/generate/",
         )
+
+
+# ======================================================================================
+#  TEST CASE 4: Concurrent AI Generations (gevent vs. ASGI benchmark)
+# ======================================================================================
+
+class AIConcurrencyUser(HttpUser):
+    """
+    Keeps as many resume generations in flight as there are users, against a
+    model using the fake provider, so no real API is called.
+
+    To compare the two server modes, run the backend once with SERVER_MODE=gevent
+    and once with SERVER_MODE=asgi, both with:
+      AI_FAKE_PROVIDER_LATENCY=10      # every generation waits 10 seconds
+      AI_ANON_RATE_LIMIT=0             # no per-IP quota
+      AI_PROVIDER_MAX_CONCURRENCY=5000 # don't let the bulkhead cap the test
+    and an active AIModel with the "Fake" provider named LOAD_TEST_MODEL. Then:
+      locust -f locustfile.py AIConcurrencyUser --headless -u 2000 -r 200 -t 3m
+    and compare requests/s, p95 latency (ideally just over 10s) and failures,
+    plus the backend's memory use from `docker stats`.
+    """
+    host = TARGET_HOST
+    wait_time = constant(0)
+    model = os.environ.get("LOAD_TEST_MODEL", "Fake")
+
+    @task
+    def generate_resume(self):
+        # A unique input per request keeps the generation cache out of the picture
+        self.client.post(
+            "/api/ai/generate/",
+            json={
+                "model": self.model,
+                "user_input": f"Load test {uuid.uuid4()}: senior software engineer with ten years of Python and Django experience.",
+            },
+            name="/api/ai/generate/ (Fake provider)",
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ResumeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resume'
+
+    def ready(self):
+        # Invalidate cached API responses when resumes change
+        from . import signals  # noqa: F401
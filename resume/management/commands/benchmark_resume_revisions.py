@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from resume import revisions
+
+SECTIONS = ['Summary', 'Experience', 'Projects', 'Skills', 'Education']
+
+
+def sample_resume(rng, jobs=6):
+    lines = ['# Jane Doe', '', 'jane@example.com | +1 555 0100 | github.com/janedoe', '']
+    for section in SECTIONS:
+        lines += [f'## {section}', '']
+        for job in range(jobs):
+            lines.append(f'### Role {job} at Company {rng.randint(1, 999)} ({2010 + job} - {2011 + job})')
+            lines += [f'- Delivered {rng.choice(["APIs", "pipelines", "dashboards"])} '
+                      f'serving {rng.randint(1, 900)}k users with {rng.choice(["Django", "Postgres", "Redis"])}'
+                      for _ in range(4)]
+            lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+def edit(rng, content):
+    """
+    A typical edit: reword, add or remove a few bullet points.
+    """
+    lines = content.splitlines(keepends=True)
+    for _ in range(rng.randint(1, 3)):
+        index = rng.randrange(len(lines))
+        action = rng.choice(['reword', 'add', 'remove'])
+        if action == 'reword':
+            lines[index] = f'- Reworded achievement {rng.randint(1, 10 ** 6)}\n'
+        elif action == 'add':
+            lines.insert(index, f'- New achievement {rng.randint(1, 10 ** 6)}\n')
+        elif len(lines) > 10:
+            del lines[index]
+    return ''.join(lines)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the storage of resume history as compressed reverse deltas with keyframes '
+        'against full copies, and measures how long rebuilding a version takes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revisions', type=int, default=100, help='Number of edits to simulate.')
+        parser.add_argument('--keyframe-interval', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        interval = options['keyframe_interval']
+        versions = [sample_resume(rng)]
+        for _ in range(options['revisions'] - 1):
+            versions.append(edit(rng, versions[-1]))
+
+        # The last version is the resume itself; each earlier one is a revision
+        current, history = versions[-1], versions[:-1]
+        stored = []
+        for number, content in enumerate(history, start=1):
+            if number % interval == 0:
+                stored.append((True, revisions.encode(content)))
+            else:
+                stored.append((False, revisions.encode(revisions.make_delta(versions[number], content))))
+
+        timings = []
+        for index in range(len(history)):
+            started = time.perf_counter()
+            # The nearest keyframe after the version, or the resume
+            newest = min(index + (interval - 1 - index % interval), len(stored))
+            content = current
+            for is_keyframe, data in reversed(stored[index:newest + 1]):
+                payload = revisions.decode(data)
+                content = payload if is_keyframe else revisions.apply_delta(content, payload)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert content == history[index]
+
+        full = sum(len(content.encode()) for content in history)
+        stored_bytes = sum(len(data) for _, data in stored)
+        self.stdout.write(f"{len(history)} revisions of a ~{len(versions[0].encode()) // 1024} KB resume, keyframe every {interval}")
+        self.stdout.write(f"  full copies:   {full / 1024:.1f} KB")
+        self.stdout.write(f"  delta history: {stored_bytes / 1024:.1f} KB ({stored_bytes / full:.1%} of full copies)")
+        self.stdout.write(
+            f"  rebuild time:  mean {statistics.mean(timings):.2f} ms, max {max(timings):.2f} ms"
+        )
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_content_summary(apps, schema_editor):
+    """
+    Computes the summary columns for existing resumes. Uses a copy of
+    `resume.models.summarize_content` as it was when this migration was written.
+    """
+    import hashlib
+    Resume = apps.get_model('resume', 'Resume')
+
+    batch = []
+    for resume in Resume.objects.only('id', 'content').iterator(chunk_size=BATCH_SIZE):
+        excerpt = ' '.join(resume.content.split())
+        if len(excerpt) > 160:
+            excerpt = excerpt[:159].rstrip() + '…'
+        resume.content_length = len(resume.content)
+        resume.content_checksum = hashlib.sha256(resume.content.encode()).hexdigest()
+        resume.content_excerpt = excerpt
+        batch.append(resume)
+        if len(batch) >= BATCH_SIZE:
+            Resume.objects.bulk_update(batch, ['content_length', 'content_checksum', 'content_excerpt'])
+            batch = []
+    Resume.objects.bulk_update(batch, ['content_length', 'content_checksum', 'content_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0003_resume_resume_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='content_checksum',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='content_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=160),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='content_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_content_summary, migrations.RunPython.noop),
+    ]
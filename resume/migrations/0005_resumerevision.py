@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0004_resume_content_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('content_length', models.PositiveIntegerField(default=0)),
+                ('content_checksum', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField()),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='resume.resume')),
+            ],
+            options={
+                'ordering': ['-number'],
+                'constraints': [models.UniqueConstraint(fields=('resume', 'number'), name='resumerevision_unique_number')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+import core.fields
+from django.db import migrations
+from core.migration_operations import AlterFieldToCompressedText, compress_existing_rows
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0005_resumerevision'),
+    ]
+
+    operations = [
+        AlterFieldToCompressedText(
+            model_name='resume',
+            name='content',
+            field=core.fields.CompressedTextField(),
+        ),
+        # Compressed rows can't be turned back into text by the database
+        migrations.RunPython(compress_existing_rows('resume', 'Resume', ['content'])),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:33
+
+import core.search
+import django.contrib.postgres.indexes
+from django.db import migrations
+from core.migration_operations import AddPostgreSQLIndex, fill_search_vectors
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume', '0006_compress_resume_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='search_vector',
+            field=core.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            fill_search_vectors('resume', 'Resume', [('title', 'A'), ('content', 'B')]),
+            migrations.RunPython.noop,
+        ),
+        AddPostgreSQLIndex(
+            model_name='resume',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='resume_search_idx'),
+        ),
+    ]
@@ -1,5 +1,24 @@
+import hashlib
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from core import search
+from core.fields import CompressedTextField
+from . import revisions
+
+EXCERPT_LENGTH = 160
+
+
+def summarize_content(content):
+    """
+    Returns `(length, checksum, excerpt)` for a resume body. Stored next to the
+    content so list views can describe a resume without loading it.
+    """
+    excerpt = ' '.join(content.split())
+    if len(excerpt) > EXCERPT_LENGTH:
+        excerpt = excerpt[:EXCERPT_LENGTH - 1].rstrip() + '…'
+    return len(content), hashlib.sha256(content.encode()).hexdigest(), excerpt
+
 
 class Resume(models.Model):
     """
@@ -7,12 +26,68 @@ class Resume(models.Model):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumes')
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    content = CompressedTextField()
+    # Kept in sync with `content` by save()
+    content_length = models.PositiveIntegerField(default=0, editable=False)
+    content_checksum = models.CharField(max_length=64, blank=True, editable=False)
+    content_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    # Kept in sync with SEARCH_FIELDS by save() (see core/search.py)
+    search_vector = search.SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    SEARCH_FIELDS = (('title', 'A'), ('content', 'B'))
+
     def __str__(self):
         return f"'{self.title}' by {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            # The version this save replaces becomes a revision (see revisions.py)
+            previous = revisions.lock_previous(self, update_fields)
+            # A deferred content that was never loaded has not changed either
+            if 'content' not in self.get_deferred_fields():
+                self.content_length, self.content_checksum, self.content_excerpt = summarize_content(self.content)
+                if update_fields is not None and 'content' in update_fields:
+                    kwargs['update_fields'] = {*update_fields, 'content_length', 'content_checksum', 'content_excerpt'}
+            saved_fields = search.set_vector(self, kwargs.get('update_fields'))
+            if saved_fields is not None:
+                kwargs['update_fields'] = saved_fields
+            super().save(*args, **kwargs)
+            if previous is not None:
+                revisions.record(self, previous, update_fields)
+
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            # Serves the paginated list of a user's resumes, newest first
+            models.Index(fields=['user', '-updated_at', '-id'], name='resume_user_updated_idx'),
+            # Serves ?q= searches; created on PostgreSQL only
+            GinIndex(fields=['search_vector'], name='resume_search_idx'),
+        ]
+
+
+class ResumeRevision(models.Model):
+    """
+    An earlier version of a resume, saved at `created_at`. `data` holds
+    either the full text (keyframes) or a compressed delta from the next
+    newer version; see revisions.py. The resume itself is the newest version.
+    """
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    is_keyframe = models.BooleanField(default=False)
+    data = models.BinaryField()
+    content_length = models.PositiveIntegerField(default=0)
+    content_checksum = models.CharField(max_length=64)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Revision {self.number} of resume {self.resume_id}"
+
     class Meta:
-        ordering = ['-updated_at']
\ No newline at end of file
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['resume', 'number'], name='resumerevision_unique_number'),
+        ]
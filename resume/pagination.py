@@ -0,0 +1,12 @@
+from core.pagination import StableCursorPagination
+
+
+class ResumeCursorPagination(StableCursorPagination):
+    """
+    Most recently updated first, so the order follows `updated_at` and shifts
+    when a resume is edited mid-scan: the edited resume moves to the front,
+    behind the cursor, and a client paging through the list misses it if it
+    had not reached it yet.
+    """
+    # Matches the (user, -updated_at, -id) index on Resume
+    ordering = ('-updated_at', '-id')
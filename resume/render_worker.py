@@ -0,0 +1,97 @@
+"""
+Markdown -> HTML -> PDF conversion for resumes.
+
+Runs in the render process pool (see rendering.py), so this module must not
+import Django. Bump `TEMPLATE_VERSION` whenever the output changes for the same
+input (template, styles, library upgrades that matter): cached renders are
+keyed on it.
+
+Resume content comes from users, so raw HTML in it is escaped instead of
+passed through, links and images keep only `SAFE_URL_SCHEMES` (or relative
+URLs), and WeasyPrint is not allowed to fetch anything: the PDF can't embed
+server files or make the server request other URLs.
+"""
+import html
+from urllib.parse import urlsplit
+
+TEMPLATE_VERSION = 2
+SAFE_URL_SCHEMES = ('http', 'https', 'mailto', 'tel')
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+  @page {{ size: A4; margin: 18mm 16mm; }}
+  body {{ font-family: "DejaVu Sans", Arial, sans-serif; font-size: 10.5pt; line-height: 1.45; color: #222; }}
+  h1 {{ font-size: 20pt; margin: 0 0 4pt; }}
+  h2 {{ font-size: 12.5pt; border-bottom: 1px solid #999; padding-bottom: 2pt; margin: 14pt 0 6pt; text-transform: uppercase; }}
+  h3 {{ font-size: 11pt; margin: 10pt 0 2pt; }}
+  ul {{ margin: 2pt 0 6pt; padding-left: 14pt; }}
+  li {{ margin-bottom: 2pt; }}
+  a {{ color: #1a4f8b; text-decoration: none; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def is_safe_url(url):
+    # Browsers ignore leading whitespace and control characters in URLs
+    scheme = urlsplit(url.lstrip(''.join(map(chr, range(33))))).scheme
+    return not scheme or scheme.lower() in SAFE_URL_SCHEMES
+
+
+def safe_markdown():
+    """
+    An extension for `markdown` that escapes raw HTML and drops unsafe link
+    and image URLs. Must be listed after `extra`, which replaces the raw HTML
+    preprocessor.
+    """
+    from markdown.extensions import Extension
+    from markdown.treeprocessors import Treeprocessor
+
+    class DropUnsafeURLs(Treeprocessor):
+        def run(self, root):
+            for element in root.iter():
+                for attribute in ('href', 'src'):
+                    if attribute in element.attrib and not is_safe_url(element.attrib[attribute]):
+                        del element.attrib[attribute]
+
+    class SafeMarkdown(Extension):
+        def extendMarkdown(self, md):
+            # Without these, raw HTML is treated as text and escaped
+            md.preprocessors.deregister('html_block')
+            md.inlinePatterns.deregister('html')
+            md.treeprocessors.register(DropUnsafeURLs(md), 'drop_unsafe_urls', 0)
+
+    return SafeMarkdown()
+
+
+def render_html(title, content):
+    import markdown
+    body = markdown.markdown(content, extensions=['extra', 'sane_lists', safe_markdown()])
+    return TEMPLATE.format(title=html.escape(title), body=body).encode('utf-8')
+
+
+def refuse_url(url, *args, **kwargs):
+    raise ValueError(f"Resumes can't load {url}")
+
+
+def render_pdf(title, content):
+    from weasyprint import HTML
+    return HTML(string=render_html(title, content).decode('utf-8'), url_fetcher=refuse_url).write_pdf()
+
+
+RENDERERS = {
+    'html': render_html,
+    'pdf': render_pdf,
+}
+
+
+def render(kind, title, content):
+    return RENDERERS[kind](title, content)
@@ -0,0 +1,27 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class RenderedResumeRenderer(BaseRenderer):
+    """
+    Lets clients that ask for a rendered format (e.g. `Accept: application/pdf`)
+    pass DRF content negotiation. Successful responses are files and skip the
+    renderer; errors are sent as JSON.
+    """
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data).encode()
+
+
+class PDFRenderer(RenderedResumeRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class HTMLRenderer(RenderedResumeRenderer):
+    media_type = 'text/html'
+    format = 'html'
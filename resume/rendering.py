@@ -0,0 +1,119 @@
+"""
+Rendered (HTML / PDF) resumes, cached on local disk.
+
+A render is keyed on the resume's `content_checksum`, its title, the output
+kind and the template version, so the key (and the ETag built from it) is
+known without loading or rendering the content. Unchanged resumes are served
+from the cache, or answered with 304, at no rendering cost.
+
+Rendering runs in a bounded process pool: WeasyPrint is CPU-heavy and would
+otherwise stall every other request of a gevent worker. Under gevent, waiting
+for the pool's result only suspends the calling greenlet.
+
+The cache directory is trimmed to `RESUME_RENDER_CACHE_MAX_BYTES`, dropping
+the least recently used renders first (hits refresh a file's mtime).
+"""
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from . import render_worker
+
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+_lock = threading.Lock()
+_pool = None
+
+
+def render_key(resume, kind):
+    parts = (render_worker.TEMPLATE_VERSION, kind, resume.title, resume.content_checksum)
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def open_cached(key, kind):
+    """
+    Opens a cached render for reading, or returns None. Marks it as recently used.
+    """
+    path = _path(key, kind)
+    try:
+        cached_file = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # Evicted just now; the open file stays readable
+        pass
+    return cached_file
+
+
+def render(resume, kind):
+    """
+    Renders a resume, stores the result and returns it opened for reading.
+    """
+    if settings.RESUME_RENDER_PROCESSES > 0:
+        output = _get_pool().submit(render_worker.render, kind, resume.title, resume.content).result()
+    else:
+        output = render_worker.render(kind, resume.title, resume.content)
+    path = _store(render_key(resume, kind), kind, output)
+    # Opened before evicting, so trimming the cache can't remove it from under us
+    rendered_file = open(path, 'rb')
+    _evict()
+    return rendered_file
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # Spawned, not forked: the workers don't inherit the server's
+            # threads, sockets or gevent state
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RESUME_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _cache_dir():
+    directory = settings.RESUME_RENDER_CACHE_DIR or os.path.join(tempfile.gettempdir(), 'resumate-renders')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _path(key, kind):
+    return os.path.join(_cache_dir(), f"{key}.{kind}")
+
+
+def _store(key, kind, output):
+    path = _path(key, kind)
+    # Written under a temporary name first, so readers never see half a file
+    fd, temp_path = tempfile.mkstemp(dir=_cache_dir(), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(output)
+    os.replace(temp_path, path)
+    return path
+
+
+def _evict():
+    directory = _cache_dir()
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= settings.RESUME_RENDER_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
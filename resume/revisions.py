@@ -0,0 +1,107 @@
+"""
+Version history of resume content, stored as compressed reverse deltas.
+
+The resume itself always holds the newest version. Each save that changes
+its content or title adds a `ResumeRevision` for the version it replaced,
+storing only how to get back to it from the next newer version: a list of
+operations that either copy a range of the newer version's lines or insert
+new lines, JSON-encoded and zlib compressed. Creating a resume adds nothing.
+
+Recent versions are rebuilt from the resume by undoing the newest changes.
+For older ones every `RESUME_REVISION_KEYFRAME_INTERVAL`th revision stores
+its full text instead, so rebuilding any version applies at most that many
+deltas, and a save only diffs the row it replaces.
+"""
+import difflib
+import json
+import zlib
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+
+def make_delta(old, new):
+    """
+    Returns the operations turning `old` into `new`: `[start, end]` copies
+    lines of `old`, a string is inserted as is.
+    """
+    old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    return ''.join(''.join(old_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def encode(payload):
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), 9)
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def lock_previous(resume, update_fields=None):
+    """
+    Locks the resume's row and returns it as stored, or None if the save
+    can't change its content or title. Called by `Resume.save()` in the
+    transaction of the save.
+    """
+    if resume._state.adding or (update_fields is not None and not {'content', 'title'} & set(update_fields)):
+        return None
+    return type(resume).objects.select_for_update().only(
+        'title', 'content', 'content_length', 'content_checksum', 'updated_at',
+    ).filter(pk=resume.pk).first()
+
+
+def record(resume, previous, update_fields=None):
+    """
+    Adds a revision holding `previous` (see `lock_previous`) if the save of
+    `resume` changed its content or title.
+    """
+    def saved(name):
+        return name not in resume.get_deferred_fields() and (update_fields is None or name in update_fields)
+
+    content = resume.content if saved('content') else previous.content
+    title = resume.title if saved('title') else previous.title
+    if content == previous.content and title == previous.title:
+        return None
+
+    latest = resume.revisions.only('number').first()
+    number = latest.number + 1 if latest else 1
+    is_keyframe = number % settings.RESUME_REVISION_KEYFRAME_INTERVAL == 0
+    data = encode(previous.content if is_keyframe else make_delta(content, previous.content))
+    return resume.revisions.create(
+        number=number, title=previous.title, is_keyframe=is_keyframe, data=data,
+        content_length=previous.content_length, content_checksum=previous.content_checksum,
+        created_at=previous.updated_at,
+    )
+
+
+def content_at(resume, number):
+    """
+    Rebuilds the content of revision `number`: from the nearest keyframe
+    after it, or the resume if there is none, each newer delta undone in turn.
+    """
+    revisions = resume.revisions.filter(number__gte=number)
+    newest = revisions.filter(is_keyframe=True).order_by('number').values_list('number', flat=True).first()
+    content = None
+    if newest is None:
+        # The content and the revisions it is newer than, read together
+        content, newest = type(resume).objects.filter(pk=resume.pk).annotate(
+            latest=Subquery(resume.revisions.model.objects.filter(resume=OuterRef('pk')).order_by('-number').values('number')[:1]),
+        ).values_list('content', 'latest').get()
+    if newest is None or newest < number:
+        raise resume.revisions.model.DoesNotExist(f"Revision {number} of resume {resume.pk} does not exist.")
+
+    for is_keyframe, data in revisions.filter(number__lte=newest).order_by('-number').values_list('is_keyframe', 'data'):
+        payload = decode(data)
+        content = payload if is_keyframe else apply_delta(content, payload)
+    return content
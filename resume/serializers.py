@@ -1,12 +1,27 @@
 from rest_framework import serializers
-from .models import Resume
+from core.serializers import DynamicFieldsModelSerializer
+from .models import Resume, ResumeRevision
 
-class ResumeSerializer(serializers.ModelSerializer):
+class ResumeSerializer(DynamicFieldsModelSerializer):
     """
     Serializer for the Resume model.
+    The content_* fields summarize `content` and are computed on save.
     """
     user = serializers.ReadOnlyField(source='user.username')
 
     class Meta:
         model = Resume
-        fields = ['id', 'user', 'title', 'content', 'created_at', 'updated_at']
+        fields = [
+            'id', 'user', 'title', 'content',
+            'content_length', 'content_checksum', 'content_excerpt',
+            'created_at', 'updated_at',
+        ]
+
+
+class ResumeRevisionSerializer(serializers.ModelSerializer):
+    """
+    A revision without its content, which is rebuilt only when one revision is fetched.
+    """
+    class Meta:
+        model = ResumeRevision
+        fields = ['number', 'title', 'content_length', 'content_checksum', 'is_keyframe', 'created_at']
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import response_cache
+from .models import Resume
+
+
+def invalidate_resumes(user_id):
+    # After commit, so a concurrent read can't cache the old rows under the new generation
+    transaction.on_commit(lambda: response_cache.invalidate('resumes', user_id))
+
+
+@receiver(post_save, sender=Resume)
+def resume_saved(sender, instance, **kwargs):
+    invalidate_resumes(instance.user_id)
+
+
+@receiver(post_delete, sender=Resume)
+def resume_deleted(sender, instance, **kwargs):
+    invalidate_resumes(instance.user_id)
+    # Applications that used this resume now point to nothing (SET_NULL skips signals)
+    transaction.on_commit(lambda: response_cache.invalidate('job_applications', instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Resumes show their owner's username
+    if not created:
+        invalidate_resumes(instance.pk)
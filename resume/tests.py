@@ -1,5 +1,339 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django_redis import get_redis_connection
+from . import render_worker, rendering, revisions
+from job_tracker.models import JobApplication
+from .models import Resume, ResumeRevision
 
 class ResumeAppTest(TestCase):
     def test_resume_app_is_working(self):
         self.assertTrue(True)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ResumeListPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_every_resume_once(self):
+        resumes = [Resume.objects.create(user=self.user, title=f"Resume {i}", content="# CV") for i in range(5)]
+        Resume.objects.create(user=User.objects.create_user(username='other'), title="Not mine", content="# CV")
+
+        seen = []
+        url = reverse('resume-list') + '?page_size=2'
+        while url:
+            page = self.client.get(url).data
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+
+        # Most recently updated first, ties broken by id
+        self.assertEqual(seen, [resume.id for resume in reversed(resumes)])
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ResumeSummaryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='summarizer', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.resume = Resume.objects.create(user=self.user, title="CV", content="# Jane Doe\n\n" + "Python " * 100)
+
+    def test_summary_is_kept_in_sync_with_content(self):
+        self.resume.content = "# Short"
+        self.resume.save(update_fields=['content'])
+        self.resume.refresh_from_db()
+
+        self.assertEqual(self.resume.content_length, 7)
+        self.assertEqual(self.resume.content_excerpt, "# Short")
+
+    def test_list_returns_summaries_without_loading_content(self):
+        with CaptureQueriesContext(connection) as queries:
+            item = self.client.get(reverse('resume-list')).data['results'][0]
+
+        self.assertNotIn('content', item)
+        self.assertEqual(item['content_length'], len(self.resume.content))
+        self.assertTrue(item['content_excerpt'].startswith("# Jane Doe Python"))
+        self.assertFalse(any('"content",' in query['sql'] for query in queries.captured_queries))
+
+    def test_content_can_be_requested(self):
+        included = self.client.get(reverse('resume-list'), {'include': 'content'}).data['results'][0]
+        sparse = self.client.get(reverse('resume-list'), {'fields': 'id,title'}).data['results'][0]
+        detail = self.client.get(reverse('resume-detail', args=[self.resume.id])).data
+
+        self.assertEqual(included['content'], self.resume.content)
+        self.assertEqual(set(sparse), {'id', 'title'})
+        self.assertEqual(detail['content'], self.resume.content)
+        self.assertEqual(self.client.get(reverse('resume-list'), {'fields': 'nope'}).status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ResumeConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='revalidator', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.resume = Resume.objects.create(user=self.user, title="CV", content="# CV")
+
+    def test_unchanged_resumes_are_answered_with_304(self):
+        for url in (reverse('resume-list'), reverse('resume-detail', args=[self.resume.id])):
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(len(queries), 1)  # just the aggregate
+            self.assertIn('private', first['Cache-Control'])
+            self.assertIn('Authorization', first['Vary'])
+
+    def test_non_numeric_id_is_not_found(self):
+        response = self.client.get(reverse('resume-detail', args=['abc']))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_changes_produce_a_new_etag(self):
+        url = reverse('resume-list')
+        etag = self.client.get(url)['ETag']
+        Resume.objects.create(user=self.user, title="Second CV", content="# CV")
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_changes_to_what_rows_show_produce_a_new_etag(self):
+        JobApplication.objects.create(user=self.user, job_title="Engineer", resume_used=self.resume)
+        resumes_url, applications_url = reverse('resume-list'), reverse('jobapplication-list')
+        resumes_etag, applications_etag = self.client.get(resumes_url)['ETag'], self.client.get(applications_url)['ETag']
+
+        # Neither touches the updated_at of the rows listed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = 'renamed'
+            self.user.save()
+        self.assertEqual(self.client.get(resumes_url, HTTP_IF_NONE_MATCH=resumes_etag).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resume.delete()
+        self.assertEqual(self.client.get(applications_url, HTTP_IF_NONE_MATCH=applications_etag).status_code, 200)
+
+
+class ResumeResponseCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cached', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Database ids are reused between tests, so start from a fresh generation
+        get_redis_connection("default").delete(f"rcache:gen:resumes:{self.user.id}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resume = Resume.objects.create(user=self.user, title="CV", content="# CV")
+
+    def test_repeated_reads_skip_the_database(self):
+        first = self.client.get(reverse('resume-list'))
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse('resume-list'))
+
+        self.assertEqual((first['X-Cache-Status'], second['X-Cache-Status']), ('MISS', 'HIT'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_changes_invalidate_the_users_cached_reads(self):
+        self.client.get(reverse('resume-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('resume-detail', args=[self.resume.id]), {'title': 'Renamed'}, format='json')
+
+        response = self.client.get(reverse('resume-list'))
+
+        self.assertEqual(response['X-Cache-Status'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['title'], 'Renamed')
+
+
+class ResumeExportTest(TestCase):
+    def test_ndjson_export_includes_content(self):
+        user = User.objects.create_user(username='resume_exporter', password='x')
+        Resume.objects.create(user=user, title="CV", content="# Line one\nLine two")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get(reverse('resume-export'), {'as': 'ndjson'})
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows[0]['content'], "# Line one\nLine two")
+        self.assertEqual(rows[0]['content_length'], 19)
+
+
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ResumeSearchTest(TestCase):
+    def test_search_ranks_matches_and_highlights_them(self):
+        user = User.objects.create_user(username='searcher', password='x')
+        other = User.objects.create_user(username='other_searcher', password='x')
+        once = Resume.objects.create(user=user, title="Backend CV", content="Built APIs with Django.")
+        twice = Resume.objects.create(user=user, title="Django CV", content="Django <b>and</b> Postgres.")
+        Resume.objects.create(user=user, title="Design CV", content="Figma and Sketch.")
+        Resume.objects.create(user=other, title="Django CV", content="Django everywhere.")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get(reverse('resume-list'), {'q': 'django'})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [twice.id, once.id])
+        self.assertNotIn('content', results[0])
+        self.assertEqual(results[0]['highlights']['title'], "<mark>Django</mark> CV")
+        self.assertIn("<mark>Django</mark> &lt;b&gt;and&lt;/b&gt;", results[0]['highlights']['content'])
+        self.assertNotIn('title', results[1]['highlights'])
+
+    def test_search_follows_title_changes(self):
+        user = User.objects.create_user(username='renamer', password='x')
+        resume = Resume.objects.create(user=user, title="Old title", content="Content")
+        resume = Resume.objects.defer('content').get(pk=resume.pk)
+        resume.title = "Platform engineer"
+        resume.save(update_fields=['title'])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.assertEqual(client.get(reverse('resume-list'), {'q': 'platform'}).json()['count'], 1)
+        self.assertEqual(client.get(reverse('resume-list'), {'q': 'old'}).json()['count'], 0)
+
+
+def fake_render(kind, title, content):
+    return f"{kind}:{title}:{content}".encode()
+
+
+class ResumeRenderingTest(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        overrides = override_settings(RESUME_RENDER_PROCESSES=0, RESUME_RENDER_CACHE_DIR=cache_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patcher = mock.patch('resume.render_worker.render', side_effect=fake_render)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username='renderer', password='x')
+        self.resume = Resume.objects.create(user=self.user, title="My CV", content="# Jane Doe")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('resume-pdf', args=[self.resume.id])
+
+    def test_unchanged_resume_is_rendered_once(self):
+        first = self.client.get(self.url)
+        again = self.client.get(self.url)
+        revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(b''.join(first.streaming_content), b"pdf:My CV:# Jane Doe")
+        self.assertIn('my-cv.pdf', first['Content-Disposition'])
+        self.assertEqual(b''.join(again.streaming_content), b"pdf:My CV:# Jane Doe")
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_changed_content_is_rendered_again(self):
+        first = self.client.get(self.url, HTTP_ACCEPT='application/pdf')
+        self.resume.content = "# Jane Q. Doe"
+        self.resume.save()
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(b''.join(second.streaming_content), b"pdf:My CV:# Jane Q. Doe")
+
+    def test_non_numeric_id_is_not_found(self):
+        for name in ('resume-pdf', 'resume-html'):
+            self.assertEqual(self.client.get(reverse(name, args=['abc'])).status_code, 404)
+        self.render.assert_not_called()
+
+    def test_least_recently_used_renders_are_evicted(self):
+        other = Resume.objects.create(user=self.user, title="Other", content="# Other")
+        with override_settings(RESUME_RENDER_CACHE_MAX_BYTES=len(fake_render('html', "Other", "# Other"))):
+            self.client.get(reverse('resume-html', args=[self.resume.id])).close()
+            self.client.get(reverse('resume-html', args=[other.id])).close()
+
+        self.assertIsNone(rendering.open_cached(rendering.render_key(self.resume, 'html'), 'html'))
+        self.assertIsNotNone(rendering.open_cached(rendering.render_key(other, 'html'), 'html'))
+
+
+class ResumeRenderWorkerTest(TestCase):
+    def test_raw_html_is_escaped_and_unsafe_urls_dropped(self):
+        content = (
+            '<link rel="attachment" href="file:///etc/passwd">\n\n'
+            "Hi <script>alert(1)</script> [site](https://example.com) [x](javascript:alert(1)) ![me](file:///etc/hosts)\n"
+        )
+
+        body = render_worker.render_html("CV", content).decode()
+
+        self.assertNotIn('<link', body)
+        self.assertNotIn('<script', body)
+        self.assertIn('&lt;script&gt;', body)
+        self.assertIn('<a href="https://example.com">site</a>', body)
+        self.assertNotIn('javascript:', body)
+        self.assertIn('<img alt="me" />', body)
+        with self.assertRaises(ValueError):
+            render_worker.refuse_url('file:///etc/passwd')
+
+
+@override_settings(RESPONSE_CACHE_TTL=0, RESUME_REVISION_KEYFRAME_INTERVAL=3)
+class ResumeRevisionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reviser', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.resume = Resume.objects.create(user=self.user, title="CV", content="# Jane\n\n- Python\n")
+        self.versions = [self.resume.content]
+        for skill in ("Django", "Redis", "Postgres", "Go"):
+            self.resume.content = self.versions[-1] + f"- {skill}\n"
+            self.resume.save()
+            self.versions.append(self.resume.content)
+
+    def test_replaced_versions_are_stored_as_reverse_deltas_between_keyframes(self):
+        stored = list(self.resume.revisions.order_by('number').values_list('number', 'is_keyframe'))
+        self.resume.save()  # Unchanged content adds nothing
+
+        self.assertEqual(stored, [(1, False), (2, False), (3, True), (4, False)])
+        self.assertEqual(self.resume.revisions.count(), 4)
+        for number, content in enumerate(self.versions[:-1], start=1):
+            self.assertEqual(revisions.content_at(self.resume, number), content)
+        with self.assertRaises(ResumeRevision.DoesNotExist):
+            revisions.content_at(self.resume, 5)
+
+    def test_creating_a_resume_adds_no_revision(self):
+        resume = Resume.objects.create(user=self.user, title="New", content="# New\n")
+        Resume.objects.only('id', 'title').get(pk=resume.pk).save(update_fields=['title'])
+
+        self.assertFalse(resume.revisions.exists())
+
+        resume.title = "Renamed"
+        resume.save(update_fields=['title'])
+        revision = resume.revisions.get()
+        self.assertEqual((revision.number, revision.title), (1, "New"))
+        self.assertEqual(revisions.content_at(resume, 1), "# New\n")
+
+    def test_list_fetch_and_restore(self):
+        listed = self.client.get(reverse('resume-revision-list', args=[self.resume.id])).data
+        fetched = self.client.get(reverse('resume-revision-detail', args=[self.resume.id, 2])).data
+        restored = self.client.post(reverse('resume-revision-restore', args=[self.resume.id, 2]))
+
+        self.assertEqual([revision['number'] for revision in listed], [4, 3, 2, 1])
+        self.assertNotIn('content', listed[0])
+        self.assertEqual(fetched['content'], self.versions[1])
+        self.assertEqual(restored.data['content'], self.versions[1])
+        # The version the restore replaced can itself be restored
+        self.assertEqual(revisions.content_at(self.resume, 5), self.versions[-1])
+
+    def test_non_numeric_resume_id_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('resume-revision-list', args=['abc'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('resume-revision-detail', args=['abc', 1])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('resume-revision-restore', args=['abc', 1])).status_code, 404)
+
+    def test_other_users_revisions_are_hidden(self):
+        other = User.objects.create_user(username='other_reviser', password='x')
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(reverse('resume-revision-detail', args=[self.resume.id, 1])).status_code, 404)
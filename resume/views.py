@@ -1,25 +1,117 @@
-from rest_framework import viewsets
+from django.http import FileResponse
+from django.http import Http404
+from django.utils.text import slugify
+from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from .models import Resume
-from .serializers import ResumeSerializer
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from core.conditional import ConditionalGetMixin, not_modified, set_validators
+from core.export import export_response
+from core.mixins import SparseFieldsetMixin
+from core.response_cache import CachedReadMixin
+from core.search import SearchMixin
+from . import rendering, revisions
+from .models import ResumeRevision
+from .pagination import ResumeCursorPagination
+from .renderers import HTMLRenderer, PDFRenderer
+from .serializers import ResumeRevisionSerializer, ResumeSerializer
 
-class ResumeViewSet(viewsets.ModelViewSet):
+class ResumeViewSet(CachedReadMixin, ConditionalGetMixin, SearchMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing resume instances.
     Provides `list`, `create`, `retrieve`, `update`, and `destroy` actions.
+    The list is cursor-paginated, most recently updated first, and returns
+    summaries without `content` unless asked for with `?include=content`.
+    Reads carry an ETag, and unchanged data is answered with 304. Responses
+    are cached per user until one of their resumes changes (see signals.py).
+    `?q=` searches titles and content and returns the best matches with
+    highlights instead of a page (see core/search.py).
+    `/export/` streams all of them as CSV or NDJSON (see core/export.py).
+    `/<id>/pdf/` and `/<id>/html/` render one, cached until it changes (see rendering.py).
+    `/<id>/revisions/` lists its earlier versions, `/<id>/revisions/<n>/`
+    returns one and `POST /<id>/revisions/<n>/restore/` makes it current
+    again (see revisions.py).
     """
     serializer_class = ResumeSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ResumeCursorPagination
+    cache_namespace = 'resumes'
+    list_exclude = ('content',)
+    deferrable_fields = ('content',)
+    highlight_fields = ('title', 'content')
 
     def get_queryset(self):
         """
         This view should return a list of all the resumes
         for the currently authenticated user.
         """
-        return self.request.user.resumes.all()
+        return self.request.user.resumes.defer('search_vector')
 
     def perform_create(self, serializer):
         """
         Assign the current user to the resume when it is created.
         """
-        serializer.save(user=self.request.user)
\ No newline at end of file
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        columns = ('id', 'title', 'content', 'content_length', 'created_at', 'updated_at')
+        return export_response(request, self.get_queryset().order_by('-updated_at', '-id'), columns, 'resumes')
+
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, PDFRenderer])
+    def pdf(self, request, *args, **kwargs):
+        return self.rendered(request, 'pdf')
+
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, HTMLRenderer])
+    def html(self, request, *args, **kwargs):
+        return self.rendered(request, 'html')
+
+    def rendered(self, request, kind):
+        # The cache key needs only the checksum; content is loaded to render.
+        # DRF's get_object_or_404 also answers 404 for a non-numeric pk.
+        resume = generics.get_object_or_404(self.get_queryset().defer('content'), pk=self.kwargs['pk'])
+        key = rendering.render_key(resume, kind)
+        etag = f'"{key}"'
+
+        response = not_modified(request, etag)
+        if response is None:
+            rendered_file = rendering.open_cached(key, kind) or rendering.render(resume, kind)
+            response = FileResponse(
+                rendered_file, content_type=rendering.CONTENT_TYPES[kind],
+                filename=f"{slugify(resume.title) or 'resume'}.{kind}", as_attachment=kind == 'pdf',
+            )
+        return set_validators(response, etag)
+
+    @action(detail=True, methods=['get'], url_path='revisions')
+    def revision_list(self, request, *args, **kwargs):
+        resume = self.get_resume_for_revisions()
+        queryset = resume.revisions.defer('data')
+        return Response(ResumeRevisionSerializer(queryset, many=True).data)
+
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)')
+    def revision_detail(self, request, number, *args, **kwargs):
+        resume, revision = self.get_revision(number)
+        data = ResumeRevisionSerializer(revision).data
+        data['content'] = revisions.content_at(resume, revision.number)
+        return Response(data)
+
+    @action(detail=True, methods=['post'], url_path=r'revisions/(?P<number>\d+)/restore')
+    def revision_restore(self, request, number, *args, **kwargs):
+        _, revision = self.get_revision(number)
+        resume = self.get_object()
+        resume.title = revision.title
+        resume.content = revisions.content_at(resume, revision.number)
+        # Recorded as a new revision, so the restore can itself be undone
+        resume.save()
+        return Response(self.get_serializer(resume).data, status=status.HTTP_200_OK)
+
+    def get_resume_for_revisions(self):
+        return generics.get_object_or_404(self.get_queryset().only('id', 'user_id'), pk=self.kwargs['pk'])
+
+    def get_revision(self, number):
+        resume = self.get_resume_for_revisions()
+        try:
+            return resume, resume.revisions.defer('data').get(number=number)
+        except ResumeRevision.DoesNotExist:
+            raise Http404
@@ -0,0 +1,68 @@
+"""
+JWT authentication that resolves the token's user from the cache.
+
+simplejwt's `JWTAuthentication` loads the user row on every request. Here the
+fields authentication and permissions need (`CACHED_FIELDS`) are cached by user
+id for `AUTH_USER_CACHE_TTL` seconds, and dropped as soon as the user is saved
+or deleted (see signals.py), which covers deactivation and password changes.
+The password hash is not cached: only the digest of it that tokens already
+carry, for simplejwt's revocation check. Cached users are rebuilt with the
+other fields deferred, so they load from the database if anything reads them,
+and the same checks as simplejwt's are applied.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_KEY = "auth:user:{user_id}"
+CACHED_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def invalidate_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+
+def cached_fields(user):
+    fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        fields['password_digest'] = get_md5_hash_password(user.password)
+    return fields
+
+
+def cached_user(fields):
+    """
+    A user with just the cached fields loaded.
+    """
+    User = get_user_model()
+    # from_db() takes the values in the order of the model's fields
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in CACHED_FIELDS]
+    return User.from_db(router.db_for_read(User), names, [fields[name] for name in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            # Let simplejwt reject the token
+            return super().get_user(validated_token)
+
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        fields = cache.get(key)
+        if not isinstance(fields, dict):
+            user = super().get_user(validated_token)
+            cache.set(key, cached_fields(user), settings.AUTH_USER_CACHE_TTL)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not fields['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != fields.get('password_digest')
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return cached_user(fields)
@@ -0,0 +1,22 @@
+"""
+Password hashers that keep PBKDF2 off the gevent hub (see core/offload.py).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from core import offload
+
+
+class OffloadedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher, with the hashing run in the offload pool and the
+    iteration count taken from `PASSWORD_HASH_ITERATIONS`.
+    Uses the same algorithm name, so existing hashes keep verifying; hashes
+    with a different iteration count are upgraded on the next login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        # verify() and harden_runtime() go through encode() too
+        return offload.run(super().encode, password, salt, iterations)
@@ -0,0 +1,57 @@
+import statistics
+import time
+import gevent
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+from core import offload
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares password hashing inline on the gevent hub with hashing in the offload pool: '
+        'hashes per second, and how late a cheap concurrent task gets to run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashes', type=int, default=20, help='Number of concurrent registrations/logins to simulate.')
+        parser.add_argument('--iterations', type=int, default=0, help="PBKDF2 iterations (default: Django's).")
+
+    def handle(self, *args, **options):
+        hasher = PBKDF2PasswordHasher()
+        iterations = options['iterations'] or hasher.iterations
+
+        def hash_inline():
+            hasher.encode('aVeryStrongPassword!123', hasher.salt(), iterations)
+
+        def hash_offloaded():
+            offload.gevent_pool().apply(hash_inline)
+
+        self.stdout.write(f"{options['hashes']} hashes at {iterations} iterations")
+        for name, hash_one in (('inline', hash_inline), ('offloaded', hash_offloaded)):
+            elapsed, lags = self.run(hash_one, options['hashes'])
+            self.stdout.write(
+                f"{name:>9}: {options['hashes'] / elapsed:.1f} hashes/s, "
+                f"cheap task delay p50 {statistics.median(lags):.0f} ms, max {max(lags):.0f} ms"
+            )
+
+    def run(self, hash_one, count):
+        """
+        Runs `count` hashes concurrently next to a task that wakes up every
+        10 ms, like a cheap endpoint; returns the total time and how late each wake-up was.
+        """
+        lags = []
+        done = False
+
+        def cheap_task():
+            while not done:
+                started = time.monotonic()
+                gevent.sleep(0.01)
+                lags.append(max(0, (time.monotonic() - started - 0.01) * 1000))
+
+        ticker = gevent.spawn(cheap_task)
+        started = time.monotonic()
+        gevent.joinall([gevent.spawn(hash_one) for _ in range(count)])
+        elapsed = time.monotonic() - started
+        done = True
+        ticker.join()
+        return elapsed, lags or [0]
@@ -1,5 +1,78 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from core import offload
+from resume.views import ResumeViewSet
+from .authentication import USER_CACHE_KEY, CachedJWTAuthentication, invalidate_user
 
 class UsersAppTest(TestCase):
     def test_users_app_is_working(self):
         self.assertTrue(True)
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='x')
+        invalidate_user(self.user.pk)
+        get_redis_connection("default").delete(f"rcache:gen:resumes:{self.user.pk}")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.url = reverse('resume-list')
+
+    @mock.patch.object(ResumeViewSet, 'authentication_classes', [JWTAuthentication])
+    def test_uncached_authentication_queries_the_user_every_time(self):
+        self.client.get(self.url)
+
+        # The list itself comes from the response cache; only the user is loaded
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_cached_reads_make_no_queries(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_only_what_authentication_needs_is_cached(self):
+        self.client.get(self.url)
+
+        cached = cache.get(USER_CACHE_KEY.format(user_id=self.user.pk))
+        self.assertEqual(set(cached), {'id', 'is_active', 'is_staff', 'is_superuser'})
+        user = CachedJWTAuthentication().get_user(AccessToken.for_user(self.user))
+        self.assertEqual((user.pk, user.is_active, user.is_staff), (self.user.pk, True, False))
+        self.assertIn('password', user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, 'reader')
+
+    def test_deactivated_user_is_rejected_right_away(self):
+        self.client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class PasswordHashingTest(TestCase):
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_hashes_run_in_the_offload_pool_with_the_configured_cost(self):
+        with mock.patch('core.offload.run', wraps=offload.run) as run:
+            encoded = make_password('aVeryStrongPassword!123')
+
+        run.assert_called_once()
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('aVeryStrongPassword!123', encoded))
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_existing_hashes_verify_and_are_upgraded(self):
+        user = User.objects.create(username='old_hash', password=PBKDF2PasswordHasher().encode('secret-pass', 'salt', 2000))
+
+        self.assertTrue(user.check_password('secret-pass'))
+        self.assertTrue(User.objects.get(pk=user.pk).password.startswith('pbkdf2_sha256$1000$'))